@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+创建降采样汇总的流计算（models/tdengine.py 中的 ROLLUPS），部署时由管理员执行一次：
+    python create_rollups.py [开始时间，如 "2024-01-01 00:00:00"，缺省为所有历史数据]
+流计算已存在时不做任何操作；创建后，时间跨度较长的历史、趋势查询自动改为读取汇总表
+"""
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from dbpkg.RollupManager import target_name
+from models.tdengine import get_rollup_manager
+
+if __name__ == '__main__':
+    start = sys.argv[1] if len(sys.argv) > 1 else None
+    manager = get_rollup_manager()
+    ok = manager.create(start=start)
+    for rollup in manager.rollups:
+        print(f"{rollup.source} -> {target_name(rollup)}（{rollup.interval}，{rollup.aggregate}）")
+    print("创建成功" if ok else "部分流计算创建失败，详见日志")
+    sys.exit(0 if ok else 1)
@@ -1,44 +1,151 @@
-from dbpkg.TDengineDB import TDengineDB
+from dbpkg.TDenginePool import get_pool
+from dbpkg.RollupManager import RollupManager, target_name
+from dbpkg.SegmentCache import SegmentCache
+from dbpkg.settings import get_database_config, get_float
+import logging
+import threading
+import traceback
 import dbpkg.DBBase
 
+logger = logging.getLogger("DigitalTwinApp")
+
+# 后端统一使用的连接选项；服务器、端口、用户名、密码、数据库名称在 get_db_pool() 中读取自
+# dbpkg/config.ini 的 [DatabaseServer] 节，后端通过taosAdapter的REST接口连接，端口为该节的REST_PORT
+DB_OPTIONS = {
+    # 线程安全模式：服务每次调用从连接池借用连接、用完即归还，同一个连接先后被不同的
+    # Flask线程使用，每个线程使用独立的游标
+    "thread_safe": True,
+    # 多个浏览器标签页定时轮询相同的查询，1秒内完全相同的SELECT语句只查询一次数据库
+    "single_flight": True,
+    "single_flight_window": 1.0,
+}
+
+
+def get_db_config():
+    """
+    获取后端的数据库连接参数（配置文件是缓存的，修改后返回新的参数）
+    多个taosAdapter（[DatabaseServer] 节的 REST_ENDPOINTS）时，只读查询（read_only=True、query_many）
+    分散到各个服务器，连接失败的服务器冷却一段时间，写操作固定使用第一个服务器
+    """
+    return {**get_database_config(link_mode=dbpkg.DBBase.REST_LINK), **DB_OPTIONS}
+
+
+def get_db_pool():
+    """
+    获取后端共享的数据库连接池，所有服务和辅助函数都从这里借用连接
+    连接参数每次从配置文件读取，配置文件中的连接参数修改后返回新参数的连接池，旧的连接池随即关闭；
+    借出的连接要归还给借出它的连接池（with pool.connection() 或保存 acquire() 时的连接池）
+    """
+    return get_pool(name="backend", **get_db_config())
+
+
+# 降采样汇总：趋势、历史曲线按固定间隔取样，取每个窗口的第一个值（FIRST），与按整点、
+# 整十分钟取样一致。流计算由 create_rollups.py 在数据库中创建（一次性的管理操作）
+ROLLUPS = [
+    (table, interval)
+    for table in ("realtime_data", "online_cleaning_data", "offline_cleaning_data")
+    for interval in ("10m", "2h", "1d")
+]
+
+# 时间跨度超过该值（毫秒）的取样查询从汇总表读取，较短的查询直接读取原始表
+ROLLUP_MIN_SPAN_MS = 2 * 24 * 3600 * 1000
+
+# 依赖连接池的全局对象（汇总管理器、分段缓存），连接池被替换后用新的连接池重新创建
+_singletons = {}
+_singletons_lock = threading.Lock()
+
+
+def _get_singleton(name, create):
+    """
+    获取依赖后端连接池的全局对象，第一次调用或连接池被替换后调用 create(pool) 创建，多个线程同时调用时只创建一个
+    """
+    pool = get_db_pool()
+    with _singletons_lock:
+        entry = _singletons.get(name)
+        if entry is None or entry[0] is not pool:
+            entry = _singletons[name] = (pool, create(pool))
+        return entry[1]
+
+
+def _create_rollup_manager(pool):
+    manager = RollupManager(pool)
+    for table, interval in ROLLUPS:
+        manager.register(table, interval, aggregate="FIRST")
+    return manager
+
+
+def get_rollup_manager():
+    """
+    获取后端共享的降采样汇总管理器，已登记 ROLLUPS 中的所有汇总
+    """
+    return _get_singleton("rollup_manager", _create_rollup_manager)
+
+
+def table_for_span(table, cols, span_ms, resolution="10m"):
+    """
+    按查询的时间跨度选择读取的表：跨度超过 ROLLUP_MIN_SPAN_MS 时，用 choose() 选择窗口能整除 resolution 的
+    FIRST 汇总表（每条记录为窗口内的第一个值，ts 为窗口的起始时间），跨度较短或汇总表不存在时返回原始表
+    """
+    if span_ms <= ROLLUP_MIN_SPAN_MS:
+        return table
+    try:
+        rollup = get_rollup_manager().choose(table, resolution, cols, "FIRST")
+    except Exception:
+        logger.warning(f"选择{table}的汇总表失败，读取原始表：{traceback.format_exc()}")
+        return table
+    return target_name(rollup) if rollup else table
+
+
+def _create_segment_cache(pool):
+    settle = get_float("config.ini", "Cache", "SEGMENT_SETTLE", 60.0)
+    empty_ttl = get_float("config.ini", "Cache", "SEGMENT_EMPTY_TTL", 300.0)
+    return SegmentCache(pool, segment="1h", max_bytes=256 * 2 ** 20, settle=settle, empty_ttl=empty_ttl)
+
+
+def get_segment_cache():
+    """
+    获取后端共享的时间序列分段缓存（1小时一段，最多占用256MB内存），
+    段结束后仍可能写入迟到数据的时间为 config.ini 中 [Cache] 节的 SEGMENT_SETTLE 秒，
+    没有数据的已结束段缓存 SEGMENT_EMPTY_TTL 秒
+    """
+    return _get_singleton("segment_cache", _create_segment_cache)
+
+
+def query_range(table, cols, start_time, end_time, conditions=None):
+    """
+    查询 [start_time, end_time) 时间范围内的数据（列式结果，ts 为毫秒时间戳），已缓存的时间段不再访问数据库
+    """
+    return get_segment_cache().query(table, cols, start_time, end_time, conditions)
+
+
 def get_latest_row(table, cols):
-    db = TDengineDB()
-    db.connect(
-        host="192.168.3.92",
-        user="root",
-        password="taosdata",
-        database="beihu_dt",
-        port=6041,
-        link_mode=dbpkg.DBBase.REST_LINK
-    )
-    result = db.query(
-        table_name=table,
-        select_cols=cols,
-        conditions="1=1 ORDER BY ts DESC LIMIT 1"
-    )
-    return result[0] if result else {}
+    """
+    获取最新一条数据（LAST_ROW()，数据库缓存模式包含last_row时直接从缓存返回）
+    """
+    with get_db_pool().connection(read_only=True) as db:
+        return db.latest(table, cols) or {}
+
+
+def get_latest_rows(tables: dict):
+    """
+    一次获取多张表的最新一条数据，tables 为"表名 -> 字段列表"的字典，返回"表名 -> 记录字典"的字典
+    """
+    with get_db_pool().connection(read_only=True) as db:
+        result = db.latest(tables)
+    return {table: row or {} for table, row in result.items()}
 
 def get_earliest_row(table, cols):
     """
     获取最早一条数据
     """
-    db = TDengineDB()
-    db.connect(
-        host="192.168.3.92",
-        user="root",
-        password="taosdata",
-        database="beihu_dt",
-        port=6041,
-        link_mode=dbpkg.DBBase.REST_LINK
-    )
-
     condition_str = "1=1 ORDER BY ts ASC LIMIT 1"
 
-    result = db.query(
-        table_name=table,
-        select_cols=cols,
-        conditions=condition_str
-    )
+    with get_db_pool().connection(read_only=True) as db:
+        result = db.query(
+            table_name=table,
+            select_cols=cols,
+            conditions=condition_str
+        )
     return result[0] if result else {}
 
 
@@ -55,16 +162,15 @@ def get_index_blueprint():
 
 def query_raw(sql: str):
     """
-    执行原始 SQL 查询，返回 tuple 列表，例如 [(ts, value), (ts, value), ...]
-    """
-    db = TDengineDB()
-    db.connect(
-        host="192.168.3.92",
-        user="root",
-        password="taosdata",
-        database="beihu_dt",
-        port=6041,
-        link_mode=dbpkg.DBBase.REST_LINK,
-        as_dict=False  # 必须返回 tuple，便于处理 (ts, val)
-    )
-    return db._query(sql, as_dict=True)
\ No newline at end of file
+    执行原始 SQL 查询，返回字典列表，例如 [{"ts": ..., "val": ...}, ...]
+    """
+    with get_db_pool().connection(read_only=True) as db:
+        return db._query(sql, as_dict=True)
+
+
+def query_many(queries, concurrency: int = 4):
+    """
+    用连接池中的多个连接并发执行一组互不相关的查询，结果与 queries 一一对应，失败的查询结果为 None
+    queries 的元素为 SQL 语句，或 TDengineDB.query() 的参数字典
+    """
+    return get_db_pool().query_many(queries, concurrency=concurrency)
@@ -5,7 +5,8 @@
 提供数据清洗相关的API接口
 """
 
-from flask import Blueprint, jsonify, request
+import json
+from flask import Blueprint, Response, jsonify, request
 from services.data_clean_service import DataCleanService
 import logging
 
@@ -214,6 +215,44 @@ def get_raw_data():
         }), 500
 
 
+@data_clean_bp.route('/data-clean/stream-data', methods=['POST'])
+def stream_cleaning_data():
+    """
+    流式获取数据清洗数据API
+    参数同 /data-clean/get-data，适合很长的时间范围：数据按批从数据库读取并立即发出，
+    服务端内存占用不随时间范围增长
+    
+    返回格式（NDJSON，每行一条记录）：
+    {"ts": "2024-01-01 00:00:00", "influent_tol_q_cd": 1.0, ...}
+    """
+    data = request.get_json() or {}
+    start_time = data.get('start_time')
+    end_time = data.get('end_time')
+    
+    if not start_time or not end_time:
+        return jsonify({
+            "success": False,
+            "data": [],
+            "count": 0,
+            "message": "缺少必需参数: start_time 或 end_time"
+        }), 400
+    
+    logger.info(f"收到数据清洗流式查询请求: start_time={start_time}, end_time={end_time}")
+    
+    service = DataCleanService()
+    
+    def generate():
+        try:
+            for records in service.iter_cleaning_data(start_time, end_time):
+                yield "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        except Exception as e:
+            # 响应头已经发出，只能记录日志并结束输出
+            logger.error(f"流式输出数据时发生错误: {str(e)}")
+            logger.exception(e)
+    
+    return Response(generate(), mimetype='application/x-ndjson')
+
+
 @data_clean_bp.route('/data-clean/fields-info', methods=['GET'])
 def get_fields_info():
     """
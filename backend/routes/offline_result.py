@@ -7,10 +7,12 @@
 
 历史记录：
 2024-12-19    系统    创建离线模拟结果路由
+2026-10-18    系统    健康检查、调试接口从连接池借用连接
 """
 
 from flask import Blueprint, jsonify, request, make_response
 from services.offline_result_service import OfflineResultService
+from models.tdengine import get_db_pool
 import logging
 
 logger = logging.getLogger("DigitalTwinApp")
@@ -496,27 +498,21 @@ def get_optimization_result_chart_data():
 def health_check():
     """健康检查接口"""
     try:
-        # 检查数据库连接
-        if not offline_result_service.db:
-            return jsonify({
-                "success": False,
-                "error": "数据库未连接"
-            }), 500
+        with get_db_pool().connection(read_only=True) as db:
+            # 检查表是否存在
+            table_name = "offline_simulation_data_aao"
+            if not db.has_table(table_name):
+                return jsonify({
+                    "success": False,
+                    "error": f"表 {table_name} 不存在"
+                }), 500
         
-        # 检查表是否存在
-        table_name = "offline_simulation_data_aao"
-        if not offline_result_service.db.has_table(table_name):
             return jsonify({
-                "success": False,
-                "error": f"表 {table_name} 不存在"
-            }), 500
-        
-        return jsonify({
-            "success": True,
-            "message": "服务健康状态正常",
-            "database_connected": True,
-            "table_exists": True
-        })
+                "success": True,
+                "message": "服务健康状态正常",
+                "database_connected": True,
+                "table_exists": True
+            })
         
     except Exception as e:
         logger.error(f"健康检查失败: {str(e)}")
@@ -529,63 +525,58 @@ def health_check():
 def debug_tables():
     """调试接口 - 查看数据库中的表"""
     try:
-        if not offline_result_service.db:
-            return jsonify({
-                "success": False,
-                "error": "数据库未连接"
-            }), 500
-        
-        # 可能的表名列表
-        possible_tables = [
-            "offline_simulation_data_aao",
-            "aao_simulation_data", 
-            "offline_simulation_data",
-            "simulation_data_aao",
-            "aao_offline_data",
-            "aao_sim_data",
-            "simulation_results",
-            "offline_results"
-        ]
-        
-        found_tables = []
-        for table_name in possible_tables:
-            try:
-                if offline_result_service.db.has_table(table_name):
-                    # 查询这个表的数据数量
-                    sql = f"SELECT COUNT(*) as count FROM {table_name}"
-                    result = offline_result_service.db.query(sql, fetch_type=3)
-                    count = result[0].get('count', 0) if result else 0
+        with get_db_pool().connection(read_only=True) as db:
+            # 可能的表名列表
+            possible_tables = [
+                "offline_simulation_data_aao",
+                "aao_simulation_data", 
+                "offline_simulation_data",
+                "simulation_data_aao",
+                "aao_offline_data",
+                "aao_sim_data",
+                "simulation_results",
+                "offline_results"
+            ]
+        
+            found_tables = []
+            for table_name in possible_tables:
+                try:
+                    if db.has_table(table_name):
+                        # 查询这个表的数据数量
+                        sql = f"SELECT COUNT(*) as count FROM {table_name}"
+                        result = db.query(sql, fetch_type=3)
+                        count = result[0].get('count', 0) if result else 0
                     
-                    # 查询最新时间戳
-                    sql = f"SELECT ts FROM {table_name} ORDER BY ts DESC LIMIT 1"
-                    result = offline_result_service.db.query(sql, fetch_type=3)
-                    latest_ts = result[0].get('ts', 'N/A') if result else 'N/A'
+                        # 查询最新时间戳
+                        sql = f"SELECT ts FROM {table_name} ORDER BY ts DESC LIMIT 1"
+                        result = db.query(sql, fetch_type=3)
+                        latest_ts = result[0].get('ts', 'N/A') if result else 'N/A'
                     
-                    found_tables.append({
-                        "table_name": table_name,
-                        "exists": True,
-                        "count": count,
-                        "latest_timestamp": latest_ts
-                    })
-                else:
+                        found_tables.append({
+                            "table_name": table_name,
+                            "exists": True,
+                            "count": count,
+                            "latest_timestamp": latest_ts
+                        })
+                    else:
+                        found_tables.append({
+                            "table_name": table_name,
+                            "exists": False,
+                            "count": 0,
+                            "latest_timestamp": "N/A"
+                        })
+                except Exception as table_error:
                     found_tables.append({
                         "table_name": table_name,
                         "exists": False,
-                        "count": 0,
-                        "latest_timestamp": "N/A"
+                        "error": str(table_error)
                     })
-            except Exception as table_error:
-                found_tables.append({
-                    "table_name": table_name,
-                    "exists": False,
-                    "error": str(table_error)
-                })
         
-        return jsonify({
-            "success": True,
-            "data": found_tables,
-            "message": "调试信息获取成功"
-        })
+            return jsonify({
+                "success": True,
+                "data": found_tables,
+                "message": "调试信息获取成功"
+            })
         
     except Exception as e:
         logger.error(f"调试接口失败: {str(e)}")
@@ -6,10 +6,10 @@
 """
 
 import logging
-from datetime import datetime
 from typing import Dict, List, Any, Optional
-from dbpkg.TDengineDB import TDengineDB
 import dbpkg.DBBase
+from dbpkg import columnar
+from models.tdengine import get_db_pool, query_range
 
 logger = logging.getLogger("DigitalTwinApp")
 
@@ -18,7 +18,6 @@ class DataCleanService:
     """数据清洗服务类"""
     
     def __init__(self):
-        self.db = None
         self.table_name = "offline_cleaning_data"
         
         # 需要查询的字段列表
@@ -44,32 +43,6 @@ class DataCleanService:
             "aao_influent_1_1_tp_cd"     # TP
         ]
     
-    def connect_database(self) -> bool:
-        """连接数据库"""
-        try:
-            if self.db is None:
-                self.db = TDengineDB()
-            
-            result = self.db.connect(
-                host="192.168.3.92",
-                user="root",
-                password="taosdata",
-                database="beihu_dt",
-                port=6041,
-                link_mode=dbpkg.DBBase.REST_LINK
-            )
-            
-            if result:
-                logger.info("数据库连接成功")
-                return True
-            else:
-                logger.error("数据库连接失败")
-                return False
-                
-        except Exception as e:
-            logger.error(f"数据库连接异常: {str(e)}")
-            return False
-    
     def get_cleaning_data(self, start_time: str, end_time: str) -> Dict[str, Any]:
         """
         获取数据清洗数据（整十分钟时间点）
@@ -88,67 +61,22 @@ class DataCleanService:
             }
         """
         try:
-            # 连接数据库
-            if not self.connect_database():
-                return {
-                    "success": False,
-                    "data": [],
-                    "count": 0,
-                    "message": "数据库连接失败"
-                }
-            
             # 构建查询条件
             # 使用TIMEDIFF函数筛选整十分钟的时间戳
             # TIMEDIFF('2024-01-01 01:00:00.000', ts, 1m) % 10 = 0 表示分钟数为10的倍数
             # 注意：TIMEDIFF返回分钟差值，取模10为0表示是整十分钟的时间点
-            conditions = (
-                f"ts >= '{start_time}' AND ts < '{end_time}' "
-                f"AND TIMEDIFF('2024-01-01 01:00:00.000', ts, 1m) % 10 = 0"
-            )
+            conditions = "TIMEDIFF('2024-01-01 01:00:00.000', ts, 1m) % 10 = 0"
             
-            logger.info(f"查询条件: {conditions}")
+            logger.info(f"查询条件: ts >= '{start_time}' AND ts < '{end_time}' AND {conditions}")
             logger.info(f"查询字段: {self.fields_cleaned}")
             
-            # 执行查询
+            # 执行查询（分段缓存，来回查看同一时间段时只读取一次数据库）
             # 需要查询的字段：时间戳 + 业务字段（清洗数据使用 _cd 后缀）
-            select_cols = ['ts'] + self.fields_cleaned
-            
-            result = self.db.query(
-                table_name=self.table_name,
-                select_cols=select_cols,
-                conditions=conditions,
-                order_cols=['ts'],
-                order_by=[dbpkg.DBBase.ORDER_ASC]
-            )
+            result = query_range(self.table_name, self.fields_cleaned, start_time, end_time, conditions)
             
-            # 处理查询结果
-            if result:
-                # 转换数据格式，确保时间戳可序列化
-                data_list = []
-                for row in result:
-                    data_dict = {}
-                    # 处理时间戳
-                    if 'ts' in row:
-                        ts_value = row['ts']
-                        # 如果是datetime对象，转换为字符串
-                        if isinstance(ts_value, datetime):
-                            data_dict['ts'] = ts_value.strftime('%Y-%m-%d %H:%M:%S')
-                        else:
-                            data_dict['ts'] = str(ts_value)
-                    
-                    # 处理其他字段（使用清洗数据的字段名）
-                    for field in self.fields_cleaned:
-                        if field in row:
-                            value = row[field]
-                            # 处理None值
-                            if value is None:
-                                data_dict[field] = None
-                            else:
-                                data_dict[field] = float(value) if isinstance(value, (int, float)) else value
-                        else:
-                            data_dict[field] = None
-                    
-                    data_list.append(data_dict)
+            # 处理查询结果（列式结果，按整列转换后再拼成行）
+            if result and len(result['ts']):
+                data_list = columnar.to_records(result, self.fields_cleaned)
                 
                 logger.info(f"查询成功，共 {len(data_list)} 条记录")
                 
@@ -177,13 +105,40 @@ class DataCleanService:
                 "count": 0,
                 "message": error_msg
             }
-        finally:
-            # 关闭数据库连接
-            if self.db:
-                try:
-                    self.db.close()
-                except:
-                    pass
+    
+    def iter_cleaning_data(self, start_time: str, end_time: str, chunk_size: int = 5000):
+        """
+        流式获取数据清洗数据（整十分钟时间点）
+        
+        与get_cleaning_data()返回相同格式的记录，但按批从数据库读取、按批生成，
+        时间范围再长内存占用也保持平稳，供路由层直接生成流式响应。
+        
+        Args:
+            start_time: 开始时间，格式：'YYYY-MM-DD HH:MM:SS'
+            end_time: 结束时间，格式：'YYYY-MM-DD HH:MM:SS'
+            chunk_size: 每批读取的记录数
+        
+        Yields:
+            每批记录组成的列表，每条记录为字典
+        """
+        conditions = (
+            f"ts >= '{start_time}' AND ts < '{end_time}' "
+            f"AND TIMEDIFF('2024-01-01 01:00:00.000', ts, 1m) % 10 = 0"
+        )
+        
+        with get_db_pool().connection(read_only=True) as db:
+            chunks = db.iter_query(
+                table_name=self.table_name,
+                select_cols=['ts'] + self.fields_cleaned,
+                conditions=conditions,
+                order_cols=['ts'],
+                order_by=[dbpkg.DBBase.ORDER_ASC],
+                chunk_size=chunk_size,
+                columnar=True,
+                epoch_ms=True
+            )
+            for chunk in chunks:
+                yield columnar.to_records(chunk, self.fields_cleaned)
     
     def get_raw_data(self, start_time: str, end_time: str) -> Dict[str, Any]:
         """
@@ -203,81 +158,26 @@ class DataCleanService:
             }
         """
         try:
-            # 连接数据库
-            if not self.connect_database():
-                return {
-                    "success": False,
-                    "data": [],
-                    "count": 0,
-                    "message": "数据库连接失败"
-                }
-            
             # 先尝试查询整十分钟的数据
             # 使用TIMEDIFF函数筛选整十分钟的时间戳
             # TIMEDIFF('2024-01-01 01:00:00.000', ts, 1m) % 10 = 0 表示分钟数为10的倍数
-            conditions_ten_min = (
-                f"ts >= '{start_time}' AND ts < '{end_time}' "
-                f"AND TIMEDIFF('2024-01-01 01:00:00.000', ts, 1m) % 10 = 0"
-            )
+            conditions_ten_min = "TIMEDIFF('2024-01-01 01:00:00.000', ts, 1m) % 10 = 0"
             
-            logger.info(f"查询原始数据条件（整十分钟）: {conditions_ten_min}")
+            logger.info(f"查询原始数据条件（整十分钟）: ts >= '{start_time}' AND ts < '{end_time}' AND {conditions_ten_min}")
             logger.info(f"查询字段: {self.fields}")
             
-            # 执行查询
-            # 需要查询的字段：时间戳 + 业务字段
-            select_cols = ['ts'] + self.fields
-            
+            # 执行查询（分段缓存，来回查看同一时间段时只读取一次数据库）
             # 使用realtime_data表，先查询整十分钟的数据
-            result = self.db.query(
-                table_name="realtime_data",
-                select_cols=select_cols,
-                conditions=conditions_ten_min,
-                order_cols=['ts'],
-                order_by=[dbpkg.DBBase.ORDER_ASC]
-            )
+            result = query_range("realtime_data", self.fields, start_time, end_time, conditions_ten_min)
             
             # 如果整十分钟的数据为空，则查询所有数据
-            if not result:
+            if not result or not len(result['ts']):
                 logger.info("未找到整十分钟时间点的数据，改为查询所有数据")
-                conditions_all = (
-                    f"ts >= '{start_time}' AND ts < '{end_time}'"
-                )
-                result = self.db.query(
-                    table_name="realtime_data",
-                    select_cols=select_cols,
-                    conditions=conditions_all,
-                    order_cols=['ts'],
-                    order_by=[dbpkg.DBBase.ORDER_ASC]
-                )
+                result = query_range("realtime_data", self.fields, start_time, end_time)
             
-            # 处理查询结果
-            if result:
-                # 转换数据格式，确保时间戳可序列化
-                data_list = []
-                for row in result:
-                    data_dict = {}
-                    # 处理时间戳
-                    if 'ts' in row:
-                        ts_value = row['ts']
-                        # 如果是datetime对象，转换为字符串
-                        if isinstance(ts_value, datetime):
-                            data_dict['ts'] = ts_value.strftime('%Y-%m-%d %H:%M:%S')
-                        else:
-                            data_dict['ts'] = str(ts_value)
-                    
-                    # 处理其他字段（原始数据使用 _rd 后缀）
-                    for field in self.fields:
-                        if field in row:
-                            value = row[field]
-                            # 处理None值
-                            if value is None:
-                                data_dict[field] = None
-                            else:
-                                data_dict[field] = float(value) if isinstance(value, (int, float)) else value
-                        else:
-                            data_dict[field] = None
-                    
-                    data_list.append(data_dict)
+            # 处理查询结果（列式结果，时间戳整列格式化为字符串，原始数据使用 _rd 后缀）
+            if result and len(result['ts']):
+                data_list = columnar.to_records(result, self.fields)
                 
                 logger.info(f"原始数据查询成功，共 {len(data_list)} 条记录")
                 
@@ -324,13 +224,6 @@ class DataCleanService:
                 "count": 0,
                 "message": error_msg
             }
-        finally:
-            # 关闭数据库连接
-            if self.db:
-                try:
-                    self.db.close()
-                except:
-                    pass
     
     def get_fields_info(self) -> Dict[str, Any]:
         """获取字段信息"""
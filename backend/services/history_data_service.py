@@ -8,8 +8,9 @@
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Any
-from dbpkg.TDengineDB import TDengineDB
 import dbpkg.DBBase
+from dbpkg import columnar
+from models.tdengine import get_db_pool, table_for_span
 
 logger = logging.getLogger("DigitalTwinApp")
 
@@ -19,6 +20,7 @@ class HistoryDataService:
     
     def __init__(self):
         self.db = None
+        self._pool = None
         self.table_name = "realtime_data"
         
         # 需要查询的字段列表（所有字段都是_rd结尾）
@@ -44,26 +46,13 @@ class HistoryDataService:
         }
     
     def connect_database(self) -> bool:
-        """连接数据库"""
+        """从连接池借用数据库连接"""
         try:
             if self.db is None:
-                self.db = TDengineDB()
-            
-            result = self.db.connect(
-                host="192.168.3.92",
-                user="root",
-                password="taosdata",
-                database="beihu_dt",
-                port=6041,
-                link_mode=dbpkg.DBBase.REST_LINK
-            )
-            
-            if result:
-                logger.info("数据库连接成功")
-                return True
-            else:
-                logger.error("数据库连接失败")
-                return False
+                # 记住借出连接的连接池，配置文件修改后 get_db_pool() 可能返回新的连接池
+                self._pool = get_db_pool()
+                self.db = self._pool.acquire(read_only=True)
+            return True
                 
         except Exception as e:
             logger.error(f"数据库连接异常: {str(e)}")
@@ -146,42 +135,25 @@ class HistoryDataService:
             # 需要查询的字段：时间戳 + 业务字段
             select_cols = ['ts'] + list(self.fields.values())
             
+            # 跨度较长时从10分钟汇总表读取：0点窗口的第一个值即0点的数据
+            span_ms = int((end_dt - start_dt).total_seconds() * 1000)
+            table_name = table_for_span(self.table_name, select_cols[1:], span_ms)
+            
             result = self.db.query(
-                table_name=self.table_name,
+                table_name=table_name,
                 select_cols=select_cols,
                 conditions=conditions,
                 order_cols=['ts'],
-                order_by=[dbpkg.DBBase.ORDER_ASC]
+                order_by=[dbpkg.DBBase.ORDER_ASC],
+                columnar=True,
+                epoch_ms=True
             )
             
-            # 处理查询结果
-            if result:
-                # 转换数据格式，确保时间戳可序列化
-                data_list = []
-                for row in result:
-                    data_dict = {}
-                    # 处理时间戳
-                    if 'ts' in row:
-                        ts_value = row['ts']
-                        # 如果是datetime对象，转换为字符串
-                        if isinstance(ts_value, datetime):
-                            data_dict['ts'] = ts_value.strftime('%Y-%m-%d %H:%M:%S')
-                        else:
-                            data_dict['ts'] = str(ts_value)
-                    
-                    # 处理其他字段，使用中文名称作为key
-                    for field_name, field_key in self.fields.items():
-                        if field_key in row:
-                            value = row[field_key]
-                            # 处理None值
-                            if value is None:
-                                data_dict[field_name] = None
-                            else:
-                                data_dict[field_name] = float(value) if isinstance(value, (int, float)) else value
-                        else:
-                            data_dict[field_name] = None
-                    
-                    data_list.append(data_dict)
+            # 处理查询结果（列式结果，按整列转换后再拼成行）
+            count = len(result['ts']) if result else 0
+            if count:
+                # 转换数据格式，确保时间戳可序列化，数值统一为浮点数，空值为None，使用中文名称作为key
+                data_list = columnar.to_records(result, list(self.fields.values()), list(self.fields.keys()))
                 
                 logger.info(f"查询成功，共 {len(data_list)} 条记录")
                 
@@ -211,12 +183,10 @@ class HistoryDataService:
                 "message": error_msg
             }
         finally:
-            # 关闭数据库连接
+            # 归还数据库连接
             if self.db:
-                try:
-                    self.db.close()
-                except:
-                    pass
+                self._pool.release(self.db)
+                self.db = None
     
     def get_cleaned_history_data(self, start_date: str, end_date: str) -> Dict[str, Any]:
         """
@@ -294,42 +264,26 @@ class HistoryDataService:
             # 需要查询的字段：时间戳 + 业务字段
             select_cols = ['ts'] + list(self.fields_cleaned.values())
             
+            # 跨度较长时从10分钟汇总表读取：0点窗口的第一个值即0点的数据
+            span_ms = int((end_dt - start_dt).total_seconds() * 1000)
+            table_name = table_for_span("online_cleaning_data", select_cols[1:], span_ms)
+            
             result = self.db.query(
-                table_name="online_cleaning_data",
+                table_name=table_name,
                 select_cols=select_cols,
                 conditions=conditions,
                 order_cols=['ts'],
-                order_by=[dbpkg.DBBase.ORDER_ASC]
+                order_by=[dbpkg.DBBase.ORDER_ASC],
+                columnar=True,
+                epoch_ms=True
             )
             
-            # 处理查询结果
-            if result:
-                # 转换数据格式，确保时间戳可序列化
-                data_list = []
-                for row in result:
-                    data_dict = {}
-                    # 处理时间戳
-                    if 'ts' in row:
-                        ts_value = row['ts']
-                        # 如果是datetime对象，转换为字符串
-                        if isinstance(ts_value, datetime):
-                            data_dict['ts'] = ts_value.strftime('%Y-%m-%d %H:%M:%S')
-                        else:
-                            data_dict['ts'] = str(ts_value)
-                    
-                    # 处理其他字段，使用中文名称作为key
-                    for field_name, field_key in self.fields_cleaned.items():
-                        if field_key in row:
-                            value = row[field_key]
-                            # 处理None值
-                            if value is None:
-                                data_dict[field_name] = None
-                            else:
-                                data_dict[field_name] = float(value) if isinstance(value, (int, float)) else value
-                        else:
-                            data_dict[field_name] = None
-                    
-                    data_list.append(data_dict)
+            # 处理查询结果（列式结果，按整列转换后再拼成行）
+            count = len(result['ts']) if result else 0
+            if count:
+                # 转换数据格式，确保时间戳可序列化，数值统一为浮点数，空值为None，使用中文名称作为key
+                data_list = columnar.to_records(result, list(self.fields_cleaned.values()),
+                                                list(self.fields_cleaned.keys()))
                 
                 logger.info(f"查询清洗过的历史数据成功，共 {len(data_list)} 条记录")
                 
@@ -359,10 +313,8 @@ class HistoryDataService:
                 "message": error_msg
             }
         finally:
-            # 关闭数据库连接
+            # 归还数据库连接
             if self.db:
-                try:
-                    self.db.close()
-                except:
-                    pass
+                self._pool.release(self.db)
+                self.db = None
 
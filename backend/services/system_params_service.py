@@ -7,13 +7,14 @@
 
 历史记录：
 2024-12-19    系统    创建系统参数服务
+2026-10-18    系统    每次读写从连接池借用连接，用完即归还
 """
 
 import logging
 from datetime import datetime
 from typing import Dict, Optional, Any, List
-from dbpkg.TDengineDB import TDengineDB
 import dbpkg.DBBase
+from models.tdengine import get_db_pool
 
 logger = logging.getLogger("DigitalTwinApp")
 
@@ -63,44 +64,11 @@ CLEANING_OBJECT_ALLOWED = {"AAODO", "COD", "MBRDO", "NH3-N", "SS", "TN", "TP"}
 class SystemParamsService:
     """系统参数服务类"""
     
-    def __init__(self):
-        self.db = None
-        self.connect_database()
-    
-    def connect_database(self):
-        """连接数据库"""
-        try:
-            self.db = TDengineDB()
-            success = self.db.connect(
-                host="192.168.3.92",
-                user="root",
-                password="taosdata",
-                database="beihu_dt",
-                port=6041,
-                link_mode=dbpkg.DBBase.REST_LINK,
-                as_dict=True
-            )
-            if not success:
-                logger.error("数据库连接失败")
-                return False
-            logger.info("数据库连接成功")
-            return True
-        except Exception as e:
-            logger.error(f"数据库连接异常: {str(e)}")
-            return False
-    
     def _get_latest_row(self) -> Optional[Dict[str, Any]]:
         """获取system_parameters表最新一行"""
-        if not self.db:
-            self.connect_database()
-        result = self.db.query(
-            table_name="system_parameters",
-            select_cols=["*"],
-            conditions="1=1 ORDER BY ts DESC LIMIT 1"
-        )
-        if result and len(result) > 0:
-            return result[0]
-        return None
+        with get_db_pool().connection(read_only=True) as db:
+            result = db.latest("system_parameters")
+        return result or None
 
     @staticmethod
     def _parse_cleaning_objects(value: Optional[Any]) -> List[str]:
@@ -207,43 +175,38 @@ class SystemParamsService:
         return record
 
     @staticmethod
-    def _convert_value_for_sql(value: Any) -> str:
-        if value is None:
-            return "NULL"
-        if isinstance(value, str):
-            escaped_value = value.replace("'", "''")
-            return f"'{escaped_value}'"
+    def _convert_value_for_db(value: Any) -> Any:
         if isinstance(value, bool):
-            return "1" if value else "0"
-        return str(value)
+            return 1 if value else 0
+        return value
 
     def _execute_insert_record(self, record: Dict[str, Any]) -> Dict[str, Any]:
-        """执行插入操作"""
-        columns = ",".join(record.keys())
-        values = ",".join(self._convert_value_for_sql(v) for v in record.values())
-        sql = f"INSERT INTO system_parameters ({columns}) VALUES ({values})"
+        """执行插入操作（同步写入，返回真实的写入结果）"""
+        row = {key: self._convert_value_for_db(value) for key, value in record.items()}
 
         try:
-            logger.info(f"[参数范围更新] 准备执行SQL，字段数: {len(record.keys())}")
-            logger.info(f"[参数范围更新] SQL字段列表: {list(record.keys())[:20]}...")  # 只显示前20个字段
-            logger.info(f"[参数范围更新] 执行SQL: {sql[:500]}...")  # 只显示前500个字符
+            logger.info(f"[参数范围更新] 准备写入记录，字段数: {len(record.keys())}")
+            logger.info(f"[参数范围更新] 字段列表: {list(record.keys())[:20]}...")  # 只显示前20个字段
             
-            # 检查上下限字段是否在SQL中
+            # 检查上下限字段是否在记录中
             upper_limit_fields = [k for k in record.keys() if 'upper_limit' in k]
             lower_limit_fields = [k for k in record.keys() if 'lower_limit' in k]
-            logger.info(f"[参数范围更新] SQL中包含上限字段数: {len(upper_limit_fields)}")
-            logger.info(f"[参数范围更新] SQL中包含下限字段数: {len(lower_limit_fields)}")
+            logger.info(f"[参数范围更新] 记录中包含上限字段数: {len(upper_limit_fields)}")
+            logger.info(f"[参数范围更新] 记录中包含下限字段数: {len(lower_limit_fields)}")
             if upper_limit_fields:
                 logger.info(f"[参数范围更新] 示例上限字段: {upper_limit_fields[:5]}")
             if lower_limit_fields:
                 logger.info(f"[参数范围更新] 示例下限字段: {lower_limit_fields[:5]}")
             
-            self.db.execute(sql)
-            logger.info("[参数范围更新] SQL执行成功")
+            with get_db_pool().connection() as db:
+                success = db.insert("system_parameters", [row])
+            if not success:
+                logger.error("[参数范围更新] 写入失败")
+                return {"success": False, "message": "更新失败: 写入数据库失败"}
+            logger.info("[参数范围更新] 写入成功")
             return {"success": True, "message": "系统参数更新成功"}
         except Exception as sql_error:
-            logger.error(f"[参数范围更新] SQL执行失败: {sql_error}")
-            logger.error(f"[参数范围更新] 执行的SQL: {sql[:1000]}...")  # 显示前1000个字符
+            logger.error(f"[参数范围更新] 写入失败: {sql_error}")
             import traceback
             logger.error(f"[参数范围更新] 错误堆栈: {traceback.format_exc()}")
             return {"success": False, "message": f"更新失败: {sql_error}"}
@@ -251,8 +214,6 @@ class SystemParamsService:
     def get_system_params(self) -> Dict[str, Any]:
         """获取系统参数全集"""
         try:
-            if not self.db:
-                self.connect_database()
             latest_row = self._get_latest_row()
             data = self._build_response_data(latest_row)
             return {
@@ -288,9 +249,6 @@ class SystemParamsService:
             if lower_limit_params:
                 logger.info(f"[参数范围更新] 示例下限字段和值: {dict(list(lower_limit_params.items())[:3])}")
             
-            if not self.db:
-                self.connect_database()
-
             record = self._prepare_db_record(params)
             result = self._execute_insert_record(record)
             if result.get("success"):
@@ -378,14 +336,6 @@ class SystemParamsService:
                 "success": False,
                 "message": f"更新失败: {str(e)}"
             }
-    
-    def close(self):
-        """关闭数据库连接"""
-        if self.db:
-            try:
-                self.db.close()
-            except Exception as e:
-                logger.error(f"关闭数据库连接失败: {str(e)}")
 
 # 创建全局服务实例
 _system_params_service = None
@@ -1,5 +1,8 @@
-from models.tdengine import query_raw
+from models.tdengine import query_raw, query_many, table_for_span
 from datetime import datetime, timedelta
+from dbpkg import columnar
+from dbpkg.columnar import np
+import dbpkg.DBBase
 
 # 参数配置映射
 param_map = {
@@ -80,41 +83,37 @@ def get_trend_data(param: str):
     all_times = sorted(list(all_times))
     
     # 转换为字符串格式用于显示
-    times_str = [ts_to_str(t) for t in all_times]
+    times_str = columnar.format_ts(all_times, "%m/%d %H:%M")
 
     result = {"times": times_str, "unit": mapping.get("unit", "")}
 
-    # 获取实时进水数据
-    if mapping.get("realtime_in"):
-        table, column = mapping["realtime_in"]
-        values = fetch_realtime_data(table, column, all_times)
-    else:
-        values = [None] * len(all_times)
-    result["realtime_in"] = values
+    # 实时进水、预测进水、实时出水、预测出水四个序列互不相关，
+    # 先拼好所有序列的查询语句，再一次性并发执行，耗时取决于最慢的查询
+    limit_count = get_predict_steps_sp() + 1 if (mapping.get("predict_in") or mapping.get("predict_out")) else 0
+    series = {}
+    queries = []
+    for key in ("realtime_in", "predict_in", "realtime_out", "predict_out"):
+        if not mapping.get(key) or not all_times:
+            continue
+        if key.startswith("realtime"):
+            table, column = mapping[key]
+            sqls = realtime_queries(table, column, all_times)
+        else:
+            table, column, time_col = mapping[key]
+            sqls = [predict_query(table, column, time_col, limit_count)]
+        series[key] = (len(queries), len(sqls))
+        queries.extend(sqls)
 
-    # 获取预测进水数据
-    if mapping.get("predict_in"):
-        table, column, time_col = mapping["predict_in"]
-        values = fetch_predict_input_data(table, column, time_col, all_times)
-    else:
-        values = [None] * len(all_times)
-    result["predict_in"] = values
-
-    # 获取实时出水数据
-    if mapping.get("realtime_out"):
-        table, column = mapping["realtime_out"]
-        values = fetch_realtime_data(table, column, all_times)
-    else:
-        values = [None] * len(all_times)
-    result["realtime_out"] = values
-
-    # 获取预测出水数据
-    if mapping.get("predict_out"):
-        table, column, time_col = mapping["predict_out"]
-        values = fetch_predict_output_data(table, column, time_col, all_times)
-    else:
-        values = [None] * len(all_times)
-    result["predict_out"] = values
+    rows_list = query_many(queries)
+    for key in ("realtime_in", "predict_in", "realtime_out", "predict_out"):
+        if key not in series:
+            result[key] = [None] * len(all_times)
+            continue
+        start, count = series[key]
+        if key.startswith("realtime"):
+            result[key] = realtime_values(rows_list[start:start + count], all_times, mapping[key][1])
+        else:
+            result[key] = predict_values(rows_list[start], all_times)
 
     return result
 
@@ -275,51 +274,77 @@ def get_predict_output_times():
         return []
 
 
+# 时间轴上的时刻没有实时数据时，取该时刻之后多长时间（毫秒）内的第一个数据
+REALTIME_WINDOW_MS = 300000
+
+
+def realtime_queries(table: str, column: str, time_axis: list) -> list:
+    """实时数据的查询：时间轴上每个时刻的数据，没有则取该时刻之后5分钟内的第一个非空数据。
+    只读取各时刻之后5分钟内（[ts, ts+5分钟]，重叠的合并）的非空数据，整个时间轴只需要一条查询；
+    时间轴跨度较长（预测步数多、间隔大）时从10分钟汇总表读取，ts为窗口起始时间"""
+    time_axis = sorted(time_axis)
+    table = table_for_span(table, [column], time_axis[-1] - time_axis[0])
+    ranges = []
+    for ts in time_axis:
+        if ranges and ts <= ranges[-1][1]:
+            ranges[-1][1] = max(ranges[-1][1], ts + REALTIME_WINDOW_MS)
+        else:
+            ranges.append([ts, ts + REALTIME_WINDOW_MS])
+    time_conditions = " OR ".join(f"(ts >= {start} AND ts <= {end})" for start, end in ranges)
+    return [{
+        "table_name": table,
+        "select_cols": ["ts", column],
+        "conditions": f"{column} IS NOT NULL AND ({time_conditions})",
+        "order_cols": ["ts"],
+        "order_by": [dbpkg.DBBase.ORDER_ASC],
+        "epoch_ms": True,
+    }]
+
+
+def realtime_values(rows_list: list, time_axis: list, column: str) -> list:
+    """根据查询结果，返回与时间轴对应的值：每个时刻取ts >= 该时刻的第一条数据，超过5分钟的为None"""
+    rows = rows_list[0] if rows_list else None
+    if not rows:
+        return [None] * len(time_axis)
+
+    ts = np.array([to_timestamp_ms(r["ts"]) for r in rows], dtype=np.int64)
+    values = [float(r[column]) for r in rows]
+    indexes = np.searchsorted(ts, time_axis, side="left")
+    return [values[i] if i < len(ts) and ts[i] <= t + REALTIME_WINDOW_MS else None
+            for t, i in zip(time_axis, indexes)]
+
+
 def fetch_realtime_data(table: str, column: str, time_axis: list):
     """获取实时数据（根据ts字段，最近24小时奇数小时点数据，每两小时采样一次，如1点、3点、5点等）"""
     if not time_axis:
         return []
-    
-    # 对于每个整点时间戳，查询最接近该整点的数据
+
+    return realtime_values(query_many(realtime_queries(table, column, time_axis)), time_axis, column)
+
+
+def predict_query(table: str, column: str, time_col: str, limit_count: int) -> str:
+    """预测数据的查询语句：按ts排序获取最新的limit_count条数据"""
+    return f"""
+        SELECT ts, {time_col} AS predict_time, {column} AS val
+        FROM {table}
+        WHERE {time_col} IS NOT NULL AND {column} IS NOT NULL
+        ORDER BY ts DESC
+        LIMIT {limit_count}
+    """
+
+
+def predict_values(rows: list, time_axis: list) -> list:
+    """用预测时间（predict_time）匹配时间轴，返回与时间轴对应的值"""
+    if not rows:
+        return [None] * len(time_axis)
+
+    # 构建predict_time到值的映射
     value_map = {}
-    
-    for hour_ts in time_axis:
-        # 先尝试精确匹配整点时刻
-        sql_exact = f"""
-            SELECT ts, {column} AS val
-            FROM {table}
-            WHERE ts = {hour_ts}
-              AND {column} IS NOT NULL
-            LIMIT 1
-        """
-        
-        found = False
-        try:
-            rows = query_raw(sql_exact)
-            if rows and rows[0]["val"] is not None:
-                value_map[hour_ts] = float(rows[0]["val"])
-                found = True
-        except Exception as e:
-            print(f"[fetch_realtime_data] 精确查询失败: {table}.{column}, hour_ts={hour_ts} -> {str(e)}")
-        
-        # 如果精确匹配失败，则查询该小时内最接近整点的数据（整点之后5分钟内）
-        if not found:
-            window_end = hour_ts + 300000  # 整点后5分钟
-            sql_close = f"""
-                SELECT ts, {column} AS val
-                FROM {table}
-                WHERE ts > {hour_ts} AND ts <= {window_end}
-                  AND {column} IS NOT NULL
-                ORDER BY ts ASC
-                LIMIT 1
-            """
-            try:
-                rows = query_raw(sql_close)
-                if rows and rows[0]["val"] is not None:
-                    value_map[hour_ts] = float(rows[0]["val"])
-            except Exception as e:
-                print(f"[fetch_realtime_data] 接近查询失败: {table}.{column}, hour_ts={hour_ts} -> {str(e)}")
-    
+    for r in reversed(rows):
+        predict_time = r.get("predict_time")
+        if predict_time is not None and r.get("val") is not None:
+            value_map[to_timestamp_ms(predict_time)] = float(r["val"])
+
     # 根据时间轴返回对应的值
     return [value_map.get(ts, None) for ts in time_axis]
 
@@ -329,36 +354,9 @@ def fetch_predict_input_data(table: str, column: str, time_col: str, time_axis:
     if not time_axis:
         return []
     
-    predict_steps = get_predict_steps_sp()
-    limit_count = predict_steps + 1
-    
-    # 按ts排序获取最新的predict_steps_sp+1条数据
-    sql = f"""
-        SELECT ts, {time_col} AS predict_time, {column} AS val
-        FROM {table}
-        WHERE {time_col} IS NOT NULL AND {column} IS NOT NULL
-        ORDER BY ts DESC
-        LIMIT {limit_count}
-    """
     try:
-        rows = query_raw(sql)
-        if not rows:
-            return [None] * len(time_axis)
-        
-        # 反转以便按时间顺序排列
-        rows.reverse()
-        
-        # 构建predict_time到值的映射
-        value_map = {}
-        for r in rows:
-            predict_time = r.get("predict_time")
-            if predict_time is not None:
-                predict_time_ts = to_timestamp_ms(predict_time)
-                if r.get("val") is not None:
-                    value_map[predict_time_ts] = float(r["val"])
-        
-        # 根据时间轴返回对应的值
-        return [value_map.get(ts, None) for ts in time_axis]
+        rows = query_raw(predict_query(table, column, time_col, get_predict_steps_sp() + 1))
+        return predict_values(rows, time_axis)
     except Exception as e:
         print(f"[fetch_predict_input_data] 查询失败: {table}.{column} -> {str(e)}")
         return [None] * len(time_axis)
@@ -369,36 +367,9 @@ def fetch_predict_output_data(table: str, column: str, time_col: str, time_axis:
     if not time_axis:
         return []
     
-    predict_steps = get_predict_steps_sp()
-    limit_count = predict_steps + 1
-    
-    # 按ts排序获取最新的predict_steps_sp+1条数据
-    sql = f"""
-        SELECT ts, {time_col} AS predict_time, {column} AS val
-        FROM {table}
-        WHERE {time_col} IS NOT NULL AND {column} IS NOT NULL
-        ORDER BY ts DESC
-        LIMIT {limit_count}
-    """
     try:
-        rows = query_raw(sql)
-        if not rows:
-            return [None] * len(time_axis)
-        
-        # 反转以便按时间顺序排列
-        rows.reverse()
-        
-        # 构建predict_time到值的映射
-        value_map = {}
-        for r in rows:
-            predict_time = r.get("predict_time")
-            if predict_time is not None:
-                predict_time_ts = to_timestamp_ms(predict_time)
-                if r.get("val") is not None:
-                    value_map[predict_time_ts] = float(r["val"])
-        
-        # 根据时间轴返回对应的值
-        return [value_map.get(ts, None) for ts in time_axis]
+        rows = query_raw(predict_query(table, column, time_col, get_predict_steps_sp() + 1))
+        return predict_values(rows, time_axis)
     except Exception as e:
         print(f"[fetch_predict_output_data] 查询失败: {table}.{column} -> {str(e)}")
         return [None] * len(time_axis)
@@ -12,12 +12,13 @@ pyodbc开发文档：https://github.com/mkleehammer/pyodbc/wiki/。
 2023-11-20    崔树标    创建。
 2023-11-20    崔树标    调试及文档测试。
 2023-11-21    崔树标    v1.0发布。
+2026-10-18    系统      执行的SQL语句记录耗时、记录数等统计信息，见QueryStats。
+2026-10-18    系统      pyodbc驱动在第一次连接时才加载。
 """
 
 import inspect
 import logging
 import os
-import pyodbc
 import warnings
 
 
@@ -127,6 +128,11 @@ class AccessDB(DBBase.DBBase):
 
         assert self._database, "请指定数据库名称！"
 
+        pyodbc = DBBase.load_driver("pyodbc")
+        if pyodbc is None:
+            logger.error("连接Access数据库需要安装pyodbc！")
+            return False
+
         # 连接数据库
         try:
             con_str = f"DSN={self._database};UID={self._user};PWD={self._password}"
@@ -175,8 +181,9 @@ class AccessDB(DBBase.DBBase):
         try:
             # 执行SQL语句，创建表
             logger.debug(sql)
-            self._cursor.execute(sql)
-            self._connect.commit()
+            with self._track(sql):
+                self._cursor.execute(sql)
+                self._connect.commit()
         except Exception as e:
             logger.error(e)
             return False
@@ -199,8 +206,9 @@ class AccessDB(DBBase.DBBase):
         try:
             # 执行SQL语句，删除表
             logger.debug(sql)
-            self._cursor.execute(sql)
-            self._connect.commit()
+            with self._track(sql):
+                self._cursor.execute(sql)
+                self._connect.commit()
         except Exception as e:
             logger.error(e)
             return False
@@ -259,11 +267,13 @@ class AccessDB(DBBase.DBBase):
         try:
             # 执行SQL语句
             logger.debug(sql)
-            self._cursor.execute(sql)
-            command = sql[:6].upper()
-            if command != "SELECT":
-                # 提交到数据库执行
-                self._connect.commit()
+            with self._track(sql) as t:
+                self._cursor.execute(sql)
+                command = sql[:6].upper()
+                if command != "SELECT":
+                    # 提交到数据库执行
+                    self._connect.commit()
+                    t.result(self._cursor.rowcount)
         except Exception as e:
             # 发生错误时回滚
             self._connect.rollback()
@@ -334,11 +344,15 @@ class AccessDB(DBBase.DBBase):
         try:
             # 执行SQL语句
             logger.debug(sql)
-            self._cursor.execute(sql)
-            if fetch_type < 0:
-                return self._cursor.fetchone()
-            else:
-                return self._cursor.fetchall()
+            with self._track(sql) as t:
+                self._cursor.execute(sql)
+                if fetch_type < 0:
+                    result = self._cursor.fetchone()
+                    t.result([result] if result else None)
+                else:
+                    result = self._cursor.fetchall()
+                    t.result(result)
+            return result
         except Exception as e:
             logger.error(e)
 
@@ -386,9 +400,11 @@ class AccessDB(DBBase.DBBase):
             try:
                 # 执行SQL语句
                 logger.debug(sql)
-                self._cursor.execute(sql)
-                # 提交到数据库执行
-                self._connect.commit()
+                with self._track(sql) as t:
+                    self._cursor.execute(sql)
+                    # 提交到数据库执行
+                    self._connect.commit()
+                    t.result(self._cursor.rowcount)
             except Exception as e:
                 # 发生错误时回滚
                 self._connect.rollback()
@@ -421,9 +437,11 @@ class AccessDB(DBBase.DBBase):
         try:
             # 执行SQL语句
             logger.debug(sql)
-            self._cursor.execute(sql)
-            # 提交到数据库执行
-            self._connect.commit()
+            with self._track(sql) as t:
+                self._cursor.execute(sql)
+                # 提交到数据库执行
+                self._connect.commit()
+                t.result(self._cursor.rowcount)
         except Exception as e:
             # 发生错误时回滚
             self._connect.rollback()
@@ -463,9 +481,11 @@ class AccessDB(DBBase.DBBase):
         try:
             # 执行SQL语句
             logger.debug(sql)
-            self._cursor.execute(sql)
-            # 提交到数据库执行
-            self._connect.commit()
+            with self._track(sql) as t:
+                self._cursor.execute(sql)
+                # 提交到数据库执行
+                self._connect.commit()
+                t.result(self._cursor.rowcount)
         except Exception as e:
             # 发生错误时回滚
             self._connect.rollback()
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+基于asyncio的TDengine REST客户端，通过taosAdapter的REST接口（/rest/sql）访问数据库。
+
+同步的TDengineDB在REST连接下，每个查询都要占用一个线程等待HTTP响应；仪表盘一次刷新要发出
+几十个小查询时，线程池很快就被占满。AsyncTDengineDB的query()、_query()、insert()、describe()
+与TDengineDB同名函数的参数和返回值一致，只是需要await，同一个线程的事件循环中可以同时执行
+几十个查询。
+
+HTTP请求直接基于asyncio的流（asyncio.open_connection）实现，不依赖第三方库。对象内部维护
+一个长连接（keep-alive）池，同时进行的请求数不超过max_connections，多出的请求排队等待。
+连接池绑定到第一次使用它的事件循环，在另一个事件循环中使用时（如Flask的异步视图每个请求
+一个事件循环）自动丢弃旧连接、重新建立。
+
+Examples:
+    >>> db = AsyncTDengineDB()
+    >>> await db.connect(host="192.168.3.92", user="root", password="taosdata",
+    ...                  database="beihu_dt", port=6041, max_connections=16)
+    True
+    >>> results = await asyncio.gather(*(db.query(table, ["ts", "val"], DBBase.FETCH_ONE)
+    ...                                   for table in tables))
+    >>> await db.close()
+
+历史记录（按照以下格式依次添加）：
+   日期        人员	      改动情况
+2026-10-18    系统      创建。
+2026-10-18    系统      建立连接也受timeout限制。
+"""
+
+import asyncio
+import base64
+import json
+import logging
+import traceback
+from datetime import datetime
+
+from . import DBBase
+from . import QueryStats
+from . import SchemaCache
+from .columnar import to_columns
+from .TDengineDB import TDengineDB, INSERT_MAX_ROWS, INSERT_MAX_SQL_LENGTH
+logger = logging.getLogger("DigitalTwinApp")
+
+
+class RestError(Exception):
+    """taosAdapter返回的错误，code为TDengine的错误码或HTTP状态码。"""
+    def __init__(self, code: int, desc: str) -> None:
+        super(RestError, self).__init__(f"[{code:#x}] {desc}")
+        self.code = code
+        self.desc = desc
+
+
+class _HttpConnection(object):
+    """一个HTTP/1.1长连接。"""
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.reusable = True
+
+    def close(self) -> None:
+        self.reusable = False
+        try:
+            self.writer.close()
+        except RuntimeError:    # 所属的事件循环已经关闭
+            pass
+
+    async def request(self, host: str, path: str, headers: dict, body: bytes) -> tuple:
+        """发送POST请求，返回(HTTP状态码, 响应体)。"""
+        lines = [f"POST {path} HTTP/1.1", f"Host: {host}", f"Content-Length: {len(body)}",
+                 "Connection: keep-alive"]
+        lines.extend(f"{key}: {value}" for key, value in headers.items())
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionResetError("服务端关闭了连接")
+        status = int(status_line.split()[1])
+
+        response_headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            key, _, value = line.decode("latin-1").partition(":")
+            response_headers[key.strip().lower()] = value.strip()
+
+        if response_headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    # 跳过尾部的trailer
+                    while (await self.reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readexactly(2)
+            data = b"".join(chunks)
+        elif "content-length" in response_headers:
+            data = await self.reader.readexactly(int(response_headers["content-length"]))
+        else:
+            data = await self.reader.read()
+            self.reusable = False
+
+        if response_headers.get("connection", "").lower() == "close":
+            self.reusable = False
+        return status, data
+
+
+class AsyncTDengineDB(object):
+    """基于asyncio的TDengine REST客户端，接口与TDengineDB一致，但所有数据库操作都需要await。
+
+    同一个对象可以被多个协程同时使用，每个请求从连接池借用一个长连接。
+    """
+    # SQL语句的拼接与TDengineDB完全一致，直接复用
+    _select_sql = TDengineDB._select_sql
+    _insert_sqls = TDengineDB._insert_sqls
+    _sql_value = staticmethod(TDengineDB._sql_value)
+
+    def __init__(self) -> None:
+        self._database = ""
+        self._as_dict = True
+        self._schema_cache = None
+        self._insert_max_rows = INSERT_MAX_ROWS
+        self._insert_max_sql_length = INSERT_MAX_SQL_LENGTH
+        self._max_connections = 8
+        self._loop = None           # 连接池所属的事件循环
+        self._slots = None          # 限制同时进行的请求数
+        self._idle = []             # 空闲的长连接
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, exc_tb) -> None:
+        await self.close()
+
+    @property
+    def database(self) -> str:
+        return self._database
+
+    async def connect(self, **kw) -> bool:
+        """连接数据库，即检查taosAdapter是否可用。
+
+        如：await connect(host="192.168.3.92", user="root", password="taosdata",
+                         database="beihu_dt", port=6041)
+
+        Arguments:
+            host: taosAdapter的IP地址，可以带http://前缀。
+            user: 用户或者账户名，默认值是root。
+            password: 密码，默认值是taosdata。
+            database: 数据库名称。
+            port: taosAdapter的端口，默认值是6041。
+            timeout: 每个HTTP请求的超时时间，单位为秒，默认为30秒。
+            as_dict: 查询结果存储方式，True为字典列表，否则为元组列表，默认为字典列表。
+            max_connections: 长连接池的大小，即同时进行的最大请求数，默认为8。
+            schema_ttl、insert_max_rows、insert_max_sql_length: 同TDengineDB.connect()。
+        Returns:
+            数据库连接成功时返回True，否则返回False。
+        """
+        host = kw.get("host", "")                                   # taosAdapter的IP地址
+        self._user = kw.get("user", "root")                         # 用户名
+        self._password = kw.get("password", "taosdata")             # 密码
+        self._database = kw.get("database", "")                     # 数据库名称
+        self._port = kw.get("port", 6041)                           # 端口
+        self._timeout = kw.get("timeout", 30)                       # HTTP请求超时时间
+        self._as_dict = kw.get("as_dict", True)                     # 查询结果存储方式
+        self._max_connections = kw.get("max_connections", 8)       # 长连接池的大小
+        schema_ttl = kw.get("schema_ttl", 60)                       # 元数据缓存的有效期
+        self._insert_max_rows = kw.get("insert_max_rows", INSERT_MAX_ROWS)
+        self._insert_max_sql_length = kw.get("insert_max_sql_length", INSERT_MAX_SQL_LENGTH)
+
+        assert host, "请指定数据库服务器的IP地址！"
+        assert self._database, "请指定数据库名称！"
+        assert self._max_connections > 0, "连接池的大小必须大于0！"
+
+        self._host = host.split("://", 1)[-1].rstrip("/")
+        token = base64.b64encode(f"{self._user}:{self._password}".encode("utf-8")).decode("ascii")
+        self._headers = {"Authorization": f"Basic {token}", "Content-Type": "text/plain; charset=utf-8"}
+        await self.close()
+
+        logger.info(f"host={self._host}, user={self._user}, database={self._database}, port={self._port}, "
+                    f"max_connections={self._max_connections}")
+        try:
+            await self._request("SELECT SERVER_VERSION()")
+        except Exception:
+            logger.error(traceback.format_exc())
+            return False
+
+        # 与同步的TDengineDB共用同一份元数据缓存
+        self._schema_cache = SchemaCache.get_cache(self._host, self._port, self._database, schema_ttl)
+        logger.info(f"数据库已连接！REST异步连接，{self._host}:{self._port}")
+        return True
+
+    async def close(self) -> None:
+        """关闭连接池中的所有连接。"""
+        idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def _bind_loop(self) -> None:
+        """连接池绑定到当前的事件循环，事件循环变化时丢弃旧的连接。"""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            for conn in self._idle:
+                conn.close()
+            self._idle = []
+            self._slots = asyncio.Semaphore(self._max_connections)
+            self._loop = loop
+
+    async def _open(self) -> _HttpConnection:
+        reader, writer = await asyncio.open_connection(self._host, self._port)
+        return _HttpConnection(reader, writer)
+
+    async def _request(self, sql: str) -> dict:
+        """通过taosAdapter执行一条SQL语句，返回解析后的JSON结果，失败时抛出异常。
+
+        复用的长连接可能已经被服务端关闭（空闲超时），此时换一个新连接重试一次。
+        """
+        self._bind_loop()
+        path = f"/rest/sql/{self._database}"
+        body = sql.encode("utf-8")
+
+        with QueryStats.track(self, sql) as t:
+            result, nbytes = await self._send(path, body)
+            t.result(result.get("rows", 0), nbytes)
+        return result
+
+    async def _send(self, path: str, body: bytes) -> tuple:
+        """从连接池借用一个长连接发送请求，返回(解析后的JSON结果, 响应的字节数)。
+
+        建立连接和等待响应分别受timeout限制，taosAdapter不可达时不会等到操作系统的连接超时。
+        """
+        async with self._slots:
+            while True:
+                reused = bool(self._idle)
+                conn = self._idle.pop() if reused else await asyncio.wait_for(self._open(), self._timeout)
+                try:
+                    status, data = await asyncio.wait_for(
+                        conn.request(f"{self._host}:{self._port}", path, self._headers, body), self._timeout)
+                except (ConnectionError, asyncio.IncompleteReadError) as e:
+                    conn.close()
+                    if reused:
+                        logger.debug(f"长连接已失效，重新连接：{e}")
+                        continue
+                    raise
+                except BaseException:
+                    # 超时或被取消时连接上可能还有未读完的响应，不能再复用
+                    conn.close()
+                    raise
+
+                if conn.reusable:
+                    self._idle.append(conn)
+                else:
+                    conn.close()
+                break
+
+        try:
+            result = json.loads(data)
+        except ValueError:
+            raise RestError(status, data[:200].decode("utf-8", "replace"))
+        if status >= 300 or result.get("code", 0) != 0:
+            raise RestError(result.get("code", status), result.get("desc", ""))
+        return result, len(data)
+
+    @staticmethod
+    def _rows(result: dict) -> tuple:
+        """从REST结果中取出字段名和记录，时间戳转换为datetime，与taosrest的结果一致。"""
+        meta = result.get("column_meta") or []
+        cols = [m[0] for m in meta]
+        rows = result.get("data") or []
+        ts_index = [i for i, m in enumerate(meta) if m[1].upper() == "TIMESTAMP"]
+        if ts_index:
+            for row in rows:
+                for i in ts_index:
+                    if isinstance(row[i], str):
+                        row[i] = datetime.fromisoformat(row[i])
+        return cols, [tuple(row) for row in rows]
+
+    async def _query(self, sql: str, as_dict: bool = True, columnar: bool = False) -> (list | dict):
+        """通过SQL语句查询数据库，参数和返回值同TDengineDB._query()。"""
+        assert sql, "SQL语句不能为空！"
+
+        try:
+            logger.debug(sql)
+            result = await self._request(sql)
+            cols, rows = self._rows(result)
+        except Exception:
+            logger.info(sql)
+            logger.error(traceback.format_exc())
+            return None
+
+        if columnar:
+            return to_columns(cols, rows, [m[1] for m in result.get("column_meta") or []])
+        if as_dict:
+            return [dict(zip(cols, row)) for row in rows]
+        return rows
+
+    async def query(self, table_name: str, select_cols: list = None, fetch_type: int = DBBase.FETCH_ALL,
+                    conditions: str = None, order_cols: list = None, order_by: list = None,
+                    columnar: bool = False) -> (dict | list):
+        """通过SQL语句及参数查询数据库，参数和返回值同TDengineDB.query()。"""
+        assert table_name, "表名不能为空！"
+
+        sql = self._select_sql(table_name, select_cols, fetch_type, conditions, order_cols, order_by)
+        return await self._query(sql, self._as_dict, columnar)
+
+    async def insert(self, table_name: str, keyvalues: list, max_rows: int = None,
+                     max_sql_length: int = None) -> bool:
+        """添加记录，多条记录合并成多行INSERT语句批量插入，参数和返回值同TDengineDB.insert()。"""
+        assert table_name, '表名不能为空！'
+
+        groups = {}
+        for row in keyvalues:
+            if isinstance(row, (list, tuple)):
+                groups.setdefault(None, []).append(row)
+            elif isinstance(row, dict):
+                groups.setdefault(tuple(row.keys()), []).append(list(row.values()))
+            else:
+                logger.warning(f"{row} 不是列表或字典，已跳过！")
+
+        for columns, rows in groups.items():
+            for sql, count in self._insert_sqls(table_name, columns, rows, max_rows, max_sql_length):
+                try:
+                    await self._request(sql)
+                except Exception:
+                    logger.info(sql[:1000])
+                    logger.error(traceback.format_exc())
+                    return False
+
+        return True
+
+    async def describe(self, table_name: str) -> list:
+        """查询表结构，参数和返回值同TDengineDB.describe()，与TDengineDB共用元数据缓存。"""
+        assert table_name, "表名不能为空！"
+
+        columns = self._schema_cache.describe(table_name) if self._schema_cache else None
+        if columns is not None:
+            return columns
+
+        sql = f"DESCRIBE {self._database}.{table_name}"
+        try:
+            logger.debug(sql)
+            _, columns = self._rows(await self._request(sql))
+        except Exception:
+            logger.error(traceback.format_exc())
+            return None
+
+        if self._schema_cache and columns:
+            self._schema_cache.set_describe(table_name, columns)
+        return columns
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多个服务器（如多个taosAdapter）的连接池，把只读的查询分散到各个服务器。
+
+每个服务器（endpoint）各有一个TDenginePool，第一个服务器为主服务器：
+    1. 写操作（及不确定是否只读的连接）固定使用主服务器，即acquire()、connection()的缺省行为；
+    2. 只读的查询（read_only=True、query_many()）按策略选择服务器：
+       LEAST_OUTSTANDING：选择正在执行（及等待连接）的请求最少的服务器，相同时轮流选择；
+       ROUND_ROBIN：轮流选择；
+    3. 连接某个服务器失败时，该服务器在cooldown秒内不再分配查询（冷却），查询改用其他服务器；
+       冷却结束后重新参与分配，再次失败则重新冷却。所有服务器都在冷却时，按恢复时间依次尝试。
+所有服务器连接的是同一个TDengine集群，从任意服务器都能读到刚写入的数据。
+
+Examples:
+    >>> pool = get_pool(endpoints=["192.168.3.92:6041", "192.168.3.93:6041"], user="root",
+    ...                 password="taosdata", database="beihu_dt", link_mode=DBBase.REST_LINK)
+    >>> with pool.connection(read_only=True) as db:
+    ...     db.query("realtime_data", ["ts"], fetch_type=DBBase.FETCH_ONE)
+
+历史记录（按照以下格式依次添加）：
+   日期        人员	      改动情况
+2026-10-18    系统      创建。
+"""
+
+import logging
+import threading
+import time
+
+from .TDengineDB import TDengineDB
+from .TDenginePool import TDenginePool
+logger = logging.getLogger("DigitalTwinApp")
+
+# 只读查询的服务器选择策略
+LEAST_OUTSTANDING = "least_outstanding"     # 正在执行的请求最少
+ROUND_ROBIN = "round_robin"                 # 轮流
+
+
+def parse_endpoint(endpoint, default_port: int = None) -> tuple:
+    """解析服务器地址。
+
+    Arguments:
+        endpoint: "host:port"、"host"（使用default_port）或(host, port)元组，host可以带协议，
+            如"http://192.168.3.92:6041"。
+        default_port: 没有指定端口时使用的端口。
+    Returns:
+        (host, port)元组。
+    """
+    if isinstance(endpoint, (tuple, list)):
+        host, port = endpoint
+        return host, int(port)
+    host, _, port = str(endpoint).strip().rpartition(":")
+    if host and port.isdigit():
+        return host, int(port)
+    return str(endpoint).strip(), default_port
+
+
+class BalancedPool(TDenginePool):
+    """多个服务器的连接池，接口与TDenginePool相同。
+
+    Arguments:
+        endpoints: 服务器地址列表，第一个为主服务器，格式见parse_endpoint()。
+        strategy: 只读查询的服务器选择策略，LEAST_OUTSTANDING或ROUND_ROBIN。
+        cooldown: 连接失败的服务器暂停分配查询的时间，单位为秒。
+        min_size、max_size、idle_timeout、check_interval、wait_timeout: 每个服务器的连接池的参数，
+            见TDenginePool。
+        kw: 传给TDengineDB.connect()的连接参数，host、port由endpoints指定。
+    """
+    def __init__(self, endpoints: list, strategy: str = LEAST_OUTSTANDING, cooldown: float = 30,
+                 min_size: int = 1, max_size: int = 8, idle_timeout: float = 300,
+                 check_interval: float = 30, wait_timeout: float = 30, **kw) -> None:
+        assert endpoints, "请指定至少一个服务器！"
+        assert strategy in (LEAST_OUTSTANDING, ROUND_ROBIN), f"不支持的服务器选择策略：{strategy}"
+
+        kw.pop("host", None)
+        default_port = kw.pop("port", None)
+        super().__init__(min_size=min_size, max_size=max_size, idle_timeout=idle_timeout,
+                         check_interval=check_interval, wait_timeout=wait_timeout, **kw)
+
+        self._endpoints = [parse_endpoint(endpoint, default_port) for endpoint in endpoints]
+        self._pools = [TDenginePool(min_size=min_size, max_size=max_size, idle_timeout=idle_timeout,
+                                    check_interval=check_interval, wait_timeout=wait_timeout,
+                                    host=host, port=port, **kw)
+                       for host, port in self._endpoints]
+        self._strategy = strategy
+        self._cooldown = cooldown
+        self._max_size = max_size * len(self._pools)    # query_many()的线程池大小
+
+        self._lock = threading.Lock()
+        self._outstanding = [0] * len(self._pools)      # 每个服务器正在执行（及等待连接）的请求数
+        self._down_until = [0.0] * len(self._pools)     # 每个服务器冷却结束的时间（time.monotonic()）
+        self._next = 0                                  # 轮流选择的起始位置
+        self._owners = {}                               # id(借出的连接) -> 服务器序号
+
+    @property
+    def size(self) -> int:
+        """所有服务器已创建的连接总数。"""
+        return sum(pool.size for pool in self._pools)
+
+    @property
+    def idle(self) -> int:
+        """所有服务器当前空闲的连接数。"""
+        return sum(pool.idle for pool in self._pools)
+
+    def status(self) -> list:
+        """各服务器的状态。
+
+        Returns:
+            字典列表，每个服务器一个字典：endpoint（"host:port"）、primary（是否为主服务器）、
+            available（是否可以分配查询，冷却中为False）、outstanding（正在执行的请求数）、
+            size（连接数）、idle（空闲连接数）。
+        """
+        now = time.monotonic()
+        with self._lock:
+            return [{"endpoint": f"{host}:{port}", "primary": i == 0, "available": self._down_until[i] <= now,
+                     "outstanding": self._outstanding[i], "size": self._pools[i].size, "idle": self._pools[i].idle}
+                    for i, (host, port) in enumerate(self._endpoints)]
+
+    def _candidates(self) -> list:
+        """按策略排列只读查询可以使用的服务器序号，冷却中的服务器按恢复时间排在最后。"""
+        now = time.monotonic()
+        with self._lock:
+            count = len(self._pools)
+            start = self._next
+            self._next = (self._next + 1) % count
+            order = [(start + i) % count for i in range(count)]
+            available = [i for i in order if self._down_until[i] <= now]
+            if self._strategy == LEAST_OUTSTANDING:
+                available.sort(key=lambda i: self._outstanding[i])     # 稳定排序，相同时保持轮流的顺序
+            cooling = sorted((i for i in order if self._down_until[i] > now), key=lambda i: self._down_until[i])
+        return available + cooling
+
+    def _acquire_from(self, index: int, timeout: float) -> TDengineDB:
+        """从指定服务器的连接池借出连接，连接失败时该服务器开始冷却。"""
+        with self._lock:
+            self._outstanding[index] += 1
+        try:
+            db = self._pools[index].acquire(timeout)
+        except ConnectionError:
+            with self._lock:
+                self._outstanding[index] -= 1
+                self._down_until[index] = time.monotonic() + self._cooldown
+            host, port = self._endpoints[index]
+            logger.warning(f"服务器{host}:{port}连接失败，{self._cooldown}秒内不再分配查询")
+            raise
+        except BaseException:
+            with self._lock:
+                self._outstanding[index] -= 1
+            raise
+
+        with self._lock:
+            self._owners[id(db)] = index
+            if self._down_until[index]:
+                self._down_until[index] = 0.0
+                host, port = self._endpoints[index]
+                logger.info(f"服务器{host}:{port}已恢复")
+        return db
+
+    def acquire(self, timeout: float = None, read_only: bool = False) -> TDengineDB:
+        """借出一个连接，用完后必须调用release()归还。
+
+        Arguments:
+            timeout: 等待空闲连接的最长时间（秒），缺省为构造时的wait_timeout。
+            read_only: 为False时借出主服务器的连接；为True时按策略选择服务器，连接失败时依次
+                尝试其他服务器。
+        Returns:
+            已经连接好的TDengineDB对象。所有服务器都连接失败时抛出ConnectionError，等待超时抛出
+            TimeoutError。
+        """
+        if self._closed:
+            raise ConnectionError("连接池已关闭！")
+        if not read_only:
+            return self._acquire_from(0, timeout)
+
+        error = None
+        for index in self._candidates():
+            try:
+                return self._acquire_from(index, timeout)
+            except ConnectionError as e:
+                error = e
+        raise error
+
+    def release(self, db: TDengineDB, broken: bool = False) -> None:
+        """归还连接，参数见TDenginePool.release()。"""
+        if db is None:
+            return
+
+        with self._lock:
+            index = self._owners.pop(id(db), None)
+            if index is not None:
+                self._outstanding[index] -= 1
+        if index is None:
+            logger.warning(f"归还的连接不属于该连接池：{db}")
+            self._discard([db])
+            return
+        self._pools[index].release(db, broken)
+
+    def close(self) -> None:
+        """关闭所有服务器的连接池。"""
+        super().close()
+        for pool in self._pools:
+            pool.close()
@@ -8,8 +8,18 @@
    日期        人员	      改动情况
 2023-11-06    崔树标    创建。
 2023-12-18    崔树标    添加TDengine相关的定义和变量。
+2026-10-18    系统      添加WebSocket连接方式WS_LINK。
+2026-10-18    系统      添加_track()，记录每条SQL语句的执行情况。
+2026-10-18    系统      添加load_driver()，数据库驱动在第一次使用时才加载。
 """
 
+import importlib
+import logging
+import threading
+
+from . import QueryStats
+logger = logging.getLogger("DigitalTwinApp")
+
 # 数据库查询时的常用指令类型
 FETCH_ONE = -1      # 只返回查询结果中最上面的第一条记录
 FETCH_ALL = 0       # 返回查询到的所有记录
@@ -19,6 +29,34 @@ ORDER_DESC = 1      # 查询结果降序
 # TDengine数据库连接方式
 NATIVE_LINK = 0     # 原生连接，通过客户端驱动程序taosc直接与服务端程序taosd建立连接
 REST_LINK = 1       # REST连接，通过taosAdapter组件提供的REST API建立与taosd的连接
+WS_LINK = 2         # WebSocket连接，通过taosAdapter组件提供的WebSocket API建立与taosd的连接
+
+# 已加载的数据库驱动，驱动名 -> 模块，未安装或加载失败的为None
+_drivers = {}
+_drivers_lock = threading.Lock()
+
+
+def load_driver(name: str):
+    """加载数据库驱动模块（taos、taosrest、taosws、pyodbc、pymssql等）。
+
+    驱动在第一次连接对应的数据库时才加载，不使用的驱动（及其动态库，如taos加载的libtaos）
+    不会被加载，未安装的驱动也不影响其他数据库的使用。加载结果会被缓存，失败时只记录一次日志。
+
+    Arguments:
+        name: 驱动的模块名。
+    Returns:
+        驱动模块，未安装或加载失败时返回None。
+    """
+    if name in _drivers:
+        return _drivers[name]
+    with _drivers_lock:
+        if name not in _drivers:
+            try:
+                _drivers[name] = importlib.import_module(name)
+            except Exception as e:     # 未安装（ImportError），或找不到动态库等
+                logger.error(f"无法加载数据库驱动{name}：{e}")
+                _drivers[name] = None
+    return _drivers[name]
 
 class DBBase(object):
     """数据库基类。
@@ -68,6 +106,21 @@ class DBBase(object):
             self._connect.close()
             self._connect = None
 
+    def _track(self, sql: str):
+        """记录一条SQL语句的执行情况（耗时、记录数、数据量、调用位置），详见QueryStats。
+
+        如：with self._track(sql) as t:
+                self._cursor.execute(sql)
+                rows = self._cursor.fetchall()
+                t.result(rows)
+
+        Arguments:
+            sql: SQL语句。
+        Returns:
+            上下文管理器，with语句块的执行时间即该语句的耗时。
+        """
+        return QueryStats.track(self, sql)
+
     @property
     def database(self):
         """获取数据库对象及游标。
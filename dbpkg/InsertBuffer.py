@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+后台批量写入缓冲区（write-behind），把请求处理线程中的同步INSERT移到后台线程执行。
+
+调用put()把记录放入队列后立即返回，后台线程按表名合并记录，再调用TDengineDB.insert()
+批量写入。某张表满足以下任一条件时写入该表的记录：
+    1. 攒够batch_rows条记录；
+    2. 攒够batch_bytes字节（按记录的文本长度估算）；
+    3. 该表最早的记录已经等待了max_delay秒。
+写入失败时按指数退避重试，重试全部失败后，如果指定了spool_dir，记录追加到该目录下的
+"表名.jsonl"文件中，后台线程每隔replay_interval秒重新写入，进程重启后也会继续写入，
+数据不会因为数据库暂时不可用而丢失；没有指定spool_dir时丢弃并记录日志。
+每批写入成功后调用on_written(表名, 记录列表)，如使查询缓存（SegmentCache）中相应的时间段失效。
+队列的长度有上限（max_pending），数据库写得比请求慢时，put()会阻塞等待（背压），等待超时
+则抛出queue.Full。进程退出时（atexit）自动写完队列中剩余的记录。
+
+Examples:
+    >>> buffer = InsertBuffer(get_pool(**DB_CONFIG), spool_dir="/var/lib/dt/spool")
+    >>> buffer.put("system_parameters", {"ts": "2024-01-01 00:00:00.000", "predict_steps_sp": 12})
+    >>> buffer.flush()      # 需要马上读到刚写入的数据时，等待写完
+    >>> buffer.close()
+
+历史记录（按照以下格式依次添加）：
+   日期        人员	      改动情况
+2026-10-18    系统      创建。
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import traceback
+
+logger = logging.getLogger("DigitalTwinApp")
+
+_STOP = object()    # 通知后台线程退出的标记
+
+
+class InsertBuffer(object):
+    """后台批量写入缓冲区。
+
+    Arguments:
+        pool: TDenginePool连接池，后台线程每写一批借用一次连接。
+        batch_rows: 每张表每批的最大记录数。
+        batch_bytes: 每张表每批的最大字节数（估算值）。
+        max_delay: 记录在缓冲区中的最长等待时间，单位为秒。
+        max_pending: 队列的最大长度，超过时put()阻塞。
+        put_timeout: put()阻塞的最长时间，单位为秒，None为一直等待。
+        retries: 一批写入失败时的重试次数。
+        spool_dir: 重试失败的记录的保存目录，为None时丢弃。
+        replay_interval: 重新写入spool_dir中的记录的时间间隔，单位为秒。
+        on_written: 每批写入成功后的回调函数on_written(表名, 记录列表)，为None时不调用。
+    """
+    def __init__(self, pool, batch_rows: int = 5000, batch_bytes: int = 1000000, max_delay: float = 1.0,
+                 max_pending: int = 100000, put_timeout: float = None, retries: int = 3,
+                 spool_dir: str = None, replay_interval: float = 60, on_written=None) -> None:
+        self._pool = pool
+        self._batch_rows = batch_rows
+        self._batch_bytes = batch_bytes
+        self._max_delay = max_delay
+        self._put_timeout = put_timeout
+        self._retries = retries
+        self._spool_dir = spool_dir
+        self._replay_interval = replay_interval
+        self._on_written = on_written
+        if spool_dir:
+            os.makedirs(spool_dir, exist_ok=True)
+
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._written = 0           # 已写入的记录数
+        self._spooled = 0           # 重试失败后保存到spool_dir的记录数
+        self._dropped = 0           # 重试失败后丢弃的记录数
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="InsertBuffer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb) -> None:
+        self.close()
+
+    @property
+    def pending(self) -> int:
+        """队列中等待写入的记录数。"""
+        return self._queue.qsize()
+
+    @property
+    def written(self) -> int:
+        """已写入的记录数。"""
+        return self._written
+
+    @property
+    def spooled(self) -> int:
+        """重试失败后保存到spool_dir、等待重新写入的记录数。"""
+        return self._spooled
+
+    @property
+    def dropped(self) -> int:
+        """重试失败后丢弃的记录数。"""
+        return self._dropped
+
+    def put(self, table_name: str, row) -> None:
+        """放入一条记录，队列已满时阻塞，超过put_timeout抛出queue.Full。
+
+        Arguments:
+            table_name: 表名。
+            row: 记录，字典或按表的字段顺序排列的列表，同TDengineDB.insert()。
+        """
+        assert table_name, "表名不能为空！"
+        assert not self._closed, "写入缓冲区已关闭！"
+        self._queue.put((table_name, row), timeout=self._put_timeout)
+
+    def put_many(self, table_name: str, rows: list) -> None:
+        """放入多条记录，参见put()。"""
+        for row in rows:
+            self.put(table_name, row)
+
+    def flush(self, timeout: float = None) -> bool:
+        """等待此前放入的记录全部写完（或重试失败后保存、丢弃）。
+
+        Returns:
+            在timeout秒内写完返回True，否则返回False。
+        """
+        if self._closed:
+            return True
+        done = threading.Event()
+        self._queue.put(done, timeout=self._put_timeout)
+        return done.wait(timeout)
+
+    def close(self, timeout: float = None) -> None:
+        """写完队列中剩余的记录后停止后台线程。"""
+        if self._closed:
+            return
+        self._closed = True
+        atexit.unregister(self.close)
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _insert(self, table_name: str, rows: list) -> bool:
+        """写入一张表的一批记录，失败时按指数退避重试。"""
+        for attempt in range(self._retries + 1):
+            try:
+                with self._pool.connection() as db:
+                    if db.insert(table_name, rows):
+                        return True
+            except Exception as e:
+                logger.warning(f"批量写入{table_name}失败：{e}")
+            if attempt < self._retries:
+                time.sleep(min(0.5 * 2 ** attempt, 10))
+        return False
+
+    def _written_ok(self, table_name: str, rows: list) -> None:
+        """一批记录写入成功，更新计数并调用on_written。"""
+        self._written += len(rows)
+        if self._on_written is not None:
+            try:
+                self._on_written(table_name, rows)
+            except Exception:
+                logger.error(traceback.format_exc())
+
+    def _write(self, table_name: str, rows: list) -> None:
+        """写入一批记录，重试失败时保存到spool_dir或丢弃。"""
+        if self._insert(table_name, rows):
+            self._written_ok(table_name, rows)
+            return
+
+        if self._spool_dir and self._spool(table_name, rows):
+            self._spooled += len(rows)
+            logger.error(f"批量写入{table_name}重试{self._retries}次后仍然失败，{len(rows)}条记录已保存，稍后重新写入")
+            return
+
+        self._dropped += len(rows)
+        logger.error(f"批量写入{table_name}重试{self._retries}次后仍然失败，丢弃{len(rows)}条记录")
+
+    def _spool_path(self, table_name: str) -> str:
+        return os.path.join(self._spool_dir, f"{table_name}.jsonl")
+
+    def _spool(self, table_name: str, rows: list) -> bool:
+        """把记录追加到spool文件，每行一条记录，datetime等类型保存为字符串。"""
+        try:
+            with open(self._spool_path(table_name), "a", encoding="utf-8") as f:
+                for row in rows:
+                    f.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+        except Exception:
+            logger.error(traceback.format_exc())
+            return False
+        return True
+
+    def _replay(self) -> None:
+        """重新写入spool_dir中保存的记录，写入失败的记录保存回spool文件。
+
+        重新写入前先把"表名.jsonl"改名为"表名.jsonl.replaying"，期间写入失败的记录追加到新的
+        "表名.jsonl"中；进程在重新写入过程中退出时，下次启动后继续处理遗留的.replaying文件。
+        """
+        for filename in sorted(os.listdir(self._spool_dir)):
+            if filename.endswith(".jsonl"):
+                table_name = filename[:-len(".jsonl")]
+            elif filename.endswith(".jsonl.replaying"):
+                table_name = filename[:-len(".jsonl.replaying")]
+            else:
+                continue
+
+            path = os.path.join(self._spool_dir, filename)
+            try:
+                if filename.endswith(".jsonl"):
+                    replaying = path + ".replaying"
+                    if os.path.exists(replaying):
+                        continue    # 先处理遗留的.replaying文件
+                    os.replace(path, replaying)
+                    path = replaying
+                with open(path, encoding="utf-8") as f:
+                    rows = [json.loads(line) for line in f if line.strip()]
+            except Exception:
+                logger.error(traceback.format_exc())
+                continue
+
+            self._spooled = max(self._spooled - len(rows), 0)
+            if rows and self._insert(table_name, rows):
+                self._written_ok(table_name, rows)
+                logger.info(f"重新写入{table_name}的{len(rows)}条记录")
+            elif rows:
+                if not self._spool(table_name, rows):
+                    continue    # 保存失败时保留.replaying文件，避免丢失数据
+                self._spooled += len(rows)
+            os.remove(path)
+
+    def _run(self) -> None:
+        """后台线程：按表名攒批并写入。"""
+        batches = {}            # 表名 -> [记录列表, 字节数, 最早记录的截止时间]
+        waiters = []
+        stop = False
+        next_replay = time.monotonic() if self._spool_dir else None
+        while not stop:
+            deadlines = [batch[2] for batch in batches.values()]
+            if next_replay is not None:
+                deadlines.append(next_replay)
+            timeout = max(min(deadlines) - time.monotonic(), 0) if deadlines else None
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                stop = True
+            elif isinstance(item, threading.Event):
+                waiters.append(item)
+            elif item is not None:
+                table_name, row = item
+                batch = batches.get(table_name)
+                if batch is None:
+                    batch = batches[table_name] = [[], 0, time.monotonic() + self._max_delay]
+                batch[0].append(row)
+                batch[1] += len(str(row))
+
+            now = time.monotonic()
+            for table_name in list(batches):
+                rows, size, deadline = batches[table_name]
+                if stop or waiters or len(rows) >= self._batch_rows or size >= self._batch_bytes or now >= deadline:
+                    del batches[table_name]
+                    self._write(table_name, rows)
+
+            if next_replay is not None and time.monotonic() >= next_replay:
+                self._replay()
+                next_replay = time.monotonic() + self._replay_interval
+
+            if not batches:
+                for waiter in waiters:
+                    waiter.set()
+                waiters = []
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+无模式（schemaless）写入的后台批量写入器，用于高频的现场信号采集。
+
+采集程序调用put()把采样点放入队列后立即返回，后台线程把队列中的采样点攒成一批，再调用
+TDengineDB.ingest_lines()一次写入。满足以下任一条件时写入一批：
+    1. 攒够batch_lines行；
+    2. 攒够batch_bytes字节；
+    3. 这一批中最早的采样点已经等待了max_delay秒。
+队列的长度有上限（max_pending），数据库写得比采集慢时，put()会阻塞等待（背压），等待超时
+则抛出queue.Full，由采集程序决定丢弃还是重试，避免内存无限增长。
+
+Examples:
+    >>> ingester = LineIngester(get_pool(**DB_CONFIG), batch_lines=5000, max_delay=1.0)
+    >>> ingester.put(("plant_signal", {"train": "1_1"}, {"do": 2.1}, 1704067200000))
+    >>> ingester.close()     # 写完队列中剩余的数据后退出
+
+历史记录（按照以下格式依次添加）：
+   日期        人员	      改动情况
+2026-10-18    系统      创建。
+"""
+
+import logging
+import queue
+import threading
+import time
+
+from .TDengineDB import TDengineDB
+logger = logging.getLogger("DigitalTwinApp")
+
+_STOP = object()    # 通知后台线程退出的标记
+
+
+class LineIngester(object):
+    """无模式写入的后台批量写入器。
+
+    Arguments:
+        pool: TDenginePool连接池，后台线程每写一批借用一次连接。
+        precision: 时间戳精度，同TDengineDB.ingest_lines()。
+        batch_lines: 每批的最大行数。
+        batch_bytes: 每批的最大字节数。
+        max_delay: 采样点在客户端的最长等待时间，单位为秒。
+        max_pending: 队列的最大长度，超过时put()阻塞。
+        put_timeout: put()阻塞的最长时间，单位为秒，None为一直等待。
+        retries: 一批写入失败时的重试次数，重试全部失败则丢弃该批并记录日志。
+    """
+    def __init__(self, pool, precision: str = "ms", batch_lines: int = 5000, batch_bytes: int = 1000000,
+                 max_delay: float = 1.0, max_pending: int = 100000, put_timeout: float = None,
+                 retries: int = 3) -> None:
+        self._pool = pool
+        self._precision = precision
+        self._batch_lines = batch_lines
+        self._batch_bytes = batch_bytes
+        self._max_delay = max_delay
+        self._put_timeout = put_timeout
+        self._retries = retries
+
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._written = 0           # 已写入的行数
+        self._dropped = 0           # 重试失败后丢弃的行数
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="LineIngester", daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb) -> None:
+        self.close()
+
+    @property
+    def pending(self) -> int:
+        """队列中等待写入的行数。"""
+        return self._queue.qsize()
+
+    @property
+    def written(self) -> int:
+        """已写入的行数。"""
+        return self._written
+
+    @property
+    def dropped(self) -> int:
+        """重试失败后丢弃的行数。"""
+        return self._dropped
+
+    def put(self, line) -> None:
+        """放入一个采样点，队列已满时阻塞，超过put_timeout抛出queue.Full。
+
+        Arguments:
+            line: 行协议字符串，或紧凑格式的元组(测量名, 标签字典, 字段字典, 时间戳)。
+        """
+        assert not self._closed, "写入器已关闭！"
+        if not isinstance(line, str):
+            line = TDengineDB.to_line(*line)
+        self._queue.put(line, timeout=self._put_timeout)
+
+    def put_many(self, lines: list) -> None:
+        """放入多个采样点，参见put()。"""
+        for line in lines:
+            self.put(line)
+
+    def flush(self, timeout: float = None) -> bool:
+        """等待此前放入的采样点全部写完。
+
+        Returns:
+            在timeout秒内写完返回True，否则返回False。
+        """
+        done = threading.Event()
+        self._queue.put(done, timeout=self._put_timeout)
+        return done.wait(timeout)
+
+    def close(self, timeout: float = None) -> None:
+        """写完队列中剩余的采样点后停止后台线程。"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _write(self, lines: list) -> None:
+        """写入一批数据，失败时按指数退避重试。"""
+        for attempt in range(self._retries + 1):
+            try:
+                with self._pool.connection() as db:
+                    if db.ingest_lines(lines, self._precision):
+                        self._written += len(lines)
+                        return
+            except Exception as e:
+                logger.warning(f"无模式写入失败：{e}")
+            if attempt < self._retries:
+                time.sleep(min(0.5 * 2 ** attempt, 10))
+
+        self._dropped += len(lines)
+        logger.error(f"无模式写入重试{self._retries}次后仍然失败，丢弃{len(lines)}行数据")
+
+    def _run(self) -> None:
+        """后台线程：攒批并写入。"""
+        batch, size, deadline = [], 0, None
+        waiters = []
+        stop = False
+        while not stop:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                stop = True
+            elif isinstance(item, threading.Event):
+                waiters.append(item)
+            elif item is not None:
+                if not batch:
+                    deadline = time.monotonic() + self._max_delay
+                batch.append(item)
+                size += len(item) + 1
+
+            full = len(batch) >= self._batch_lines or size >= self._batch_bytes
+            expired = deadline is not None and time.monotonic() >= deadline
+            if batch and (full or expired or stop or waiters):
+                self._write(batch)
+                batch, size, deadline = [], 0, None
+            if not batch:
+                for waiter in waiters:
+                    waiter.set()
+                waiters = []
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SQL语句的执行统计及慢查询日志。
+
+TDengineDB、SQLServerDB、AccessDB执行的每一条SQL语句都通过DBBase._track()记录：耗时（墙钟
+时间）、返回或影响的记录数、数据量（字节，大结果集按前若干行估算）以及调用位置（dbpkg之外
+第一个调用者的文件、行号和函数名）。记录的用途有三个：
+    1. 按语句的"形状"汇总：把字符串、数字常量替换为?、多行VALUES和IN列表折叠之后，同一形状的
+       语句汇总次数、总耗时、最大耗时、记录数、数据量，以及耗时的分布直方图；
+    2. 慢查询日志：耗时超过阈值（默认为config.ini中[Log]节的SLOW_QUERY_MS毫秒）的语句写入
+       DT_LOG目录下的slow_query.log；
+    3. 钩子：add_hook()注册的函数在每条语句执行后被调用，参数为QueryEvent，可以用来对接其他
+       监控系统。
+
+Examples:
+    >>> for item in top(5):
+    ...     print(item["shape"], item["count"], item["total"])
+    >>> logger.info(dump(10))        # 按总耗时排序的前10个语句形状
+    >>> set_slow_threshold(0.5)      # 超过0.5秒的语句写入慢查询日志
+
+历史记录（按照以下格式依次添加）：
+   日期        人员	      改动情况
+2026-10-18    系统      创建。
+2026-10-18    系统      remove_hook()可以注销绑定方法。
+"""
+
+import bisect
+import collections
+import logging
+import os
+import re
+import sys
+import threading
+import time
+
+from .settings import LOG_DIR, SLOW_QUERY_MS
+logger = logging.getLogger("DigitalTwinApp")
+slow_logger = logging.getLogger("DigitalTwinApp.SlowQuery")
+
+# 每条语句执行后传给钩子函数的信息
+QueryEvent = collections.namedtuple("QueryEvent",
+                                    ["sql", "shape", "seconds", "rows", "bytes", "call_site", "source", "error"])
+
+# 耗时直方图的分桶上限（毫秒），最后一个桶为超过10秒的语句
+HISTOGRAM_BOUNDS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000, 10000)
+
+MAX_SHAPES = 1000           # 最多统计的语句形状数，超过后新的形状归入"<other>"
+MAX_SHAPE_LENGTH = 500      # 语句形状的最大长度
+SAMPLE_ROWS = 100           # 估算数据量时采样的行数
+
+_STRING = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?(?![\w.])")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_REPEATED_LIST = re.compile(r"\(\?\)(?:\s*,?\s*\(\?\))+")
+_SPACES = re.compile(r"\s+")
+
+# dbpkg的目录，统计调用位置时跳过该目录下的栈帧
+_PKG_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def shape_of(sql: str) -> str:
+    """返回SQL语句的形状：常量替换为?，多行VALUES及IN列表折叠，空白合并。
+
+    如：SELECT * FROM beihu_dt.realtime_data WHERE ts >= '2024-01-01' AND q > 10
+        的形状为SELECT * FROM beihu_dt.realtime_data WHERE ts >= ? AND q > ?
+    """
+    shape = _STRING.sub("?", sql)
+    shape = _NUMBER.sub("?", shape)
+    shape = _LIST.sub("(?)", shape)
+    shape = _REPEATED_LIST.sub("(?)...", shape)
+    shape = _SPACES.sub(" ", shape).strip()
+    return shape[:MAX_SHAPE_LENGTH]
+
+
+def _estimate_bytes(result) -> int:
+    """估算查询结果的数据量（字节），字符串按长度计，其他值按8字节计，大结果集按前若干行估算。"""
+    if isinstance(result, dict):    # 列式结果
+        return sum(getattr(column, "nbytes", 0) for column in result.values())
+    if not result:
+        return 0
+
+    sample = result[:SAMPLE_ROWS]
+    size = 0
+    for row in sample:
+        values = row.values() if isinstance(row, dict) else row
+        for value in values:
+            size += len(value) if isinstance(value, (str, bytes)) else 8
+    return size * len(result) // len(sample)
+
+
+def _call_site() -> str:
+    """返回dbpkg之外第一个调用者的位置，格式为"文件名:行号 函数名"。"""
+    frame = sys._getframe(2)
+    while frame and frame.f_code.co_filename.startswith(_PKG_DIR):
+        frame = frame.f_back
+    if frame is None:
+        return ""
+    return f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno} {frame.f_code.co_name}"
+
+
+class ShapeStats(object):
+    """一种语句形状的汇总统计。"""
+    def __init__(self, shape: str, sql: str) -> None:
+        self.shape = shape
+        self.sample = sql[:MAX_SHAPE_LENGTH]    # 第一次出现时的原始语句
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.histogram = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+        self.call_sites = collections.Counter()
+
+    def add(self, event: QueryEvent) -> None:
+        self.count += 1
+        self.errors += event.error
+        self.total += event.seconds
+        self.max = max(self.max, event.seconds)
+        self.rows += event.rows
+        self.bytes += event.bytes
+        self.histogram[bisect.bisect_left(HISTOGRAM_BOUNDS_MS, event.seconds * 1000)] += 1
+        if len(self.call_sites) < 20 or event.call_site in self.call_sites:
+            self.call_sites[event.call_site] += 1
+
+    def to_dict(self) -> dict:
+        return {
+            "shape": self.shape,
+            "sample": self.sample,
+            "count": self.count,
+            "errors": self.errors,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "histogram": dict(zip([f"<={b}ms" for b in HISTOGRAM_BOUNDS_MS] + [f">{HISTOGRAM_BOUNDS_MS[-1]}ms"],
+                                  self.histogram)),
+            "call_sites": [site for site, _ in self.call_sites.most_common(3)],
+        }
+
+
+class QueryStats(object):
+    """进程内所有数据库对象共用的SQL执行统计。"""
+    def __init__(self, slow_threshold: float = SLOW_QUERY_MS / 1000) -> None:
+        self.enabled = True
+        self.slow_threshold = slow_threshold    # 慢查询阈值，单位为秒，None为不记录
+        self._lock = threading.Lock()
+        self._shapes = {}
+        self._hooks = []
+
+    def add_hook(self, hook) -> None:
+        """注册钩子函数，每条语句执行后调用hook(event)，event为QueryEvent。"""
+        with self._lock:
+            self._hooks = self._hooks + [hook]
+
+    def remove_hook(self, hook) -> None:
+        """注销钩子函数。"""
+        with self._lock:
+            self._hooks = [h for h in self._hooks if h != hook]    # 绑定方法每次取值都是新对象，用==比较
+
+    def record(self, event: QueryEvent) -> None:
+        """记录一条语句的执行情况。"""
+        with self._lock:
+            stats = self._shapes.get(event.shape)
+            if stats is None:
+                shape = event.shape if len(self._shapes) < MAX_SHAPES else "<other>"
+                stats = self._shapes.get(shape)
+                if stats is None:
+                    stats = ShapeStats(shape, event.sql)
+                    self._shapes[shape] = stats
+            stats.add(event)
+            hooks = self._hooks
+
+        if self.slow_threshold is not None and event.seconds >= self.slow_threshold:
+            _get_slow_logger().warning(f"{event.seconds * 1000:.1f}ms rows={event.rows} bytes={event.bytes} "
+                                       f"source={event.source} at {event.call_site}: {event.sql[:2000]}")
+
+        for hook in hooks:
+            try:
+                hook(event)
+            except Exception as e:
+                logger.warning(f"SQL统计钩子{hook}执行失败：{e}")
+
+    def top(self, n: int = 10, key: str = "total") -> list:
+        """返回按key（total、count、max、mean、rows、bytes）排序的前n个语句形状的统计。"""
+        with self._lock:
+            items = [stats.to_dict() for stats in self._shapes.values()]
+        items.sort(key=lambda item: item[key], reverse=True)
+        return items[:n]
+
+    def reset(self) -> None:
+        """清空统计。"""
+        with self._lock:
+            self._shapes = {}
+
+
+class _Tracker(object):
+    """记录一条语句执行情况的上下文管理器，见DBBase._track()。"""
+    __slots__ = ("_stats", "_source", "_sql", "_start", "_rows", "_bytes")
+
+    def __init__(self, stats: QueryStats, source, sql: str) -> None:
+        self._stats = stats
+        self._source = source
+        self._sql = sql
+        self._rows = 0
+        self._bytes = 0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb) -> None:
+        seconds = time.perf_counter() - self._start
+        if not self._stats.enabled:
+            return
+        try:
+            self._stats.record(QueryEvent(self._sql, shape_of(self._sql), seconds, self._rows, self._bytes,
+                                          _call_site(), type(self._source).__name__, exc_type is not None))
+        except Exception as e:      # 统计出错不能影响数据库操作
+            logger.warning(f"SQL统计失败：{e}")
+
+    def result(self, result=None, nbytes: int = None) -> None:
+        """设置语句的结果。
+
+        Arguments:
+            result: 查询结果（字典列表、二维列表或列式结果），或者写入、删除的记录数。
+            nbytes: 数据量（字节），缺省时根据查询结果估算，写入语句一般为SQL语句的长度。
+        """
+        if isinstance(result, int):
+            self._rows += max(result, 0)
+        elif isinstance(result, dict):
+            self._rows += len(next(iter(result.values()), ()))
+        elif result:
+            self._rows += len(result)
+        if nbytes is not None:
+            self._bytes += nbytes
+        elif not isinstance(result, int) and result is not None:
+            self._bytes += _estimate_bytes(result)
+
+
+_slow_logger_ready = False
+_stats = QueryStats()
+
+
+def _get_slow_logger() -> logging.Logger:
+    """慢查询日志写入DT_LOG/slow_query.log；LOGGING配置已经生效时直接使用配置的处理器。"""
+    global _slow_logger_ready
+    if not _slow_logger_ready:
+        with _stats._lock:
+            if not slow_logger.handlers:
+                handler = logging.FileHandler(os.path.join(LOG_DIR, "slow_query.log"), encoding="utf-8")
+                handler.setFormatter(logging.Formatter("{asctime} {process:d} {thread:d} {message}", style="{"))
+                slow_logger.addHandler(handler)
+                slow_logger.setLevel(logging.WARNING)
+                slow_logger.propagate = False
+            _slow_logger_ready = True
+    return slow_logger
+
+
+def get_stats() -> QueryStats:
+    """返回进程内共用的SQL执行统计。"""
+    return _stats
+
+
+def track(source, sql: str) -> _Tracker:
+    """返回记录一条语句执行情况的上下文管理器，如：
+        with track(self, sql) as t:
+            rows = cursor.fetchall()
+            t.result(rows)
+    """
+    return _Tracker(_stats, source, sql)
+
+
+def add_hook(hook) -> None:
+    """注册钩子函数，见QueryStats.add_hook()。"""
+    _stats.add_hook(hook)
+
+
+def remove_hook(hook) -> None:
+    """注销钩子函数。"""
+    _stats.remove_hook(hook)
+
+
+def set_slow_threshold(seconds: float) -> None:
+    """设置慢查询阈值，单位为秒，None为不记录慢查询。"""
+    _stats.slow_threshold = seconds
+
+
+def set_enabled(enabled: bool) -> None:
+    """开启或关闭SQL执行统计。"""
+    _stats.enabled = enabled
+
+
+def top(n: int = 10, key: str = "total") -> list:
+    """返回按key排序的前n个语句形状的统计，见QueryStats.top()。"""
+    return _stats.top(n, key)
+
+
+def reset() -> None:
+    """清空统计。"""
+    _stats.reset()
+
+
+def dump(n: int = 10, key: str = "total") -> str:
+    """把按key排序的前n个语句形状的统计格式化为文本，便于写入日志或在控制台查看。"""
+    lines = [f"SQL执行统计（按{key}排序，前{n}个）："]
+    for i, item in enumerate(top(n, key), 1):
+        lines.append(f"{i:>3}. total={item['total']:.3f}s count={item['count']} mean={item['mean'] * 1000:.1f}ms "
+                     f"max={item['max'] * 1000:.1f}ms rows={item['rows']} bytes={item['bytes']} "
+                     f"errors={item['errors']}")
+        lines.append(f"     {item['shape']}")
+        histogram = " ".join(f"{bucket}:{count}" for bucket, count in item["histogram"].items() if count)
+        lines.append(f"     {histogram}  at {', '.join(item['call_sites'])}")
+    return "\n".join(lines)
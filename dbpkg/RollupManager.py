@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+降采样汇总（rollup）的管理，由TDengine的流计算（CREATE STREAM）持续维护按固定时间窗口
+聚合的汇总表，查询时自动选择合适的汇总表，不再每次请求都从原始数据重新计算。
+
+每个汇总由源表、时间窗口和聚合函数定义，如realtime_data按10分钟取每个窗口的第一个值，
+对应的汇总表为realtime_data_10m，流计算为realtime_data_10m_stream。RollupManager提供：
+    1. create()：创建流计算，默认同时计算已有的历史数据（FILL_HISTORY）；
+    2. drop()：删除流计算，汇总表默认保留；
+    3. status()：流计算的状态及汇总表最新的时间戳；
+    4. backfill()：重建流计算，从指定时间开始重新计算历史数据，如修改了原始数据之后；
+    5. query()：按查询要求的分辨率，选择窗口最大、且能整除该分辨率的已创建汇总表，窗口
+       比分辨率小时在汇总表上再聚合；没有合适的汇总表时直接在源表上做窗口查询。
+
+Examples:
+    >>> manager = RollupManager(get_pool(**DB_CONFIG))
+    >>> manager.register("realtime_data", "10m", aggregate="FIRST")
+    >>> manager.register("realtime_data", "2h", aggregate="FIRST")
+    >>> manager.create()
+    >>> manager.query("realtime_data", ["ts", "do"], "ts >= NOW - 1d", resolution="2h")
+
+历史记录（按照以下格式依次添加）：
+   日期        人员	      改动情况
+2026-10-18    系统      创建。
+"""
+
+import logging
+import threading
+import time
+import traceback
+from collections import namedtuple
+
+from . import DBBase
+from .TDengineDB import TDengineDB
+logger = logging.getLogger("DigitalTwinApp")
+
+# 时间长度单位对应的毫秒数，汇总只支持固定长度的窗口（不含月、年）
+DURATION_UNITS = {
+    "a": 1,
+    "s": 1000,
+    "m": 60000,
+    "h": 3600000,
+    "d": 86400000,
+    "w": 604800000,
+}
+
+# 在汇总表上再聚合时使用的聚合函数，如10分钟的计数相加得到2小时的计数。
+# AVG为各窗口平均值的平均值，窗口内记录数不同时是近似值
+REAGGREGATE = {
+    "AVG": "AVG",
+    "SUM": "SUM",
+    "COUNT": "SUM",
+    "MAX": "MAX",
+    "MIN": "MIN",
+    "FIRST": "FIRST",
+    "LAST": "LAST",
+}
+
+# 汇总的定义：源表、时间窗口、聚合的字段（None为所有数值字段）、聚合函数
+Rollup = namedtuple("Rollup", ["source", "interval", "columns", "aggregate"])
+
+
+def duration_ms(value) -> int:
+    """时间长度转换为毫秒数，如"10m"为600000，整数即为毫秒数。"""
+    if isinstance(value, int):
+        return value
+    value = str(value).strip()
+    assert len(value) > 1 and value[:-1].isdigit() and value[-1] in DURATION_UNITS, f"不支持的时间长度：{value}！"
+    return int(value[:-1]) * DURATION_UNITS[value[-1]]
+
+
+def target_name(rollup: Rollup) -> str:
+    """汇总表的表名，如realtime_data_10m。"""
+    return f"{rollup.source}_{rollup.interval}"
+
+
+def stream_name(rollup: Rollup) -> str:
+    """流计算的名称，如realtime_data_10m_stream。"""
+    return f"{target_name(rollup)}_stream"
+
+
+class RollupManager(object):
+    """降采样汇总的管理器。
+
+    Arguments:
+        pool: TDenginePool连接池，每个操作借用一次连接。
+        watermark: 流计算等待乱序数据的时间，窗口结束后再等待该时间才计算。
+        refresh: 已创建的汇总表列表的缓存时间，单位为秒，query()根据该列表选择汇总表。
+    """
+    def __init__(self, pool, watermark: str = "1m", refresh: float = 60) -> None:
+        self._pool = pool
+        self._watermark = watermark
+        self._refresh = refresh
+        self._rollups = []
+        self._lock = threading.Lock()
+        self._available = None      # (已创建的汇总表名集合, 查询时间)
+
+    @property
+    def rollups(self) -> list:
+        """已登记的汇总。"""
+        return list(self._rollups)
+
+    def register(self, source: str, interval, columns: list = None, aggregate: str = "AVG") -> Rollup:
+        """登记一个汇总，只是声明，需要调用create()才会在数据库中创建。
+
+        Arguments:
+            source: 源表名。
+            interval: 时间窗口，如"10m"、"2h"、"1d"。
+            columns: 聚合的字段，为None时为源表的所有数值字段。
+            aggregate: 聚合函数，REAGGREGATE中的函数之一，如"AVG"、"FIRST"。
+        Returns:
+            登记的汇总。
+        """
+        assert source, "源表名不能为空！"
+        assert aggregate.upper() in REAGGREGATE, f"不支持的聚合函数：{aggregate}！只能是{tuple(REAGGREGATE)}"
+        interval = TDengineDB._duration(interval)
+        duration_ms(interval)
+
+        rollup = Rollup(source, interval, tuple(columns) if columns else None, aggregate.upper())
+        with self._lock:
+            self._rollups = [r for r in self._rollups if target_name(r) != target_name(rollup)] + [rollup]
+        return rollup
+
+    def _select(self, rollups: list) -> list:
+        """要操作的汇总，为None时为所有已登记的汇总。"""
+        if rollups is None:
+            return self.rollups
+        return [rollups] if isinstance(rollups, Rollup) else list(rollups)
+
+    def _stream_sql(self, db, rollup: Rollup, start=None) -> str:
+        """创建流计算的SQL语句，start为重新计算历史数据的起始时间。"""
+        select_cols = list(rollup.columns) if rollup.columns else self._numeric_columns(db, rollup.source)
+        columns = db._window_cols(rollup.source, select_cols, rollup.aggregate, False)
+        sql = (f"CREATE STREAM IF NOT EXISTS {stream_name(rollup)} TRIGGER WINDOW_CLOSE "
+               f"WATERMARK {self._watermark} FILL_HISTORY 1 IGNORE EXPIRED 0 "
+               f"INTO {db._database}.{target_name(rollup)} "
+               f"AS SELECT {','.join(columns)} FROM {db._database}.{rollup.source}")
+        if start is not None:
+            sql += f" WHERE ts >= {TDengineDB._sql_value(start)}"
+        return sql + f" INTERVAL({rollup.interval})"
+
+    @staticmethod
+    def _numeric_columns(db, table_name: str) -> list:
+        """表的所有数值字段。"""
+        structure = db.describe(table_name) or []
+        return [col[0] for col in structure
+                if col[1] not in ("TIMESTAMP", "BINARY", "VARCHAR", "NCHAR", "JSON", "VARBINARY", "GEOMETRY")
+                and (len(col) < 4 or col[3] != "TAG")]
+
+    def _execute(self, db, sql: str) -> bool:
+        """执行DDL语句，失败时记录日志并返回False。"""
+        try:
+            logger.info(sql)
+            with db._track(sql):
+                db._cursor.execute(sql)
+        except Exception:
+            logger.error(traceback.format_exc())
+            return False
+        return True
+
+    def create(self, rollups=None, start=None) -> bool:
+        """创建流计算，流计算已存在时不做任何操作。
+
+        创建时同时计算已有的历史数据，汇总表由流计算自动创建。
+
+        Arguments:
+            rollups: 一个或多个汇总，为None时为所有已登记的汇总。
+            start: 只计算该时间之后的历史数据，如"2024-01-01 00:00:00"，为None时计算所有历史数据。
+        Returns:
+            全部创建成功返回True，否则返回False。
+        """
+        ok = True
+        with self._pool.connection() as db:
+            for rollup in self._select(rollups):
+                ok = self._execute(db, self._stream_sql(db, rollup, start)) and ok
+        self._available = None
+        return ok
+
+    def drop(self, rollups=None, drop_table: bool = False) -> bool:
+        """删除流计算。
+
+        Arguments:
+            rollups: 一个或多个汇总，为None时为所有已登记的汇总。
+            drop_table: 是否同时删除汇总表，默认保留。
+        Returns:
+            全部删除成功返回True，否则返回False。
+        """
+        ok = True
+        with self._pool.connection() as db:
+            for rollup in self._select(rollups):
+                ok = self._execute(db, f"DROP STREAM IF EXISTS {stream_name(rollup)}") and ok
+                if drop_table:
+                    ok = self._execute(db, f"DROP STABLE IF EXISTS {db._database}.{target_name(rollup)}") and ok
+                    db.invalidate_schema(target_name(rollup))
+        self._available = None
+        return ok
+
+    def backfill(self, rollups=None, start=None) -> bool:
+        """重新计算历史数据。
+
+        流计算只在创建时计算一次历史数据，之后只处理新写入的数据（以及水位线内的乱序数据）。
+        导入、修改了历史数据后，删除并重建流计算，从start开始重新计算，汇总表中相同窗口的
+        数据被覆盖。
+
+        Arguments:
+            rollups: 一个或多个汇总，为None时为所有已登记的汇总。
+            start: 重新计算的起始时间，为None时重新计算所有历史数据。
+        Returns:
+            全部成功返回True，否则返回False。
+        """
+        rollups = self._select(rollups)
+        return self.drop(rollups) and self.create(rollups, start)
+
+    def status(self, rollups=None) -> list:
+        """查询汇总的状态。
+
+        Returns:
+            字典列表，每个汇总一个字典：name为汇总表名，source、interval、aggregate同登记的参数，
+            stream为流计算的状态（如"ready"，流计算不存在时为None），latest为汇总表最新的
+            时间戳（汇总表不存在或为空时为None）。
+        """
+        result = []
+        with self._pool.connection(read_only=True) as db:
+            rows = db._query(f"SELECT stream_name, status FROM information_schema.ins_streams "
+                             f"WHERE target_db='{db._database}'", False) or []
+            streams = {row[0]: row[1] for row in rows}
+            available = self._available_targets(db, force=True)
+
+            for rollup in self._select(rollups):
+                latest = None
+                if target_name(rollup) in available:
+                    row = db.latest(target_name(rollup), ["ts"], non_null=True)
+                    latest = row.get("ts") if row else None
+                result.append({
+                    "name": target_name(rollup),
+                    "source": rollup.source,
+                    "interval": rollup.interval,
+                    "aggregate": rollup.aggregate,
+                    "stream": streams.get(stream_name(rollup)),
+                    "latest": latest,
+                })
+        return result
+
+    def _available_targets(self, db, force: bool = False) -> set:
+        """数据库中已存在的汇总表，结果缓存refresh秒。"""
+        with self._lock:
+            if not force and self._available and time.monotonic() - self._available[1] < self._refresh:
+                return self._available[0]
+
+        rows = db._query(f"SELECT stable_name FROM information_schema.ins_stables "
+                         f"WHERE db_name='{db._database}'", False)
+        if rows is None:
+            return set()
+
+        available = {row[0] for row in rows}
+        with self._lock:
+            self._available = (available, time.monotonic())
+        return available
+
+    def choose(self, source: str, resolution, columns: list = None, aggregate: str = None,
+               db=None) -> Rollup:
+        """选择满足查询要求的汇总。
+
+        汇总表必须已存在，窗口不大于且能整除resolution，包含所有要查询的字段，聚合函数与
+        aggregate相同（aggregate为None时不限），满足条件的汇总中选择窗口最大的。
+
+        Arguments:
+            source: 源表名。
+            resolution: 查询要求的分辨率，即结果中相邻两条记录的时间间隔，如"2h"。
+            columns: 要查询的字段，不含ts。
+            aggregate: 聚合函数。
+            db: 查询已存在汇总表时使用的连接，为None时从连接池借用。
+        Returns:
+            选中的汇总，没有满足条件的汇总时返回None。
+        """
+        resolution = duration_ms(resolution)
+        aggregate = aggregate.upper() if aggregate else None
+        candidates = [r for r in self._rollups
+                      if r.source == source
+                      and resolution % duration_ms(r.interval) == 0
+                      and (aggregate is None or r.aggregate == aggregate)
+                      and (r.columns is None or not columns or set(columns) <= set(r.columns))]
+        if not candidates:
+            return None
+
+        if db is None:
+            with self._pool.connection(read_only=True) as db:
+                available = self._available_targets(db)
+        else:
+            available = self._available_targets(db)
+        candidates = [r for r in candidates if target_name(r) in available]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda r: duration_ms(r.interval))
+
+    def query(self, source: str, select_cols: list, conditions: str = None, resolution="10m",
+              aggregate: str = "AVG", **kw) -> (dict | list):
+        """按指定的分辨率查询降采样的数据，自动选择汇总表。
+
+        有满足要求的汇总时（见choose()）查询汇总表：窗口等于分辨率时直接查询，小于分辨率时在
+        汇总表上再做一次窗口聚合（见REAGGREGATE）；否则在源表上做窗口查询。结果都是每个窗口
+        一条记录，ts为窗口的起始时间，按ts升序排列。
+
+        Arguments:
+            source: 源表名。
+            select_cols: 要查询的字段，ts为窗口的起始时间，其他字段为聚合后的值。
+            conditions: 查询条件，一般为时间范围。
+            resolution: 分辨率，即窗口的长度，如"10m"、"2h"。
+            aggregate: 聚合函数。
+            kw: 传给TDengineDB.query()的其他参数，如columnar、epoch_ms、fill。
+        Returns:
+            查询结果，同TDengineDB.query()。
+        """
+        assert source, "源表名不能为空！"
+        columns = [col for col in select_cols or [] if col != "ts"]
+        order = {"order_cols": ["ts"], "order_by": [DBBase.ORDER_ASC]}
+
+        with self._pool.connection(read_only=True) as db:
+            rollup = self.choose(source, resolution, columns, aggregate, db)
+            if rollup is None:
+                return db.query(source, select_cols, conditions=conditions, interval=resolution,
+                                aggregate=aggregate, **order, **kw)
+
+            target = target_name(rollup)
+            if duration_ms(rollup.interval) == duration_ms(resolution) and not kw.get("fill"):
+                return db.query(target, select_cols, conditions=conditions, **order, **kw)
+            return db.query(target, select_cols, conditions=conditions, interval=resolution,
+                            aggregate=REAGGREGATE[rollup.aggregate], **order, **kw)
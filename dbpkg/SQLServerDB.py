@@ -13,12 +13,13 @@ pymssql开发文档：http://www.pymssql.org/。
 2023-11-19    崔树标    测试用例及文档测试。
 2023-11-20    崔树标    v1.0发布。
 2023-12-21    崔树标    增加tables()，has_table()，describe()三个函数。
+2026-10-18    系统      执行的SQL语句记录耗时、记录数等统计信息，见QueryStats。
+2026-10-18    系统      pymssql驱动在第一次连接时才加载。
 """
 
 import inspect
 import logging
 import os
-import pymssql
 
 
 from . import DBBase
@@ -146,6 +147,11 @@ class SQLServerDB(DBBase.DBBase):
         # 连接数据库
         logger.info(f"""host={self._host}, user={self._user}, password={self._password}, database={self._database}""")
 
+        pymssql = DBBase.load_driver("pymssql")
+        if pymssql is None:
+            logger.error("连接SQL Server数据库需要安装pymssql！")
+            return False
+
         try:
             self._connect = pymssql.connect(host=self._host,
                                             user=self._user,
@@ -196,8 +202,9 @@ class SQLServerDB(DBBase.DBBase):
         try:
             # 执行SQL语句，创建表
             logger.debug(sql)
-            self._cursor.execute(sql)
-            self._connect.commit()
+            with self._track(sql):
+                self._cursor.execute(sql)
+                self._connect.commit()
         except Exception as e:
             logger.error(e)
             return False
@@ -220,8 +227,9 @@ class SQLServerDB(DBBase.DBBase):
         try:
             # 执行SQL语句，删除表
             logger.debug(sql)
-            self._cursor.execute(sql)
-            self._connect.commit()
+            with self._track(sql):
+                self._cursor.execute(sql)
+                self._connect.commit()
         except Exception as e:
             logger.error(e)
             return False
@@ -251,12 +259,15 @@ class SQLServerDB(DBBase.DBBase):
         try:
             # 执行SQL语句
             logger.debug(sql)
-            self._cursor.execute(sql)
+            with self._track(sql) as t:
+                self._cursor.execute(sql)
+                rows = self._cursor.fetchall()
+                t.result(rows)
         except Exception as e:
             logger.error(e)
             return None
 
-        return [list(table.values())[0] for table in self._cursor.fetchall()]
+        return [list(table.values())[0] for table in rows]
 
     def has_table(self, table_name: str) -> bool:
         """判断数据库中是否存在指定的表。
@@ -296,12 +307,15 @@ class SQLServerDB(DBBase.DBBase):
         try:
             # 执行SQL语句
             logger.debug(sql)
-            self._cursor.execute(sql)
+            with self._track(sql) as t:
+                self._cursor.execute(sql)
+                rows = self._cursor.fetchall()
+                t.result(rows)
         except Exception as e:
             logger.error(e)
             return None
 
-        return self._cursor.fetchall()
+        return rows
 
     def execute(self, sql: str) -> (dict | list | bool):
         """执行SQL语句。
@@ -319,11 +333,13 @@ class SQLServerDB(DBBase.DBBase):
         try:
             # 执行SQL语句
             logger.debug(sql)
-            self._cursor.execute(sql)
-            command = sql[:6].upper()
-            if command != "SELECT":
-                # 提交到数据库执行
-                self._connect.commit()
+            with self._track(sql) as t:
+                self._cursor.execute(sql)
+                command = sql[:6].upper()
+                if command != "SELECT":
+                    # 提交到数据库执行
+                    self._connect.commit()
+                    t.result(self._cursor.rowcount)
         except Exception as e:
             # 发生错误时回滚
             self._connect.rollback()
@@ -394,11 +410,15 @@ class SQLServerDB(DBBase.DBBase):
         try:
             # 执行SQL语句
             logger.debug(sql)
-            self._cursor.execute(sql)
-            if fetch_type < 0:
-                return self._cursor.fetchone()
-            else:
-                return self._cursor.fetchall()
+            with self._track(sql) as t:
+                self._cursor.execute(sql)
+                if fetch_type < 0:
+                    result = self._cursor.fetchone()
+                    t.result([result] if result else None)
+                else:
+                    result = self._cursor.fetchall()
+                    t.result(result)
+            return result
         except Exception as e:
             logger.error(e)
 
@@ -446,9 +466,11 @@ class SQLServerDB(DBBase.DBBase):
             try:
                 # 执行SQL语句
                 logger.debug(sql)
-                self._cursor.execute(sql)
-                # 提交到数据库执行
-                self._connect.commit()
+                with self._track(sql) as t:
+                    self._cursor.execute(sql)
+                    # 提交到数据库执行
+                    self._connect.commit()
+                    t.result(self._cursor.rowcount)
             except Exception as e:
                 # 发生错误时回滚
                 self._connect.rollback()
@@ -481,9 +503,11 @@ class SQLServerDB(DBBase.DBBase):
         try:
             # 执行SQL语句
             logger.debug(sql)
-            self._cursor.execute(sql)
-            # 提交到数据库执行
-            self._connect.commit()
+            with self._track(sql) as t:
+                self._cursor.execute(sql)
+                # 提交到数据库执行
+                self._connect.commit()
+                t.result(self._cursor.rowcount)
         except Exception as e:
             # 发生错误时回滚
             self._connect.rollback()
@@ -523,9 +547,11 @@ class SQLServerDB(DBBase.DBBase):
         try:
             # 执行SQL语句
             logger.debug(sql)
-            self._cursor.execute(sql)
-            # 提交到数据库执行
-            self._connect.commit()
+            with self._track(sql) as t:
+                self._cursor.execute(sql)
+                # 提交到数据库执行
+                self._connect.commit()
+                t.result(self._cursor.rowcount)
         except Exception as e:
             # 发生错误时回滚
             self._connect.rollback()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+数据库表结构的元数据缓存，缓存表名列表、每张表的字段信息及数据库的选项（时间戳精度、
+缓存模式等），减少SHOW TABLES、DESCRIBE的查询次数。
+
+缓存按数据库（host、port、database）区分，同一进程内连接同一个数据库的所有连接共用一份
+缓存。缓存条目超过有效期（ttl）后自动失效，也可以调用invalidate()主动失效，如建表、删表
+之后。
+
+Examples:
+    >>> cache = get_cache("192.168.3.92", 6041, "beihu_dt", ttl=60)
+    >>> cache.set_tables(["realtime_data", "system_parameters"])
+    >>> cache.has_table("realtime_data")
+    True
+    >>> cache.invalidate()
+    >>> cache.has_table("realtime_data") is None
+    True
+
+历史记录（按照以下格式依次添加）：
+   日期        人员	      改动情况
+2026-10-18    系统      创建。
+2026-10-18    系统      缓存数据库的时间戳精度。
+2026-10-18    系统      时间戳精度改为通用的数据库选项缓存，增加缓存模式（CACHEMODEL）。
+"""
+
+import threading
+import time
+
+# 进程内的元数据缓存，以(host, port, database)作为键
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+class SchemaCache(object):
+    """单个数据库的元数据缓存。
+
+    Arguments:
+        ttl: 缓存的有效期，单位为秒，为0时不缓存。
+    """
+    def __init__(self, ttl: float = 60) -> None:
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._tables = None         # (表名列表, 表名集合, 缓存时间)
+        self._columns = {}          # 表名 -> (字段信息列表, 缓存时间)
+        self._options = {}          # 数据库的选项，如时间戳精度、缓存模式，不会过期
+
+    @property
+    def ttl(self) -> float:
+        return self._ttl
+
+    @ttl.setter
+    def ttl(self, ttl: float) -> None:
+        self._ttl = ttl
+
+    def _fresh(self, cached_at: float) -> bool:
+        return time.monotonic() - cached_at < self._ttl
+
+    def tables(self) -> list:
+        """返回缓存的表名列表，缓存不存在或已失效时返回None。"""
+        with self._lock:
+            if self._tables and self._fresh(self._tables[2]):
+                return list(self._tables[0])
+        return None
+
+    def has_table(self, table_name: str) -> bool:
+        """判断表是否存在，缓存不存在或已失效时返回None，由调用者查询数据库。"""
+        with self._lock:
+            if self._tables and self._fresh(self._tables[2]):
+                return table_name in self._tables[1]
+        return None
+
+    def set_tables(self, table_names: list) -> None:
+        """缓存表名列表。"""
+        if self._ttl <= 0:
+            return
+        with self._lock:
+            self._tables = (tuple(table_names), frozenset(table_names), time.monotonic())
+
+    def describe(self, table_name: str) -> list:
+        """返回缓存的表结构，即每个字段的(名称, 类型, 长度, 备注)，缓存不存在或已失效时返回None。"""
+        with self._lock:
+            cached = self._columns.get(table_name)
+            if cached and self._fresh(cached[1]):
+                return list(cached[0])
+        return None
+
+    def set_describe(self, table_name: str, columns: list) -> None:
+        """缓存表结构。"""
+        if self._ttl <= 0:
+            return
+        with self._lock:
+            self._columns[table_name] = (tuple(columns), time.monotonic())
+
+    def option(self, name: str):
+        """返回缓存的数据库选项，如precision、cachemodel，未缓存时返回None。"""
+        return self._options.get(name)
+
+    def set_option(self, name: str, value) -> None:
+        """缓存数据库选项。时间戳精度在创建数据库后不能修改，其他选项由修改者负责更新缓存。"""
+        self._options[name] = value
+
+    def invalidate(self, table_name: str = None) -> None:
+        """使缓存失效。
+
+        Arguments:
+            table_name: 表名，指定时只失效该表的表结构及表名列表，否则清空所有缓存。
+        """
+        with self._lock:
+            self._tables = None
+            if table_name:
+                self._columns.pop(table_name, None)
+            else:
+                self._columns.clear()
+
+
+def get_cache(host: str, port: int, database: str, ttl: float = 60) -> SchemaCache:
+    """获取指定数据库的元数据缓存，不存在时创建，有效期以第一次调用为准。"""
+    key = (host, port, database)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = SchemaCache(ttl)
+            _caches[key] = cache
+        return cache
+
+
+def invalidate_all() -> None:
+    """清空进程内所有数据库的元数据缓存。"""
+    with _caches_lock:
+        caches = list(_caches.values())
+    for cache in caches:
+        cache.invalidate()
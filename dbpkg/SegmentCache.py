@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+时间序列查询的分段缓存，缓存(表, 字段, 时间范围)查询的列式结果。
+
+时间轴按固定长度（segment）切分为若干段，每一段的查询结果单独缓存。查询一个时间范围时，
+只从数据库读取缓存中没有的段（相邻的缺失段合并为一次查询），再与缓存中的段拼接。操作员
+在历史曲线、数据清洗页面中来回拖动同一天的数据时，只有第一次需要访问数据库。
+
+已经结束的段（段的结束时间早于当前时间settle秒以上）视为不会再变化，一直有效；已经结束但没有
+数据的段（数据缺失的时间段）缓存empty_ttl秒，过期后重新查询一次（数据可能稍后才写入，如重新
+清洗）；包含当前时间的段（open segment）缓存open_ttl秒，过期后只读取最后一条缓存记录之后的
+新数据（增量读取）并追加到该段。缓存按最近最少使用（LRU）淘汰，占用的内存不超过max_bytes。
+历史数据被修改（如重新清洗、导入）后，调用invalidate()使相应的缓存失效；由其他进程写入的
+数据无法通知本进程，晚于settle秒写入的数据要等到缓存被淘汰后才能看到，应按实际情况设置settle。
+
+Examples:
+    >>> cache = SegmentCache(get_pool(**DB_CONFIG), segment="1h", max_bytes=256 * 2 ** 20)
+    >>> result = cache.query("realtime_data", ["influent_tol_q_rd"], "2024-01-01 00:00:00", "2024-01-02 00:00:00")
+    >>> result["ts"], result["influent_tol_q_rd"]
+
+历史记录（按照以下格式依次添加）：
+   日期        人员	      改动情况
+2026-10-18    系统      创建。
+2026-10-18    系统      已结束但没有数据的段缓存empty_ttl秒，不再每次查询都访问数据库。
+"""
+
+import logging
+import numbers
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from . import DBBase
+from .columnar import load_numpy
+from .RollupManager import duration_ms
+logger = logging.getLogger("DigitalTwinApp")
+
+# 估算object数组（字符串等）每个元素占用的内存
+OBJECT_ITEM_BYTES = 64
+
+
+def to_ms(value) -> int:
+    """时间转换为毫秒时间戳，可以是毫秒数、datetime对象或"YYYY-MM-DD HH:MM:SS"格式的本地时间。"""
+    if isinstance(value, numbers.Integral):    # 包括NumPy的整数
+        return int(value)
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(str(value).strip())
+    return int(value.timestamp() * 1000)
+
+
+def _nbytes(columns: dict) -> int:
+    """估算列式结果占用的内存。"""
+    np = load_numpy()
+    total = 0
+    for column in columns.values():
+        total += np.ma.getdata(column).nbytes
+        if np.ma.isMaskedArray(column):
+            total += np.ma.getmaskarray(column).nbytes
+        if column.dtype.kind == "O":
+            total += len(column) * OBJECT_ITEM_BYTES
+    return total
+
+
+def _concatenate(parts: list) -> dict:
+    """按字段拼接多个列式结果，空的结果不参与拼接（其数组类型不确定）。"""
+    np = load_numpy()
+    parts = [part for part in parts if len(part["ts"])]
+    if not parts:
+        return None
+    if len(parts) == 1:     # 复制，调用者修改结果不影响缓存
+        return {col: values.copy() for col, values in parts[0].items()}
+    result = {}
+    for col in parts[0]:
+        arrays = [part[col] for part in parts]
+        if any(np.ma.isMaskedArray(a) for a in arrays):
+            result[col] = np.ma.concatenate(arrays)
+        else:
+            result[col] = np.concatenate(arrays)
+    return result
+
+
+class _Segment(object):
+    """一段的缓存。"""
+    __slots__ = ("columns", "nbytes", "closed", "fetched_at")
+
+    def __init__(self, columns: dict, closed: bool) -> None:
+        self.columns = columns
+        self.nbytes = _nbytes(columns)
+        self.closed = closed                    # 已结束的段不再刷新
+        self.fetched_at = time.monotonic()
+
+
+class SegmentCache(object):
+    """时间序列查询的分段缓存。
+
+    Arguments:
+        pool: TDenginePool连接池，读取缺失的段时借用连接。
+        segment: 每一段的时间长度，如"1h"，或毫秒数。
+        max_bytes: 缓存占用内存的上限（字节）。
+        open_ttl: 包含当前时间的段的缓存时间，单位为秒，过期后增量读取新数据。
+        settle: 段结束后仍可能写入迟到数据的时间，单位为秒，之后有数据的段不再刷新。
+        empty_ttl: 已结束但没有数据的段的缓存时间，单位为秒，过期后重新查询。
+    """
+    def __init__(self, pool, segment="1h", max_bytes: int = 256 * 2 ** 20, open_ttl: float = 5,
+                 settle: float = 60, empty_ttl: float = 300) -> None:
+        load_numpy()    # 分段缓存需要numpy，未安装时抛出ImportError
+
+        self._pool = pool
+        self._segment = duration_ms(segment)
+        self._max_bytes = max_bytes
+        self._open_ttl = open_ttl
+        self._settle = settle * 1000
+        self._empty_ttl = empty_ttl
+        self._lock = threading.Lock()
+        self._segments = OrderedDict()      # (表名, 字段, 条件, 段起始时间) -> _Segment，按最近使用排序
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def nbytes(self) -> int:
+        """缓存占用的内存（估算值）。"""
+        return self._bytes
+
+    def stats(self) -> dict:
+        """缓存的统计信息：段数、内存、命中及未命中的段数。"""
+        return {"segments": len(self._segments), "bytes": self._bytes, "hits": self._hits, "misses": self._misses}
+
+    def query(self, table_name: str, columns: list, start, end, conditions: str = None) -> dict:
+        """查询[start, end)时间范围内的数据，按ts升序排列。
+
+        Arguments:
+            table_name: 表名。
+            columns: 要查询的字段，不含ts，只能是字段名，不能是表达式。
+            start: 起始时间（包含），毫秒数、datetime对象或"YYYY-MM-DD HH:MM:SS"格式的本地时间。
+            end: 结束时间（不包含），格式同start。
+            conditions: 时间范围之外的其他查询条件，如"TIMEDIFF(...) % 10 = 0"，作为缓存键的一部分。
+        Returns:
+            列式结果，即"字段名 -> NumPy数组"的字典，ts为毫秒时间戳，同TDengineDB.query(columnar=True,
+            epoch_ms=True)；查询失败时返回None。
+        """
+        np = load_numpy()
+        assert table_name, "表名不能为空！"
+        start, end = to_ms(start), to_ms(end)
+        columns = tuple(col for col in columns if col != "ts")
+        if start >= end:
+            return {col: np.empty(0) for col in ("ts",) + columns}
+
+        base = (table_name, columns, conditions or "")
+        starts = list(range(start // self._segment * self._segment, end, self._segment))
+        now = time.time() * 1000
+
+        # 找出缓存中没有的段，以及需要增量刷新的未结束的段
+        cached, missing, stale = {}, [], []
+        with self._lock:
+            for seg_start in starts:
+                entry = self._segments.get(base + (seg_start,))
+                if entry is None:
+                    missing.append(seg_start)
+                    continue
+                self._segments.move_to_end(base + (seg_start,))
+                cached[seg_start] = entry
+                if self._is_stale(entry, seg_start, now):
+                    stale.append(seg_start)
+            self._hits += len(starts) - len(missing)
+            self._misses += len(missing)
+
+        # 相邻的缺失段合并为一次查询
+        runs = []
+        for seg_start in missing:
+            if runs and runs[-1][1] == seg_start:
+                runs[-1][1] = seg_start + self._segment
+            else:
+                runs.append([seg_start, seg_start + self._segment])
+
+        if runs or stale:
+            with self._pool.connection(read_only=True) as db:
+                if not self._fetch_segments(db, base, runs, stale, cached, now):
+                    return None
+
+        result = _concatenate([cached[seg_start].columns for seg_start in starts])
+        if result is None:
+            return {col: np.empty(0) for col in ("ts",) + columns}
+
+        # 去掉第一段、最后一段中超出时间范围的数据
+        ts = result["ts"]
+        lo, hi = np.searchsorted(ts, start), np.searchsorted(ts, end)
+        return {col: values[lo:hi] for col, values in result.items()}
+
+    def _is_stale(self, entry: _Segment, seg_start: int, now: float) -> bool:
+        """缓存的段是否需要刷新：未结束的段缓存open_ttl秒；有数据的段结束后再增量读取一次，之后
+        不再刷新；已结束但没有数据的段缓存empty_ttl秒。"""
+        if entry.closed:
+            return False
+        age = time.monotonic() - entry.fetched_at
+        if now < seg_start + self._segment + self._settle:
+            return age >= self._open_ttl
+        if len(entry.columns["ts"]):
+            return True
+        return age >= self._empty_ttl
+
+    def _fetch_segments(self, db, base: tuple, runs: list, stale: list, cached: dict, now: float) -> bool:
+        """读取缺失的段（runs为合并后的时间范围），增量刷新未结束的段，结果存入cached。"""
+        for run_start, run_end in runs:
+            result = self._fetch(db, base, run_start, run_end)
+            if result is None:
+                return False
+            for seg_start in range(run_start, run_end, self._segment):
+                cached[seg_start] = self._store(base, seg_start, self._slice(result, seg_start), now)
+
+        for seg_start in stale:
+            entry = cached[seg_start]
+            last = int(entry.columns["ts"][-1]) + 1 if len(entry.columns["ts"]) else seg_start
+            delta = self._fetch(db, base, last, seg_start + self._segment)
+            if delta is None:
+                return False
+            merged = _concatenate([entry.columns, delta]) or entry.columns
+            cached[seg_start] = self._store(base, seg_start, merged, now)
+        return True
+
+    def _fetch(self, db, base: tuple, start: int, end: int) -> dict:
+        """从数据库读取[start, end)时间范围内的数据。"""
+        table_name, columns, conditions = base
+        where = f"ts >= {start} AND ts < {end}"
+        if conditions:
+            where += f" AND ({conditions})"
+        return db.query(table_name, ["ts"] + list(columns), conditions=where, order_cols=["ts"],
+                        order_by=[DBBase.ORDER_ASC], columnar=True, epoch_ms=True)
+
+    def _slice(self, result: dict, seg_start: int) -> dict:
+        """从一次查询的结果中取出一段，复制数据，缓存不引用整个查询结果。"""
+        np = load_numpy()
+        ts = result["ts"]
+        lo = np.searchsorted(ts, seg_start)
+        hi = np.searchsorted(ts, seg_start + self._segment)
+        return {col: values[lo:hi].copy() for col, values in result.items()}
+
+    def _store(self, base: tuple, seg_start: int, columns: dict, now: float) -> _Segment:
+        """缓存一段，超过内存上限时淘汰最近最少使用的段。没有数据的段不标记为已结束，见_is_stale()。"""
+        entry = _Segment(columns, len(columns["ts"]) > 0 and now >= seg_start + self._segment + self._settle)
+        key = base + (seg_start,)
+        with self._lock:
+            old = self._segments.pop(key, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            self._segments[key] = entry
+            self._bytes += entry.nbytes
+            while self._bytes > self._max_bytes and len(self._segments) > 1:
+                _, evicted = self._segments.popitem(last=False)
+                self._bytes -= evicted.nbytes
+        return entry
+
+    def invalidate(self, table_name: str = None, start=None, end=None) -> None:
+        """使缓存失效。
+
+        Arguments:
+            table_name: 表名，为None时清空所有缓存。
+            start: 起始时间，指定时只失效与[start, end)重叠的段，格式同query()。
+            end: 结束时间，为None时到最后。
+        """
+        start = to_ms(start) if start is not None else None
+        end = to_ms(end) if end is not None else None
+        with self._lock:
+            for key in list(self._segments):
+                if table_name and key[0] != table_name:
+                    continue
+                if start is not None and key[3] + self._segment <= start:
+                    continue
+                if end is not None and key[3] >= end:
+                    continue
+                self._bytes -= self._segments.pop(key).nbytes
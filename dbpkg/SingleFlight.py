@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+相同查询的合并执行（single-flight）。
+
+多个线程同时执行完全相同的查询时（如每个浏览器标签页每5秒查询一次realtime_data的最新
+记录），只有第一个线程（leader）真正访问数据库，其他线程（follower）等待并共用它的结果。
+还可以指定一个很短的时间窗口（window），查询完成后window秒内到来的相同查询直接使用该结果，
+这样一百个客户端在每个刷新周期内大约只产生一次数据库查询。
+
+共用的结果是可变对象（列表、字典），为了避免一个调用者修改结果影响其他调用者，follower
+得到的是结果的副本（列表及其中的字典、列表行，列式结果的数组都会复制；元组行不可修改，直接共用）。
+本进程内有写操作（插入、删除、修改）时调用invalidate()，之前缓存的结果不再被使用。
+
+Examples:
+    >>> rows = do(("beihu_dt", sql), lambda: db._query(sql), window=1.0)
+
+历史记录（按照以下格式依次添加）：
+   日期        人员	      改动情况
+2026-10-18    系统      创建。
+2026-10-18    系统      复制结果时同时复制列表行。
+"""
+
+import threading
+import time
+
+_lock = threading.Lock()
+_flights = {}           # 键 -> _Flight，正在执行或在时间窗口内的查询
+_generation = 0         # 每次写操作加1，之前的结果作废
+
+
+class _Flight(object):
+    """一次查询的执行状态。"""
+    __slots__ = ("done", "result", "shared", "followers", "expires", "generation")
+
+    def __init__(self, generation: int) -> None:
+        self.done = threading.Event()
+        self.result = None
+        self.shared = None          # 供follower复制的结果
+        self.followers = 0
+        self.expires = None         # 结果的过期时间（time.monotonic()），None表示还在执行
+        self.generation = generation
+
+
+def _copy(result):
+    """复制查询结果：字典列表、行列表（每行为列表或元组）或列式结果（字段名 -> NumPy数组）。"""
+    if isinstance(result, list):
+        return [dict(row) if isinstance(row, dict) else list(row) if isinstance(row, list) else row
+                for row in result]
+    if isinstance(result, dict):
+        return {key: value.copy() if hasattr(value, "copy") else value for key, value in result.items()}
+    return result
+
+
+def do(key, func, window: float = 0):
+    """执行func()，同一个key正在执行或在时间窗口内时共用其结果。
+
+    Arguments:
+        key: 查询的标识，如(host, port, database, sql, ...)。
+        func: 真正执行查询的函数，返回查询结果，失败时返回None。
+        window: 查询完成后，结果可以被相同查询共用的时间（秒），为0时只合并同时执行的查询。
+    Returns:
+        查询结果，失败时返回None（失败的结果不会在时间窗口内共用）。
+    """
+    with _lock:
+        flight = _flights.get(key)
+        if flight is not None and flight.generation == _generation and \
+                (flight.expires is None or time.monotonic() < flight.expires):
+            flight.followers += 1
+            leader = False
+        else:
+            flight = _Flight(_generation)
+            _flights[key] = flight
+            leader = True
+
+    if not leader:
+        flight.done.wait()
+        return _copy(flight.shared)
+
+    try:
+        result = func()
+    except BaseException:
+        with _lock:
+            if _flights.get(key) is flight:
+                del _flights[key]
+        flight.done.set()       # follower得到None
+        raise
+
+    with _lock:
+        # 有follower或需要在时间窗口内共用时，保存一份副本，leader直接返回原始结果
+        if flight.followers or (window > 0 and result is not None):
+            flight.shared = _copy(result)
+        if window > 0 and result is not None and flight.generation == _generation:
+            flight.expires = time.monotonic() + window
+        elif _flights.get(key) is flight:
+            del _flights[key]
+    flight.done.set()
+
+    # 顺便清理过期的结果，避免不同的查询越积越多
+    if window > 0:
+        _purge()
+    return result
+
+
+def _purge() -> None:
+    """删除时间窗口已过的结果。"""
+    now = time.monotonic()
+    with _lock:
+        expired = [key for key, flight in _flights.items() if flight.expires is not None and now >= flight.expires]
+        for key in expired:
+            del _flights[key]
+
+
+def invalidate() -> None:
+    """本进程内有写操作时调用，时间窗口内的结果不再共用，正在执行的查询不受影响。"""
+    global _generation
+    with _lock:
+        _generation += 1
+        for key in [key for key, flight in _flights.items() if flight.expires is not None]:
+            del _flights[key]
@@ -9,18 +9,95 @@ TDengine开发文档：https://docs.taosdata.com/。
 历史记录（按照以下格式依次添加）：
    日期        人员	      改动情况
 2023-12-11    崔树标    创建。
+2026-10-18    系统      执行的SQL语句记录耗时、记录数等统计信息，见QueryStats。
+2026-10-18    系统      增加epoch_ms选项，时间戳以整数的毫秒时间戳返回，不再构造datetime对象。
+2026-10-18    系统      query()支持INTERVAL窗口查询（降采样），由数据库按时间窗口聚合。
+2026-10-18    系统      增加latest()，用LAST_ROW()/LAST()查询最新的记录，可以设置数据库的缓存模式。
+2026-10-18    系统      支持超级表：创建超级表、子表，写入时自动建子表，按标签过滤及PARTITION BY查询。
+2026-10-18    系统      taos、taosrest、taosws驱动在第一次连接时才加载，只加载所用连接方式的驱动。
+2026-10-18    系统      connect_default()从缓存的配置文件读取连接参数，配置文件修改后自动生效。
+2026-10-18    系统      导入时不再加载numpy，第一次使用列式结果时才导入。
+2026-10-18    系统      相同查询的合并执行（single_flight）默认关闭，需要时在connect()中打开。
+2026-10-18    系统      线程安全模式下affected_rows按线程保存，与游标一致。
 """
 
+import base64
 import logging
+import numbers
+import re
+import threading
 import traceback
-import taos
-import taosrest
-from .settings import DATABASES
+import urllib.parse
+import urllib.request
+import weakref
+from datetime import datetime
+from . import settings
 
 
 from . import DBBase
+from . import SchemaCache
+from . import SingleFlight
+from .columnar import is_array, load_numpy, to_columns, to_list
 logger = logging.getLogger("DigitalTwinApp")
 
+# 批量插入时，每条INSERT语句的最大记录数及最大长度（字节），TDengine的SQL语句最长为1MB
+INSERT_MAX_ROWS = 5000
+INSERT_MAX_SQL_LENGTH = 1000000
+
+# 参数绑定（STMT）写入时，TDengine字段类型对应的taos.TaosMultiBind绑定函数
+STMT_BIND_METHODS = {
+    "TIMESTAMP": "timestamp",
+    "BOOL": "bool",
+    "TINYINT": "tinyint",
+    "SMALLINT": "smallint",
+    "INT": "int",
+    "BIGINT": "bigint",
+    "TINYINT UNSIGNED": "tinyint_unsigned",
+    "SMALLINT UNSIGNED": "smallint_unsigned",
+    "INT UNSIGNED": "int_unsigned",
+    "BIGINT UNSIGNED": "bigint_unsigned",
+    "FLOAT": "float",
+    "DOUBLE": "double",
+    "BINARY": "binary",
+    "VARCHAR": "binary",
+    "NCHAR": "nchar",
+}
+
+# 可以直接下推给DELETE语句的时间戳过滤条件，如 ts >= '2024-01-01 00:00:00'、ts < 1704067200000
+TS_CONDITION = re.compile(r"^\(?\s*ts\s*(>=|<=|=|>|<)\s*('[^']*'|\d+)\s*\)?$", re.IGNORECASE)
+
+# 数据库时间戳精度对应的整数时间戳转换为毫秒的除数
+EPOCH_MS_DIVISORS = {
+    "ms": 1,
+    "us": 1000,
+    "ns": 1000000,
+}
+
+# 数据库的缓存模式（CACHEMODEL），last_row缓存LAST_ROW()的结果，last_value缓存LAST()的结果
+CACHE_MODELS = ("none", "last_row", "last_value", "both")
+
+# 窗口查询（INTERVAL）支持的填充方式
+FILL_MODES = ("NONE", "NULL", "NULL_F", "VALUE", "VALUE_F", "PREV", "NEXT", "LINEAR")
+
+# 时间长度，如10m、1h，单位为a（毫秒）、s、m、h、d、w等
+DURATION = re.compile(r"^\d+[abusmhdwny]$")
+
+# 无模式写入时，时间戳精度与原生连接的taos.SmlPrecision的对应关系
+SML_PRECISIONS = {
+    "s": "SECONDS",
+    "ms": "MILLI_SECONDS",
+    "us": "MICRO_SECONDS",
+    "ns": "NANO_SECONDS",
+}
+
+# 通过taosAdapter的InfluxDB接口写入时，时间戳精度对应的precision参数（微秒为u，不是us）
+INFLUXDB_PRECISIONS = {
+    "s": "s",
+    "ms": "ms",
+    "us": "u",
+    "ns": "ns",
+}
+
 class TDengineDB(DBBase.DBBase):
     """封装TDengine库，对外提供统一的标准化接口。
 
@@ -206,8 +283,76 @@ class TDengineDB(DBBase.DBBase):
         >>> db.close()
     """
     def __init__(self, **kw) -> None:
+        # 线程安全模式下，每个线程使用自己的游标，游标在该线程第一次访问时创建
+        self._thread_safe = False
+        self._local = threading.local()
+        self._thread_cursors = weakref.WeakSet()
+        self._cursors_lock = threading.Lock()
+        self._main_cursor = None
+        self._schema_cache = None       # 表名及表结构的元数据缓存，连接数据库后设置
+        self._insert_max_rows = INSERT_MAX_ROWS
+        self._insert_max_sql_length = INSERT_MAX_SQL_LENGTH
+        self._shared_affected_rows = 0  # 非线程安全模式下最近一次delete()删除的记录数
+        self._single_flight = False     # 相同的查询合并执行
+        self._single_flight_window = 0  # 查询完成后，结果可以被相同查询共用的时间（秒）
         super(TDengineDB, self).__init__(**kw)
 
+    @property
+    def _cursor(self):
+        """数据库游标。
+
+        线程安全模式下返回当前线程专属的游标，多个线程可以同时通过同一个TDengineDB对象
+        执行查询，而不会互相干扰execute()/fetchall()的结果。
+        """
+        if not self._thread_safe or self._main_cursor is None:
+            return self._main_cursor
+
+        cursor = getattr(self._local, "cursor", None)
+        if cursor is None:
+            cursor = self._connect.cursor()
+            self._local.cursor = cursor
+            with self._cursors_lock:
+                self._thread_cursors.add(cursor)
+        return cursor
+
+    @_cursor.setter
+    def _cursor(self, cursor) -> None:
+        self._main_cursor = cursor
+        # 重新连接后，各线程之前创建的游标作废
+        self._local = threading.local()
+
+    @property
+    def _affected_rows(self) -> int:
+        """最近一次delete()删除的记录数，与游标一样按线程保存，线程之间互不影响。"""
+        if not self._thread_safe:
+            return self._shared_affected_rows
+        return getattr(self._local, "affected_rows", 0)
+
+    @_affected_rows.setter
+    def _affected_rows(self, rows: int) -> None:
+        if self._thread_safe:
+            self._local.affected_rows = rows
+        else:
+            self._shared_affected_rows = rows
+
+    def close(self) -> None:
+        """关闭所有游标及数据库。"""
+        with self._cursors_lock:
+            cursors = list(self._thread_cursors)
+            self._thread_cursors = weakref.WeakSet()
+        if self._main_cursor is not None:
+            cursors.append(self._main_cursor)
+        self._cursor = None
+
+        for cursor in cursors:
+            try:
+                cursor.close()
+            except Exception:
+                logger.warning(traceback.format_exc())
+        if self._connect:
+            self._connect.close()
+            self._connect = None
+
     def connect(self, **kw) -> bool:
         """连接数据库。
 
@@ -220,11 +365,29 @@ class TDengineDB(DBBase.DBBase):
             password: 密码，默认值是taosdata。
             database: 数据库名称。
             port: 要连接的数据节点的端口，即serverPort配置，默认值是6030。
-            link_mode: 连接方式，默认为原生连接。
+            link_mode: 连接方式，默认为原生连接（NATIVE_LINK），还可以是REST连接（REST_LINK）或
+                WebSocket连接（WS_LINK）。WebSocket连接与REST连接一样通过taosAdapter访问数据库（端口
+                默认为6041），不需要安装taosc客户端驱动；但它保持一个持久的连接，查询结果以二进制
+                数据块传输，省去了REST连接每次查询都要编码、解析JSON的开销，适合大结果集的查询。
+                需要安装taos-ws-py。
             config: 只用于原生连接，设置客户端配置文件路径。在Windows上默认是C:\\TDengine\\cfg，在Linux/macOS系统上默认是/etc/taos/。
             timezone: 只用于原生连接，设置使用的时区，默认为本地时区。
             timeout: 只用于REST连接，设置HTTP请求超时时间，单位为秒，默认为30秒，一般无需配置。
             as_dict: 查询结果存储方式，True为字典列表，否则为元组列表，默认为字典列表。
+            thread_safe: 线程安全模式，为True时每个线程使用独立的游标，同一个对象可以被多个
+                线程同时使用，默认为False。
+            schema_ttl: 表名及表结构缓存的有效期，单位为秒，默认为60秒，为0时不缓存。连接同一个
+                数据库的所有对象共用一份缓存，有效期以第一次连接时为准。
+            insert_max_rows: insert()批量插入时，每条INSERT语句的最大记录数，默认为5000。
+            insert_max_sql_length: insert()批量插入时，每条INSERT语句的最大长度（字节），默认为1000000。
+            single_flight: 相同的SELECT语句同时执行时（连接同一个数据库的所有对象之间）只查询一次、
+                共用结果，默认为False，见SingleFlight。
+            single_flight_window: 查询完成后，结果可以被相同查询共用的时间，单位为秒，默认为0，即只
+                合并同时执行的查询。适合多个客户端定时轮询同一查询的场景，如设为1秒。
+            epoch_ms: query()、iter_query()查询的TIMESTAMP字段是否以整数的毫秒时间戳返回，默认为
+                False，即由驱动转换为datetime对象。驱动为每个时间戳构造datetime对象的开销很大，只需要
+                时间戳数值（计算、比较、绘图）或者要整列格式化为字符串（columnar.format_ts()）时，
+                建议设为True。
         Returns:
             数据库连接成功时返回True，否则返回False。
         """
@@ -238,6 +401,13 @@ class TDengineDB(DBBase.DBBase):
         self._timezone = kw.get("timezone", "Asia/Shanghai")        # 时区
         self._timeout = kw.get("timeout", 30)                       # HTTP请求超时时间
         self._as_dict = kw.get("as_dict", True)                     # 查询结果存储方式，True为字典列表，否则为元组列表
+        self._thread_safe = kw.get("thread_safe", False)            # 线程安全模式，每个线程使用独立的游标
+        schema_ttl = kw.get("schema_ttl", 60)                       # 元数据缓存的有效期
+        self._insert_max_rows = kw.get("insert_max_rows", INSERT_MAX_ROWS)                  # 每条INSERT语句的最大记录数
+        self._insert_max_sql_length = kw.get("insert_max_sql_length", INSERT_MAX_SQL_LENGTH)  # 每条INSERT语句的最大长度
+        self._single_flight = kw.get("single_flight", False)               # 相同的查询合并执行
+        self._single_flight_window = kw.get("single_flight_window", 0)     # 结果可以被相同查询共用的时间
+        self._epoch_ms = kw.get("epoch_ms", False)                  # 时间戳以整数的毫秒时间戳返回
 
         assert self._host, "请指定数据库服务器的IP地址！"
         assert self._database, "请指定数据库名称！"
@@ -247,6 +417,11 @@ class TDengineDB(DBBase.DBBase):
                      f"port={self._port}, link_mode={self._link_mode}, config={self._config}, timezone={self._timezone}"))
 
         if self._link_mode == DBBase.NATIVE_LINK: # 原生连接
+            taos = DBBase.load_driver("taos")
+            if taos is None:
+                logger.error("原生连接需要安装taospy及TDengine客户端驱动！")
+                return False
+
             try:
                 self._connect: taos.TaosConnection = taos.connect(host=self._host,
                                                                   user=self._user,
@@ -274,6 +449,11 @@ class TDengineDB(DBBase.DBBase):
                 logger.error(f"error message: {e.msg}")
                 return False
         elif self._link_mode == DBBase.REST_LINK:   # REST连接
+            taosrest = DBBase.load_driver("taosrest")
+            if taosrest is None:
+                logger.error("REST连接需要安装taospy！")
+                return False
+
             try:
                 self._connect: taosrest.TaosRestConnection = taosrest.connect(url=f"{self._host}:{self._port}", 
                                                                               user=self._user, 
@@ -300,25 +480,80 @@ class TDengineDB(DBBase.DBBase):
                 logger.error(f"error number: {e.errno}")
                 logger.error(f"error message: {e.msg}")
                 return False
+        elif self._link_mode == DBBase.WS_LINK:     # WebSocket连接
+            taosws = DBBase.load_driver("taosws")
+            if taosws is None:
+                logger.error("WebSocket连接需要安装taos-ws-py！")
+                return False
+
+            try:
+                host = self._host.split("://", 1)[-1]
+                user = urllib.parse.quote(self._user, safe="")
+                password = urllib.parse.quote(self._password, safe="")
+                self._connect = taosws.connect(f"taosws://{user}:{password}@{host}:{self._port}/{self._database}")
+                self._cursor = self._connect.cursor()
+            except Exception as e:
+                logger.error("exception occur")
+                logger.error(f"exception class: {e.__class__.__name__}")
+                logger.error(e)
+                return False
         else:
-            logger.warning(f"不支持的数据库连接方式：{self._link_mode}！只能是{DBBase.NATIVE_LINK}或{DBBase.REST_LINK}")
+            logger.warning(f"不支持的数据库连接方式：{self._link_mode}！只能是{DBBase.NATIVE_LINK}、"
+                           f"{DBBase.REST_LINK}或{DBBase.WS_LINK}")
             return False
 
+        self._schema_cache = SchemaCache.get_cache(self._host, self._port, self._database, schema_ttl)
         logger.info(f"数据库已连接！connect={type(self._connect)}, cursor={type(self._cursor)}")
         return True
 
     def connect_default(self) -> bool:
         """连接默认的数据库。
 
+        连接参数为config.ini中[DatabaseServer]节的配置，见settings.get_database_config()，
+        配置文件修改后，之后的连接使用新的配置。
+
         Arguments:
             无。
         Returns:
             数据库连接成功时返回True，否则返回False。
         """
-        return self.connect(host=DATABASES["default"]["HOST"], 
-                            user=DATABASES["default"]["USER"], 
-                            password=DATABASES["default"]["PASSWORD"], 
-                            database=DATABASES["default"]["NAME"])
+        return self.connect(**settings.get_database_config())
+
+    def ping(self) -> bool:
+        """检查数据库连接是否可用。
+
+        执行一条开销极小的SQL语句（SELECT SERVER_VERSION()），用于连接池在借出连接
+        之前做健康检查。
+
+        Returns:
+            连接可用时返回True，否则返回False。
+        """
+        if not self._connect or not self._cursor:
+            return False
+
+        try:
+            if self._link_mode != DBBase.NATIVE_LINK:   # REST连接、WebSocket连接
+                self._cursor.execute("SELECT SERVER_VERSION()")
+                self._cursor.fetchall()
+            else:    # 原生连接
+                self._connect.query("SELECT SERVER_VERSION()").fetch_all()
+        except Exception:
+            logger.warning(f"数据库连接不可用：{traceback.format_exc()}")
+            return False
+
+        return True
+
+    def invalidate_schema(self, table_name: str = None) -> None:
+        """使表名及表结构的缓存失效。
+
+        在本对象之外修改了表结构（如其他进程建表、删表、修改字段）时，可以调用该函数，
+        下一次tables()、has_table()、describe()会重新查询数据库。
+
+        Arguments:
+            table_name: 表名，指定时只失效该表的表结构，否则清空所有缓存。
+        """
+        if self._schema_cache:
+            self._schema_cache.invalidate(table_name)
 
     def create_table(self, table_name: str, args: list) -> bool:
         """通过输入的list创建一张新表。
@@ -349,14 +584,88 @@ class TDengineDB(DBBase.DBBase):
         try:
             # 执行SQL语句，创建表
             logger.debug(sql)
-            self._cursor.execute(sql)
-            self._connect.commit()
+            with self._track(sql):
+                self._cursor.execute(sql)
+                self._connect.commit()
         except Exception as e:
             logger.error(traceback.format_exc())
             return False
+        finally:
+            self.invalidate_schema(table_name)
+
+        return True
+
+    def create_stable(self, stable_name: str, args: list, tags: list) -> bool:
+        """创建一张超级表。
+
+        超级表是同一类数据采集点的模板，每个采集点（如每个生产线、每个区域）是超级表的一张子表，
+        子表用标签（tag）区分。与把每个采集点的信号展开为宽表的一列相比，查询某个信号在所有
+        采集点的数据时，只需要按标签过滤、分区（PARTITION BY），不需要列出几十上百个字段。
+        如: 创建一张名为aao_cstr的超级表，每个反应池的信号为字段，生产线、区域为标签。
+            create_stable("aao_cstr", ["do FLOAT", "nh4 FLOAT", "no3 FLOAT"], ["train NCHAR(8)", "zone NCHAR(16)"])
+
+        Arguments:
+            stable_name: 超级表名。
+            args: 定义每一列（字段）的名称、数据类型等，同create_table()，自动加入第一列时间戳。
+            tags: 定义每个标签的名称、数据类型，格式同args。
+        Returns:
+            超级表创建成功返回True，否则返回False。
+        """
+        assert stable_name, "超级表名不能为空！"
+        assert len(args), "创建超级表时，至少要定义一个字段！"
+        assert len(tags), "创建超级表时，至少要定义一个标签！"
+        assert self._cursor, "请先调用connect()连接数据库！"
+
+        fields = "ts TIMESTAMP," + ",".join(args)
+        sql = f"CREATE STABLE {self._database}.{stable_name} ({fields}) TAGS ({','.join(tags)})"
+
+        try:
+            logger.debug(sql)
+            with self._track(sql):
+                self._cursor.execute(sql)
+        except Exception:
+            logger.error(traceback.format_exc())
+            return False
+        finally:
+            self.invalidate_schema(stable_name)
+
+        return True
+
+    def create_child_table(self, table_name: str, stable_name: str, tags: dict) -> bool:
+        """以超级表为模板创建一张子表，子表已存在时不做任何操作。
+
+        如：create_child_table("aao_cstr_1_1_front", "aao_cstr", {"train": "1_1", "zone": "front"})
+
+        Arguments:
+            table_name: 子表名。
+            stable_name: 超级表名。
+            tags: 子表的标签值，"标签名 -> 值"的字典。
+        Returns:
+            子表创建成功（或已存在）返回True，否则返回False。
+        """
+        assert table_name, "子表名不能为空！"
+        assert stable_name, "超级表名不能为空！"
+        assert tags, "子表的标签值不能为空！"
+        assert self._cursor, "请先调用connect()连接数据库！"
+
+        sql = f"CREATE TABLE IF NOT EXISTS {self._database}.{table_name}{self._using_sql(stable_name, tags)}"
+        try:
+            logger.debug(sql)
+            with self._track(sql):
+                self._cursor.execute(sql)
+        except Exception:
+            logger.error(traceback.format_exc())
+            return False
+        finally:
+            self.invalidate_schema(table_name)
 
         return True
 
+    def _using_sql(self, stable_name: str, tags: dict) -> str:
+        """拼接子表的USING子句，如 USING db.aao_cstr (train,zone) TAGS ('1_1','front')。"""
+        values = ",".join(self._sql_value(v) for v in tags.values())
+        return f" USING {self._database}.{stable_name} ({','.join(tags)}) TAGS ({values})"
+
     def delete_table(self, table_name: str) -> bool:
         """删除一张表。
 
@@ -373,33 +682,47 @@ class TDengineDB(DBBase.DBBase):
         try:
             # 执行SQL语句，删除表
             logger.debug(sql)
-            self._cursor.execute(sql)
-            self._connect.commit()
+            with self._track(sql):
+                self._cursor.execute(sql)
+                self._connect.commit()
         except Exception as e:
             logger.error(traceback.format_exc())
             return False
+        finally:
+            self.invalidate_schema(table_name)
 
         return True
 
     def tables(self) -> list:
         """列出数据库中所有的表名。
 
+        表名列表会被缓存，有效期内直接从内存返回，不再查询数据库。
+
         Returns:
             返回一个list，存储了数据库中所有的表名。
         """
         assert self._cursor, "请先调用connect()连接数据库！"
 
+        all_tables = self._schema_cache.tables() if self._schema_cache else None
+        if all_tables is not None:
+            return all_tables
+
         sql = "SHOW TABLES"
         try:
             # 执行SQL语句
             logger.debug(sql)
-            self._cursor.execute(sql)
+            with self._track(sql) as t:
+                self._cursor.execute(sql)
+                rows = self._cursor.fetchall()
+                t.result(rows)
         except Exception as e:
             logger.error(traceback.format_exc())
             return None
 
-        all_tables = self._cursor.fetchall()
-        return [table[0] for table in all_tables]
+        all_tables = [table[0] for table in rows]
+        if self._schema_cache:
+            self._schema_cache.set_tables(all_tables)
+        return all_tables
 
     def has_table(self, table_name: str) -> bool:
         """判断数据库中是否存在指定的表。
@@ -411,6 +734,12 @@ class TDengineDB(DBBase.DBBase):
         """
         assert table_name, "表名不能为空！"
 
+        # 缓存有效时直接用集合判断
+        if self._schema_cache:
+            exists = self._schema_cache.has_table(table_name)
+            if exists is not None:
+                return exists
+
         all_tables = self.tables()
         if all_tables:
             return table_name in all_tables
@@ -424,6 +753,8 @@ class TDengineDB(DBBase.DBBase):
         [('ts', 'TIMESTAMP', 8, ''), ('id', 'INT', 4, ''), ('name', 'NCHAR', 32, ''), 
          ('gender', 'NCHAR', 4, ''), ('age', 'TINYINT UNSIGNED', 1, '')]
 
+        表结构会被缓存，有效期内直接从内存返回，不再查询数据库。
+
         Arguments:
             table_name: 表名。
         Returns:
@@ -431,16 +762,25 @@ class TDengineDB(DBBase.DBBase):
         """
         assert table_name, "表名不能为空！"
 
+        columns = self._schema_cache.describe(table_name) if self._schema_cache else None
+        if columns is not None:
+            return columns
+
         sql = f"DESCRIBE {self._database}.{table_name}"
         try:
             # 执行SQL语句
             logger.debug(sql)
-            self._cursor.execute(sql)
+            with self._track(sql) as t:
+                self._cursor.execute(sql)
+                columns = self._cursor.fetchall()
+                t.result(columns)
         except Exception:
             logger.error(traceback.format_exc())
             return None
 
-        return self._cursor.fetchall()
+        if self._schema_cache and columns:
+            self._schema_cache.set_describe(table_name, columns)
+        return columns
 
     def execute(self, sql: str) -> (dict | list | bool):
         """执行SQL语句。
@@ -461,10 +801,16 @@ class TDengineDB(DBBase.DBBase):
             if command == "SELECT":
                 return self._query(sql, self._as_dict)
             else:
-                # logger.debug(sql)
+                # 建表、删表、修改表结构后，元数据缓存失效
+                if command.startswith(("CREATE", "DROP", "ALTER")):
+                    self.invalidate_schema()
+                SingleFlight.invalidate()
+                logger.debug(sql)
                 # 提交到数据库执行
-                result = self._connect.execute(sql)
-                self._connect.commit()
+                with self._track(sql) as t:
+                    result = self._connect.execute(sql)
+                    self._connect.commit()
+                    t.result(result if isinstance(result, int) else None, len(sql))
                 return result
         except Exception:
             # 发生错误时回滚
@@ -474,42 +820,62 @@ class TDengineDB(DBBase.DBBase):
         # 此处不能返回None，因为SQL语句的执行结果可能是None，就无法和失败区分开
         return False
 
-    def _query(self, sql: str, as_dict: bool = True) -> list:
+    def _query(self, sql: str, as_dict: bool = True, columnar: bool = False) -> (list | dict):
         """通过SQL语句查询数据库。
 
-        因为TDengine的原生连接和REST连接在查询数据库时，还是略有差异，因此特别封装该
+        因为TDengine的原生连接和REST连接、WebSocket连接在查询数据库时，还是略有差异，因此特别封装该
         函数，用于执行数据库查询SQL语句，并根据模块参数，返回二维列表或者字典列表。
 
         Arguments:
             sql: SQL语句。
             as_dict: 查询结果返回字典列表，还是二维列表？默认为字典列表。
+            columnar: 为True时返回列式结果，即"字段名 -> NumPy数组"的字典，时间戳为int64的
+                毫秒时间戳，空值为NaN或掩码，详见columnar模块，此时忽略as_dict。
         Returns:
-            返回查询结果，默认为字典列表，也可以是二维列表。
+            返回查询结果，默认为字典列表，也可以是二维列表或列式结果。
         """
         assert sql, "SQL语句不能为空！"
         assert self._cursor, "请先调用connect()连接数据库！"
 
+        # 完全相同的SELECT语句同时执行时，只查询一次
+        if self._single_flight and sql.lstrip()[:6].upper() == "SELECT":
+            key = (self._host, self._port, self._database, sql, as_dict, columnar)
+            return SingleFlight.do(key, lambda: self._execute_query(sql, as_dict, columnar), 
+                                   self._single_flight_window)
+        return self._execute_query(sql, as_dict, columnar)
+
+    def _execute_query(self, sql: str, as_dict: bool, columnar: bool) -> (list | dict):
+        """执行查询，参数和返回值同_query()。"""
         try:
             # 执行SQL语句
-            # logger.debug(sql)
             logger.debug(sql)
-            if self._link_mode == DBBase.REST_LINK:   # REST连接
-                self._cursor.execute(sql)
-                if as_dict:
-                    cols = [meta[0] for meta in self._cursor.description]
-                    rows = self._cursor.fetchall()
-                    records = []
-                    for row in rows:
-                        records.append(dict(zip(cols, [value for value in row])))
-                    return records
-                else:
-                    return self._cursor.fetchall()
-            else:    # 原生连接
-                result = self._connect.query(sql)
-                if as_dict:
-                    return result.fetch_all_into_dict()
-                else:
-                    return result.fetch_all()
+            with self._track(sql) as t:
+                if self._link_mode != DBBase.NATIVE_LINK:   # REST连接、WebSocket连接
+                    self._cursor.execute(sql)
+                    if columnar:
+                        cols = [meta[0] for meta in self._cursor.description]
+                        types = [meta[1] for meta in self._cursor.description]
+                        records = to_columns(cols, self._cursor.fetchall(), types)
+                    elif as_dict:
+                        cols = [meta[0] for meta in self._cursor.description]
+                        rows = self._cursor.fetchall()
+                        records = []
+                        for row in rows:
+                            records.append(dict(zip(cols, [value for value in row])))
+                    else:
+                        records = self._cursor.fetchall()
+                else:    # 原生连接
+                    result = self._connect.query(sql)
+                    if columnar:
+                        cols = [field.name for field in result.fields]
+                        types = [field.type for field in result.fields]
+                        records = to_columns(cols, result.fetch_all(), types)
+                    elif as_dict:
+                        records = result.fetch_all_into_dict()
+                    else:
+                        records = result.fetch_all()
+                t.result(records)
+            return records
         except Exception:
             logger.info(sql)
             logger.error(traceback.format_exc())
@@ -517,7 +883,9 @@ class TDengineDB(DBBase.DBBase):
         return None
 
     def query(self, table_name: str, select_cols: list = None, fetch_type: int = DBBase.FETCH_ALL, 
-              conditions: str = None, order_cols: list = None, order_by: list = None) -> (dict | list):
+              conditions: str = None, order_cols: list = None, order_by: list = None, 
+              columnar: bool = False, epoch_ms: bool = None, interval=None, sliding=None, 
+              fill=None, aggregate=None, tags: dict = None, partition_by: list = None) -> (dict | list):
         """通过SQL语句及参数查询数据库。
 
         如：一、查询所有记录。
@@ -527,6 +895,12 @@ class TDengineDB(DBBase.DBBase):
             三、查询"id", "name", "gender", "age"四个字段，gender='男'且age>18，只取前3条记录，根据"age"倒序排序。
             query(table_name, select_cols=["id", "name", "gender", "age"], fetch_type=3, 
                   conditions="gender='男' AND age>18", order_cols=["age"], order_by=[DBBase.ORDER_DESC]))
+            四、按10分钟的时间窗口降采样，每个窗口取平均值，没有数据的窗口用前一个窗口的值填充。
+            query(table_name, ["ts", "do", "tn"], conditions="ts >= '2024-01-01' AND ts < '2024-01-02'",
+                  interval="10m", fill="PREV", aggregate="AVG")
+            五、查询超级表中前区所有生产线的溶解氧，按生产线分区，每小时取平均值。
+            query("aao_cstr", ["ts", "train", "do"], conditions="ts >= NOW - 1d", tags={"zone": "front"},
+                  partition_by=["train"], interval="1h")
 
         Arguments:
             table_name: 表名。
@@ -537,12 +911,249 @@ class TDengineDB(DBBase.DBBase):
             conditions: 查询的条件，即WHERE语句。
             order_cols: 用于排序的字段，字符串列表，空列表则表示不指定排序的字段。
             order_by: 排序方式为升序或降序，ORDER_ASC或ORDER_DESC的整数列表。
+            columnar: 为True时返回列式结果，即"字段名 -> NumPy数组"的字典，详见_query()。
+            epoch_ms: TIMESTAMP字段是否以整数的毫秒时间戳返回，None时使用connect()的epoch_ms选项，
+                详见_epoch_ms_cols()。
+            interval: 时间窗口的长度，指定时按时间窗口聚合（降采样），每个窗口返回一条记录。可以是
+                时间长度字符串（如"10m"、"1h"）、毫秒数，或者(窗口长度, 偏移)元组。结果中的ts为窗口
+                的起始时间，按ts排序时即按窗口排序。
+            sliding: 窗口向前滑动的时间，同interval，默认等于窗口长度。
+            fill: 没有数据的窗口的填充方式，FILL_MODES之一（如"PREV"、"LINEAR"），或者用于填充的
+                数值，默认不填充（没有数据的窗口不返回）。填充需要在conditions中指定时间范围。
+            aggregate: 聚合函数，如"AVG"、"FIRST"、"MAX"，用于select_cols中除ts以外的所有字段，默认为
+                AVG；也可以是"字段名 -> 聚合函数"的字典，select_cols为空时查询字典中的字段。
+                select_cols中已经是函数或表达式的字段保持不变。
+            tags: 超级表的标签过滤条件，"标签名 -> 值"的字典，值为列表时表示IN，与conditions是AND的
+                关系（此时conditions中不能包含ORDER BY等子句）。数据库只扫描标签匹配的子表。
+            partition_by: 分区的字段（一般为标签或tbname），每个分区单独计算聚合函数、时间窗口。与
+                interval一起使用时，分区字段原样出现在结果中，不套聚合函数。
         Returns:
             返回查询结果，默认为字典格式。
         """
         assert table_name, "表名不能为空！"
         assert self._cursor, "请先调用connect()连接数据库！"
 
+        if tags:
+            tag_conditions = self._tag_conditions(tags)
+            conditions = f"({conditions}) AND {tag_conditions}" if conditions else tag_conditions
+
+        epoch_ms = self._epoch_ms if epoch_ms is None else epoch_ms
+        clauses = [f"PARTITION BY {','.join(partition_by)}"] if partition_by else []
+        if interval:
+            select_cols = self._window_cols(table_name, select_cols, aggregate, epoch_ms, partition_by)
+            value_count = len(select_cols) - 1 - len(partition_by or [])
+            clauses.append(self._window_sql(interval, sliding, fill, value_count))
+            order_cols = ["_wstart" if col == "ts" else col for col in order_cols or []]
+        elif epoch_ms:
+            select_cols = self._epoch_ms_cols(table_name, select_cols)
+        sql = self._select_sql(table_name, select_cols, fetch_type, conditions, order_cols, order_by, 
+                               " ".join(clauses))
+        return self._query(sql, self._as_dict, columnar)
+
+    def _epoch_ms_cols(self, table_name: str, select_cols: list = None) -> list:
+        """把要查询的TIMESTAMP字段改写为整数的毫秒时间戳。
+
+        如ts改写为CAST(ts AS BIGINT) AS ts，结果中的字段名不变，驱动直接返回整数，不再为每个
+        时间戳构造datetime对象。数据库的时间精度为微秒、纳秒时换算为毫秒。
+        只改写直接查询的字段名，表达式、函数保持不变；select_cols为空时展开为表的所有普通字段
+        （不含标签）。表结构查询失败时不改写。
+
+        Arguments:
+            table_name: 表名。
+            select_cols: 要查询的字段，同query()。
+        Returns:
+            改写后的字段列表。
+        """
+        structure = self.describe(table_name)
+        if not structure:
+            return select_cols
+
+        if not select_cols:
+            select_cols = [col[0] for col in structure if len(col) < 4 or col[3] != "TAG"]
+        timestamps = {col[0] for col in structure if col[1] == "TIMESTAMP"}
+
+        columns = []
+        for col in select_cols:
+            name = col.strip().strip("`")
+            if name in timestamps:
+                columns.append(f"{self._epoch_ms_expr(col)} AS {name}")
+            else:
+                columns.append(col)
+        return columns
+
+    def _epoch_ms_expr(self, col: str) -> str:
+        """把TIMESTAMP字段或表达式转换为整数毫秒时间戳的表达式。"""
+        divisor = EPOCH_MS_DIVISORS.get(self._precision(), 1)
+        if divisor == 1:
+            return f"CAST({col} AS BIGINT)"
+        return f"CAST(CAST({col} AS BIGINT) / {divisor} AS BIGINT)"
+
+    def _tag_conditions(self, tags: dict) -> str:
+        """标签过滤条件，如 train IN ('1_1','1_2') AND zone='front'。"""
+        conditions = []
+        for name, value in tags.items():
+            if isinstance(value, (list, tuple, set)):
+                conditions.append(f"{name} IN ({','.join(self._sql_value(v) for v in value)})")
+            else:
+                conditions.append(f"{name}={self._sql_value(value)}")
+        return " AND ".join(conditions)
+
+    def _window_cols(self, table_name: str, select_cols: list, aggregate, epoch_ms: bool, 
+                     partition_by: list = None) -> list:
+        """窗口查询要查询的字段：第一个字段为窗口的起始时间（_wstart），命名为ts，然后是分区字段，
+        其他字段套上聚合函数，参数的含义同query()。"""
+        if not select_cols:
+            if isinstance(aggregate, dict):
+                select_cols = list(aggregate)
+            else:
+                structure = self.describe(table_name) or []
+                select_cols = [col[0] for col in structure 
+                               if col[1] != "TIMESTAMP" and (len(col) < 4 or col[3] != "TAG")]
+
+        wstart = self._epoch_ms_expr("_wstart") if epoch_ms else "_wstart"
+        columns = [f"{wstart} AS ts"] + list(partition_by or [])
+        for col in select_cols:
+            name = col.strip().strip("`")
+            if name == "ts" or name in (partition_by or []):
+                continue
+            if "(" in col:      # 已经是函数或表达式
+                columns.append(col)
+                continue
+
+            func = aggregate.get(name, "AVG") if isinstance(aggregate, dict) else (aggregate or "AVG")
+            columns.append(f"{func}({col}) AS {name}")
+        return columns
+
+    @staticmethod
+    def _duration(value) -> str:
+        """时间长度转换为SQL中的格式，整数为毫秒数。"""
+        if isinstance(value, numbers.Integral):
+            return f"{value}a"
+        assert DURATION.match(str(value)), f"不正确的时间长度：{value}！"
+        return str(value)
+
+    @classmethod
+    def _window_sql(cls, interval, sliding=None, fill=None, value_count: int = 1) -> str:
+        """拼接窗口子句，如INTERVAL(10m) SLIDING(5m) FILL(PREV)，参数的含义同query()。
+
+        Arguments:
+            value_count: 聚合字段的个数，以数值填充时每个字段都需要一个填充值。
+        """
+        if isinstance(interval, (tuple, list)):
+            sql = f"INTERVAL({cls._duration(interval[0])}, {cls._duration(interval[1])})"
+        else:
+            sql = f"INTERVAL({cls._duration(interval)})"
+        if sliding:
+            sql += f" SLIDING({cls._duration(sliding)})"
+
+        if fill is None:
+            return sql
+        if isinstance(fill, numbers.Number):
+            values = ", ".join([str(fill)] * value_count)
+            return sql + f" FILL(VALUE, {values})"
+        assert str(fill).upper() in FILL_MODES, f"不支持的填充方式：{fill}！只能是{FILL_MODES}或数值"
+        return sql + f" FILL({str(fill).upper()})"
+
+    def _database_option(self, name: str):
+        """查询数据库的选项（information_schema.ins_databases的字段），结果缓存在SchemaCache中，
+        查询失败时返回None。"""
+        value = self._schema_cache.option(name) if self._schema_cache else None
+        if value is not None:
+            return value
+
+        sql = f"SELECT `{name}` FROM information_schema.ins_databases WHERE name='{self._database}'"
+        rows = self._query(sql, False)
+        if not rows:
+            return None
+
+        value = rows[0][0]
+        if self._schema_cache:
+            self._schema_cache.set_option(name, value)
+        return value
+
+    def _precision(self) -> str:
+        """数据库的时间戳精度，ms、us或ns。"""
+        return self._database_option("precision")
+
+    def cache_model(self) -> str:
+        """查询数据库的缓存模式（CACHEMODEL），见CACHE_MODELS，查询失败时返回None。"""
+        return self._database_option("cachemodel")
+
+    def set_cache_model(self, cache_model: str) -> bool:
+        """修改数据库的缓存模式（CACHEMODEL）。
+
+        缓存模式为last_row时，数据库在内存中缓存每张表的最后一条记录，LAST_ROW()直接从缓存返回；
+        为last_value时缓存每个字段最后一个非空值，供LAST()使用；both则两者都缓存。latest()查询
+        频繁的数据库建议设为both。这是修改数据库的DDL操作，需要有修改数据库的权限，由管理员一次性
+        执行（或直接执行"ALTER DATABASE beihu_dt CACHEMODEL 'both'"），应用程序运行时不要调用。
+
+        Arguments:
+            cache_model: 缓存模式，CACHE_MODELS之一。
+        Returns:
+            修改成功时返回True，否则返回False。
+        """
+        assert cache_model in CACHE_MODELS, f"不支持的缓存模式：{cache_model}！只能是{CACHE_MODELS}"
+        assert self._cursor, "请先调用connect()连接数据库！"
+
+        sql = f"ALTER DATABASE {self._database} CACHEMODEL '{cache_model}'"
+        try:
+            logger.info(sql)
+            with self._track(sql):
+                self._cursor.execute(sql)
+        except Exception:
+            logger.error(traceback.format_exc())
+            return False
+
+        if self._schema_cache:
+            self._schema_cache.set_option("cachemodel", cache_model)
+        return True
+
+    def latest(self, tables, cols: list = None, non_null: bool = False) -> dict:
+        """查询最新的记录。
+
+        用LAST_ROW()或LAST()函数代替ORDER BY ts DESC LIMIT 1，数据库的缓存模式（见set_cache_model()）
+        包含相应的缓存时，直接从内存返回，不需要按时间戳排序扫描数据。
+        如：一、查询一张表的最新记录。
+            latest("realtime_data", ["influent_tol_q_rd"])。
+            二、一次查询多张表的最新记录。
+            latest({"realtime_data": ["influent_tol_q_rd"], "predict_input_aao": ["aao_influent_1_1_tn_pi"]})。
+
+        Arguments:
+            tables: 表名，或"表名 -> 字段列表"的字典，字段列表为空时查询所有字段（不含标签）。
+            cols: 要查询的字段，只在tables为表名时使用，为空时查询所有字段（不含标签）。
+            non_null: 为False时用LAST_ROW()返回最后一条记录，空值为None，与ORDER BY ts DESC LIMIT 1
+                相同；为True时用LAST()返回每个字段最后一个非空值，各字段的值可能来自不同的记录。
+        Returns:
+            tables为表名时返回记录字典，表中没有记录时为空字典，查询失败时为None；tables为字典时
+            返回"表名 -> 记录字典"的字典。
+        """
+        assert tables, "表名不能为空！"
+        assert self._cursor, "请先调用connect()连接数据库！"
+
+        if not isinstance(tables, dict):
+            return self._latest(tables, cols, non_null)
+        return {table_name: self._latest(table_name, table_cols, non_null) 
+                for table_name, table_cols in tables.items()}
+
+    def _latest(self, table_name: str, cols: list, non_null: bool) -> dict:
+        """查询一张表的最新记录，参数和返回值同latest()。"""
+        if not cols or cols == ["*"]:
+            structure = self.describe(table_name)
+            if not structure:
+                return None
+            cols = [col[0] for col in structure if len(col) < 4 or col[3] != "TAG"]
+
+        func = "LAST" if non_null else "LAST_ROW"
+        columns = ",".join(f"{func}({col}) AS {col.strip('`')}" for col in cols)
+        rows = self._query(f"SELECT {columns} FROM {self._database}.{table_name}", True)
+        if rows is None:
+            return None
+        return rows[0] if rows else {}
+
+    def _select_sql(self, table_name: str, select_cols: list = None, fetch_type: int = DBBase.FETCH_ALL, 
+                    conditions: str = None, order_cols: list = None, order_by: list = None, 
+                    window: str = None) -> str:
+        """根据查询参数拼接SELECT语句，参数的含义同query()，window为PARTITION BY及窗口子句，见_window_sql()。"""
         # 加入待查询字段
         if select_cols and len(select_cols) > 0:
             columns = ",".join(select_cols)
@@ -554,6 +1165,10 @@ class TDengineDB(DBBase.DBBase):
         if conditions:
             sql += f" WHERE {conditions}"
 
+        # 加入窗口子句
+        if window:
+            sql += f" {window}"
+
         # 加入排序字段和排序方法
         order_bys = []
         if order_cols and len(order_cols) > 0 and order_by and len(order_by) > 0:
@@ -572,11 +1187,88 @@ class TDengineDB(DBBase.DBBase):
             sql += " LIMIT 1"
         elif fetch_type > 0:
             sql += f" LIMIT {fetch_type}"
-        return self._query(sql, self._as_dict)
+        return sql
+
+    def iter_query(self, table_name: str, select_cols: list = None, conditions: str = None, 
+                   order_cols: list = None, order_by: list = None, chunk_size: int = 1000, 
+                   batch: bool = False, columnar: bool = False, epoch_ms: bool = None):
+        """分批查询数据库，以生成器的方式逐批返回查询结果。
+
+        与query()一次性取回所有记录不同，该函数每次只从游标取chunk_size条记录，处理完一批
+        再取下一批，适合时间范围很长、结果集很大的查询，如直接生成Flask的流式响应：
+            for record in db.iter_query("realtime_data", ["ts", "influent_tol_q_rd"]):
+                yield json.dumps(record)
+
+        Arguments:
+            table_name、select_cols、conditions、order_cols、order_by: 同query()。
+            chunk_size: 每批从游标读取的记录数。
+            batch: 为True时每次生成一批记录（列表），否则逐条生成记录。
+            columnar: 为True时每次生成一批列式结果（"字段名 -> NumPy数组"的字典），忽略batch。
+            epoch_ms: 同query()。
+        Returns:
+            生成器，逐条或逐批返回查询结果，记录的格式（字典或元组）由connect()的as_dict决定。
+        """
+        assert table_name, "表名不能为空！"
+        assert self._cursor, "请先调用connect()连接数据库！"
+
+        if self._epoch_ms if epoch_ms is None else epoch_ms:
+            select_cols = self._epoch_ms_cols(table_name, select_cols)
+        sql = self._select_sql(table_name, select_cols, DBBase.FETCH_ALL, conditions, order_cols, order_by)
+        return self._iter_query(sql, chunk_size, self._as_dict, batch, columnar)
+
+    def _iter_query(self, sql: str, chunk_size: int = 1000, as_dict: bool = True, 
+                    batch: bool = False, columnar: bool = False):
+        """通过SQL语句分批查询数据库，参数的含义同iter_query()。
+
+        每次调用都使用一个独立的游标，生成器在迭代过程中不会被同一线程的其他查询打断，
+        生成器结束或被关闭时自动关闭该游标。
+        注意：REST连接的taosAdapter一次返回整个结果集，分批只能避免一次性构造所有记录；
+        原生连接和WebSocket连接则是真正的分块读取。
+        """
+        assert sql, "SQL语句不能为空！"
+        assert chunk_size > 0, "每批读取的记录数必须大于0！"
+        assert self._cursor, "请先调用connect()连接数据库！"
+
+        cursor = self._connect.cursor()
+        try:
+            logger.debug(sql)
+            # 耗时包括调用者处理每一批数据的时间
+            with self._track(sql) as t:
+                cursor.execute(sql)
+                cols = [meta[0] for meta in cursor.description]
+                types = [meta[1] for meta in cursor.description]
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    t.result(rows)
+
+                    if columnar:
+                        yield to_columns(cols, rows, types)
+                        continue
+
+                    records = [dict(zip(cols, row)) for row in rows] if as_dict else rows
+                    if batch:
+                        yield records
+                    else:
+                        yield from records
+        except Exception:
+            # 流式输出时已经有部分数据发出，不能像_query()那样返回None，记录日志后继续抛出
+            logger.info(sql)
+            logger.error(traceback.format_exc())
+            raise
+        finally:
+            cursor.close()
 
-    def insert(self, table_name: str, keyvalues: list) -> bool:
+    def insert(self, table_name: str, keyvalues: list, max_rows: int = None, max_sql_length: int = None, 
+               stable_name: str = None, tags: dict = None) -> bool:
         """添加记录。
 
+        多条记录会合并成"INSERT INTO ... VALUES (...)(...)..."的多行INSERT语句批量插入，
+        字段相同的记录（列表记录，或键相同的字典记录）合并在一起，每条语句的记录数和长度
+        不超过max_rows和max_sql_length，这样几千条记录只需要一次请求。
+        注意：字段不同的记录分组插入，同一时间戳的记录出现在不同分组中时，不保证按输入顺序覆盖。
+
         如：一、一条一条记录插入。
             insert(table_name, [{"ts": "2023-12-23 10:16:21.005588", "id": 20230001, "name": "赵三", "gender": "男", "age": 34}])
             insert(table_name, [["2023-12-23 10:16:21.005588", 20230006, "吴八", "男", 12]])
@@ -594,39 +1286,302 @@ class TDengineDB(DBBase.DBBase):
                 因为是二维数组，所以可以一次性插入多条记录，如：
                     [{"ts": "2023-12-23 10:16:21.005588", "id": 20230003, "name": "孙五", "gender": "男", "age": 38}, 
                      ["2023-12-23 10:16:21.005588", 20230007, "郑九", "女", 24]]
+            max_rows: 每条INSERT语句的最大记录数，缺省为connect()时的insert_max_rows。
+            max_sql_length: 每条INSERT语句的最大长度（字节），缺省为connect()时的insert_max_sql_length。
+            stable_name: 超级表名，指定时table_name为其子表，子表不存在时用tags自动创建，如：
+                insert("aao_cstr_1_1_front", rows, stable_name="aao_cstr", tags={"train": "1_1", "zone": "front"})
+            tags: 子表的标签值，"标签名 -> 值"的字典，与stable_name一起使用。
         Returns:
             插入成功返回True，否则返回False。
         """
         assert table_name, '表名不能为空！'
+        assert not stable_name or tags, "写入超级表的子表时，标签值不能为空！"
+        using = self._using_sql(stable_name, tags) if stable_name else ""
 
+        # 按字段分组，列表记录的字段为None，即按表的字段顺序插入
+        groups = {}
         for row in keyvalues:
-            if isinstance(row, list):
-                # 无需指定要插入数据的列名，只提供被插入的值
-                values = str(row).replace("[", "").replace("]", "")
-                sql = f"INSERT INTO {self._database}.{table_name} VALUES ({values})"
+            if isinstance(row, (list, tuple)):
+                groups.setdefault(None, []).append(row)
             elif isinstance(row, dict):
-                # 指定要插入的列名及值
-                columns = ','.join(list(row.keys()))
-                values = str(list(row.values())).replace("[", "").replace("]", "")
-                sql = f"INSERT INTO {self._database}.{table_name} ({columns}) VALUES ({values})"
+                groups.setdefault(tuple(row.keys()), []).append(list(row.values()))
             else:
                 logger.warning(f"{row} 不是列表或字典，已跳过！")
-                continue
 
+        for columns, rows in groups.items():
+            if not self._execute_inserts(self._insert_sqls(table_name, columns, rows, max_rows, max_sql_length, using)):
+                return False
+
+        return True
+
+    def _execute_inserts(self, sqls, progress=None, total: int = None) -> bool:
+        """逐条执行INSERT语句，任何一条失败即返回False。
+
+        Arguments:
+            sqls: _insert_sqls()生成的(INSERT语句, 记录数)。
+            progress: 进度回调函数，每执行完一条语句调用一次progress(已写入记录数, total)。
+            total: 记录总数，只用于进度回调。
+        """
+        done = 0
+        SingleFlight.invalidate()
+        for sql, count in sqls:
             try:
                 # 执行SQL语句
                 # logger.debug(sql)
-                self._cursor.execute(sql)
-                # 提交到数据库执行
-                self._connect.commit()
+                with self._track(sql) as t:
+                    self._cursor.execute(sql)
+                    # 提交到数据库执行
+                    self._connect.commit()
+                    t.result(count, len(sql))
             except Exception as e:
-                logger.info(sql)
+                logger.info(sql[:1000])
                 self._connect.rollback()
                 logger.error(traceback.format_exc())
                 return False
 
+            done += count
+            if progress:
+                progress(done, total)
+
+        return True
+
+    @staticmethod
+    def _bind_list(values) -> list:
+        """将一列数据（list或NumPy数组）转换为list，NaN及掩码值为None，datetime64转换为毫秒时间戳。"""
+        if is_array(values):
+            np = load_numpy()
+            if values.dtype.kind == "M":
+                values = np.ma.masked_array(values.astype("datetime64[ms]").astype(np.int64), 
+                                            mask=np.isnat(values))
+            return to_list(values)
+        return list(values)
+
+    def insert_columns(self, table_name: str, columns: dict, chunk_size: int = None) -> bool:
+        """按列批量添加记录。
+
+        原生连接时使用TDengine的参数绑定（STMT）接口，按列绑定数据后直接写入，省去了拼接
+        SQL语句以及服务端解析SQL的开销，适合每次写入成千上万条模拟、清洗结果的场景；REST
+        连接、WebSocket连接退化为insert()的多行INSERT语句。
+        如：insert_columns("offline_cleaning_data", {"ts": ts_array, "influent_tol_q_cd": q_array})
+
+        Arguments:
+            table_name: 表名。
+            columns: 字典，key为字段名，value为该字段的数据，可以是list或NumPy数组，各字段的
+                数据长度必须相同。浮点数的NaN及掩码数组的掩码值写入NULL；时间戳可以是datetime、
+                datetime64数组或整数，整数的精度必须与数据库的精度一致（默认为毫秒）。
+            chunk_size: 每次绑定、写入的记录数，缺省为connect()时的insert_max_rows。
+        Returns:
+            插入成功返回True，否则返回False。
+        """
+        assert table_name, "表名不能为空！"
+        assert columns, "插入内容不能为空！"
+        assert self._cursor, "请先调用connect()连接数据库！"
+
+        names = list(columns.keys())
+        values = [self._bind_list(v) for v in columns.values()]
+        count = len(values[0])
+        assert all(len(v) == count for v in values), "各字段的数据长度必须相同！"
+        chunk_size = chunk_size or self._insert_max_rows
+
+        # REST连接不支持参数绑定，WebSocket连接的参数绑定接口与原生连接不同，都用多行INSERT语句写入
+        if self._link_mode != DBBase.NATIVE_LINK:
+            rows = list(zip(*values))
+            return self._execute_inserts(self._insert_sqls(table_name, tuple(names), rows))
+
+        # 根据表结构确定每个字段的绑定函数
+        structure = self.describe(table_name)
+        if not structure:
+            logger.error(f"无法获取表结构：{table_name}")
+            return False
+        types = {field[0]: field[1].upper() for field in structure}
+        methods = []
+        for name in names:
+            method = STMT_BIND_METHODS.get(types.get(name))
+            if method is None:
+                logger.error(f"字段{table_name}.{name}不存在，或类型{types.get(name)}不支持参数绑定！")
+                return False
+            methods.append(method)
+
+        SingleFlight.invalidate()
+        placeholders = ",".join(["?"] * len(names))
+        sql = f"INSERT INTO {self._database}.{table_name} ({','.join(names)}) VALUES ({placeholders})"
+        taos = DBBase.load_driver("taos")     # 原生连接已经加载
+        stmt = None
+        try:
+            logger.debug(sql)
+            stmt = self._connect.statement(sql)
+            for start in range(0, count, chunk_size):
+                binds = taos.new_multi_binds(len(names))
+                for bind, method, column in zip(binds, methods, values):
+                    getattr(bind, method)(column[start:start + chunk_size])
+                with self._track(sql) as t:
+                    stmt.bind_param_batch(binds)
+                    stmt.execute()
+                    t.result(len(values[0][start:start + chunk_size]))
+        except Exception:
+            logger.info(sql)
+            logger.error(traceback.format_exc())
+            return False
+        finally:
+            if stmt:
+                stmt.close()
+
         return True
-    
+
+    @staticmethod
+    def _sql_value(value) -> str:
+        """将Python的值转换为SQL语句中的字面量。"""
+        if value is None:
+            return "NULL"
+        if isinstance(value, bool):
+            return "true" if value else "false"
+        if isinstance(value, numbers.Real):    # 包括NumPy的数值类型
+            return "NULL" if value != value else str(value)   # NaN作为NULL
+        if isinstance(value, datetime):
+            return f"'{value}'"
+        if isinstance(value, str):
+            escaped = value.replace("\\", "\\\\").replace("'", "\\'")
+            return f"'{escaped}'"
+        return f"'{value}'"
+
+    def _insert_sqls(self, table_name: str, columns: tuple, rows: list, 
+                     max_rows: int = None, max_sql_length: int = None, using: str = ""):
+        """生成多行INSERT语句，每条语句的记录数和长度（字节）不超过限制。
+
+        Arguments:
+            table_name: 表名。
+            columns: 字段名，为None时按表的字段顺序插入。
+            rows: 每条记录的值列表，与columns一一对应。
+            max_rows: 每条语句的最大记录数。
+            max_sql_length: 每条语句的最大长度（字节）。
+            using: 写入超级表的子表时，子表的USING子句，见_using_sql()。
+        Returns:
+            生成器，逐条返回(INSERT语句, 该语句的记录数)。
+        """
+        max_rows = max_rows or self._insert_max_rows
+        max_sql_length = max_sql_length or self._insert_max_sql_length
+
+        if columns:
+            prefix = f"INSERT INTO {self._database}.{table_name}{using} ({','.join(columns)}) VALUES "
+        else:
+            prefix = f"INSERT INTO {self._database}.{table_name}{using} VALUES "
+        prefix_length = len(prefix.encode("utf-8"))
+
+        values, length = [], prefix_length
+        for row in rows:
+            value = "(" + ",".join(self._sql_value(v) for v in row) + ")"
+            value_length = len(value.encode("utf-8"))
+            if values and (len(values) >= max_rows or length + value_length > max_sql_length):
+                yield prefix + "".join(values), len(values)
+                values, length = [], prefix_length
+            values.append(value)
+            length += value_length
+
+        if values:
+            yield prefix + "".join(values), len(values)
+
+    @staticmethod
+    def _line_escape(text: str, chars: str) -> str:
+        """行协议中的转义，在指定的特殊字符前加反斜杠。"""
+        for ch in chars:
+            text = text.replace(ch, "\\" + ch)
+        return text
+
+    @classmethod
+    def to_line(cls, measurement: str, tags: dict, fields: dict, ts: int) -> str:
+        """将一个采样点转换为InfluxDB行协议格式的字符串。
+
+        如：to_line("plant_signal", {"train": "1_1"}, {"do": 2.1, "state": 1}, 1704067200000)
+            返回 'plant_signal,train=1_1 do=2.1,state=1i 1704067200000'
+
+        Arguments:
+            measurement: 测量名，即TDengine中的超级表名。
+            tags: 标签，字典格式，可以为空。
+            fields: 数据字段，字典格式，至少有一个字段，值为None的字段忽略。
+            ts: 时间戳，整数，精度与ingest_lines()的precision一致。
+        Returns:
+            行协议字符串。
+        """
+        line = cls._line_escape(measurement, ", ")
+        for k, v in (tags or {}).items():
+            line += f",{cls._line_escape(str(k), ',= ')}={cls._line_escape(str(v), ',= ')}"
+
+        values = []
+        for k, v in fields.items():
+            if v is None:
+                continue
+            if isinstance(v, bool):
+                value = "t" if v else "f"
+            elif isinstance(v, numbers.Integral):
+                value = f"{v}i"
+            elif isinstance(v, numbers.Real):
+                if v != v:      # NaN不写入
+                    continue
+                value = repr(float(v))
+            else:
+                value = '"' + str(v).replace("\\", "\\\\").replace('"', '\\"') + '"'
+            values.append(f"{cls._line_escape(str(k), ',= ')}={value}")
+        assert values, f"采样点至少要有一个非空字段：{measurement}"
+
+        return f"{line} {','.join(values)} {int(ts)}"
+
+    def ingest_lines(self, lines: list, precision: str = "ms", max_lines: int = None) -> bool:
+        """以无模式（schemaless）写入的方式写入InfluxDB行协议格式的数据。
+
+        无模式写入不需要拼接INSERT语句，服务端根据行协议自动建立超级表及子表：测量名为超级表名，
+        标签组合确定子表，字段对应超级表的列。注意：测量名不能与已有的普通表（如realtime_data）
+        同名。原生连接调用taos的schemaless_insert()，REST连接、WebSocket连接调用taosAdapter的InfluxDB写入接口
+        （/influxdb/v1/write）。大批量数据按max_lines分批写入；按时间批量、后台写入及背压见
+        LineIngester。
+        如：ingest_lines(["plant_signal,train=1_1 do=2.1 1704067200000"])
+            ingest_lines([("plant_signal", {"train": "1_1"}, {"do": 2.1}, 1704067200000)])
+
+        Arguments:
+            lines: 待写入的数据，元素可以是行协议字符串，也可以是紧凑格式的元组
+                (测量名, 标签字典, 字段字典, 时间戳)，见to_line()。
+            precision: 时间戳精度，"s"、"ms"、"us"或"ns"，默认为毫秒。
+            max_lines: 每批写入的最大行数，缺省为connect()时的insert_max_rows。
+        Returns:
+            写入成功返回True，否则返回False。
+        """
+        assert self._connect, "请先调用connect()连接数据库！"
+        assert precision in SML_PRECISIONS, f"不支持的时间戳精度：{precision}"
+
+        lines = [line if isinstance(line, str) else self.to_line(*line) for line in lines]
+        max_lines = max_lines or self._insert_max_rows
+        SingleFlight.invalidate()
+
+        for start in range(0, len(lines), max_lines):
+            chunk = lines[start:start + max_lines]
+            try:
+                # 按测量名统计，如"SCHEMALESS plant_signal"
+                with self._track(f"SCHEMALESS {chunk[0].split(',', 1)[0].split(' ', 1)[0]}") as t:
+                    if self._link_mode == DBBase.NATIVE_LINK:   # 原生连接
+                        taos = DBBase.load_driver("taos")
+                        self._connect.schemaless_insert(chunk, taos.SmlProtocol.LINE_PROTOCOL, 
+                                                        getattr(taos.SmlPrecision, SML_PRECISIONS[precision]))
+                    else:    # REST连接、WebSocket连接，通过taosAdapter的InfluxDB接口写入
+                        self._influxdb_write("\n".join(chunk), precision)
+                    t.result(len(chunk), sum(len(line) + 1 for line in chunk))
+            except Exception:
+                logger.info(chunk[0])
+                logger.error(traceback.format_exc())
+                return False
+
+        return True
+
+    def _influxdb_write(self, body: str, precision: str) -> None:
+        """通过taosAdapter的InfluxDB写入接口写入行协议数据，失败时抛出异常。"""
+        host = self._host if "://" in self._host else f"http://{self._host}"
+        query = urllib.parse.urlencode({"db": self._database, "precision": INFLUXDB_PRECISIONS[precision]})
+        request = urllib.request.Request(f"{host}:{self._port}/influxdb/v1/write?{query}", 
+                                         data=body.encode("utf-8"), method="POST")
+        token = base64.b64encode(f"{self._user}:{self._password}".encode("utf-8")).decode("ascii")
+        request.add_header("Authorization", f"Basic {token}")
+        with urllib.request.urlopen(request, timeout=self._timeout) as response:
+            if response.status >= 300:
+                raise IOError(f"无模式写入失败：HTTP {response.status} {response.read()[:200]}")
+
     def insert_many(self, table_name: str, list_dics: list) -> bool:
         """添加记录。
         一次插入多条记录
@@ -674,75 +1629,141 @@ class TDengineDB(DBBase.DBBase):
 
         return True
 
-    def delete(self, table_name: str, conditions: str = None) -> bool:
+    @property
+    def affected_rows(self) -> int:
+        """最近一次delete()删除的记录数。"""
+        return self._affected_rows
+
+    def delete(self, table_name: str, conditions: str = None, start: str = None, end: str = None) -> bool:
         """删除记录。
 
         删除记录时要格外小心！因为不能撤销！！不能重来！！！
 
+        TDengine的DELETE语句只支持对第一列时间戳的过滤，因此：
+            1. 过滤条件只包含时间戳的比较（如 ts >= '...' AND ts < '...'），或者只指定了start、end，
+               则直接交给服务端按时间范围删除，一条语句完成；
+            2. 过滤条件包含其他字段时，先查询出符合条件的记录的时间戳，把连续的时间戳合并成时间段，
+               再按时间段批量删除。
+        删除的记录数可以通过affected_rows获得。
+        如：delete(table_name, start="2024-05-15 00:00:00", end="2024-05-22 00:00:00")
+            delete(table_name, "age<150")
+
         Arguments:
             table_name: 表名。
-            conditions: 指定删除数据的过滤条件，不指定过滤条件则为表中所有数据，请慎重使用。
-                特别说明，这里的WHERE条件中只支持对第一列时间戳的过滤。
+            conditions: 指定删除数据的过滤条件，不指定过滤条件且不指定start、end则删除表中所有数据，请慎重使用。
+            start: 时间范围的起点（包含），与conditions是"与"的关系。
+            end: 时间范围的终点（不包含），与conditions是"与"的关系。
         Returns:
             删除成功返回True，否则返回False。
         """
         assert table_name, "表名不能为空！"
         assert self._cursor, "请先调用connect()连接数据库！"
 
-        if conditions:
-            # 如果过滤条件用的是时间戳，则可以直接使用该过滤条件
-            # TDEngine 只支持 ts = '2023-12-23 10:16:21.005588',一条一条删除，不支持批量，这里如果ts>='xx' ts<'xx' 应该不满足
-            if conditions[:3] == "ts=":
-                sql = f"DELETE FROM {self._database}.{table_name} WHERE {conditions}"
-            # 因为TDengine在删除记录时只支持对第一列时间戳的过滤，因此先利用过滤条件查询
-            # 出所有要删除的记录，提取出每一条记录的时间戳，再根据时间戳逐一删除记录
-            else:
-                # 先筛选出所有符合条件的记录
-                sql = f"SELECT * FROM {self._database}.{table_name} WHERE {conditions}"
-                try:
-                    # 执行SQL语句
-                    records = self._query(sql)
-
-                    for record in records:
-                        ts = record["ts"]
-                        sql = f"DELETE FROM {self._database}.{table_name} WHERE ts='{ts}'"
-                        # 执行SQL语句
-                        logger.debug(sql)
-                        self._cursor.execute(sql)
-                        # 提交到数据库执行
-                        self._connect.commit()
-
-                    return True
-                except Exception as e:
-                    # 发生错误时回滚
-                    logger.debug(sql)
-                    self._connect.rollback()
-                    logger.error(traceback.format_exc())
-                    return False
-        else:
+        self._affected_rows = 0
+        clauses = [conditions] if conditions else []
+        if start is not None:
+            clauses.append(f"ts >= {self._sql_value(start)}")
+        if end is not None:
+            clauses.append(f"ts < {self._sql_value(end)}")
+        conditions = " AND ".join(f"({c})" if len(clauses) > 1 else c for c in clauses)
+
+        if not conditions:
             # 在不删除表的情况下，删除表中所有行，表的结构、属性、索引将保持不变
-            sql = f"DELETE FROM {self._database}.{table_name}"
+            return self._execute_delete(f"DELETE FROM {self._database}.{table_name}")
+
+        # 过滤条件只涉及时间戳，直接按时间范围删除
+        if all(TS_CONDITION.match(c.strip()) for c in re.split(r"\s+AND\s+", conditions, flags=re.IGNORECASE)):
+            return self._execute_delete(f"DELETE FROM {self._database}.{table_name} WHERE {conditions}")
 
+        # 先筛选出所有符合条件的记录的时间戳
+        sql = f"SELECT ts FROM {self._database}.{table_name} WHERE {conditions} ORDER BY ts ASC"
+        try:
+            _, rows = self._query_rows(sql)
+        except Exception:
+            logger.error(sql)
+            logger.error(traceback.format_exc())
+            return False
+        if not rows:
+            return True
+
+        # 把连续的时间戳合并成时间段，逐段删除
+        affected = 0
+        for first, last in self._ts_runs(table_name, conditions, [row[0] for row in rows]):
+            if first == last:
+                sql = f"DELETE FROM {self._database}.{table_name} WHERE ts={self._sql_value(first)}"
+            else:
+                sql = (f"DELETE FROM {self._database}.{table_name} "
+                       f"WHERE ts>={self._sql_value(first)} AND ts<={self._sql_value(last)}")
+            if not self._execute_delete(sql):
+                self._affected_rows = affected      # 失败时_affected_rows仍是上一批的记录数，已计入affected
+                return False
+            affected += self._affected_rows
+
+        self._affected_rows = affected
+        logger.info(f"从{table_name}中删除了{affected}条记录")
+        return True
+
+    def _ts_runs(self, table_name: str, conditions: str, matched: list) -> list:
+        """把符合条件的时间戳合并成连续的时间段。
+
+        查询[第一个时间戳, 最后一个时间戳]范围内每条记录是否符合条件，连续符合条件的记录
+        合并为一段，这样只有被不符合条件的记录隔开的地方才需要分段。服务端不支持CASE WHEN
+        时，每个时间戳单独成段。
+
+        Returns:
+            [(起始时间戳, 结束时间戳), ...]
+        """
+        if len(matched) == 1:
+            return [(matched[0], matched[0])]
+
+        sql = (f"SELECT ts, CASE WHEN {conditions} THEN 1 ELSE 0 END FROM {self._database}.{table_name} "
+               f"WHERE ts>={self._sql_value(matched[0])} AND ts<={self._sql_value(matched[-1])} ORDER BY ts ASC")
+        try:
+            _, rows = self._query_rows(sql)
+        except Exception:
+            logger.warning(f"无法合并时间段，逐条删除：{traceback.format_exc()}")
+            return [(ts, ts) for ts in matched]
+
+        runs, first, last = [], None, None
+        for ts, hit in rows:
+            if hit:
+                first = ts if first is None else first
+                last = ts
+            elif first is not None:
+                runs.append((first, last))
+                first = None
+        if first is not None:
+            runs.append((first, last))
+        return runs
+
+    def _execute_delete(self, sql: str) -> bool:
+        """执行DELETE语句，删除的记录数保存在affected_rows中。"""
+        SingleFlight.invalidate()
         try:
             # 执行SQL语句
             logger.debug(sql)
-            self._cursor.execute(sql)
-            # 提交到数据库执行
-            self._connect.commit()
+            with self._track(sql) as t:
+                self._cursor.execute(sql)
+                # 提交到数据库执行
+                self._connect.commit()
+                t.result(self._cursor.rowcount)
         except Exception as e:
             # 发生错误时回滚
+            logger.error(sql)
             self._connect.rollback()
             logger.error(traceback.format_exc())
             return False
 
+        self._affected_rows = max(self._cursor.rowcount or 0, 0)
         return True
 
-    def update(self, table_name: str, keyvalues: dict, conditions: str = None) -> bool:
+    def update(self, table_name: str, keyvalues: dict, conditions: str = None, progress=None) -> bool:
         """更新表中已存在的记录。
 
         因为TDengine不支持UPDATE指令，而是采用INSERT的方式来修改记录，因此需要先根据
         筛选条件查询出所有符合要求的记录，然后用传入的参数修改记录，再插入到表中，TDengine
-        根据ts字段来更新记录。
+        根据ts字段来更新记录。修改后的记录合并成多行INSERT语句批量写回，整个过程只需要
+        一次查询和少量几次写入。
         如：一、将吴八的年龄修改为100
             update(table_name, {"age": 100}, "name='吴八'")
             二、将所有人的年龄+100
@@ -756,6 +1777,8 @@ class TDengineDB(DBBase.DBBase):
             keyvalues: 待更新的数据，key作为字段名，value作为值，按照键值来更新表格。
             conditions: 筛选条件，即WHERE语句。如果省略了WHERE子句，则UPDATE指令会将
                 表中所有行的指定键值对全部修改，执行没有WHERE子句的UPDATE要慎重！再慎重！！！
+            progress: 进度回调函数，每写回一批记录调用一次progress(已写回记录数, 记录总数)。
+                记录数超过insert_max_rows时，同时在日志中记录进度。
         Returns:
             更新成功返回True，否则返回False。
         """
@@ -768,41 +1791,53 @@ class TDengineDB(DBBase.DBBase):
         else:
             sql = f"SELECT * FROM {self._database}.{table_name}"
         try:
-            # 执行SQL语句
-            records = self._query(sql)
+            # 执行SQL语句，只取二维列表，省去构造字典的开销
+            cursor_cols, records = self._query_rows(sql)
         except Exception as e:
             logger.error(traceback.format_exc())
             return False
 
         # 如果根据指定的查询条件，查询到的记录为0，则直接返回False
-        if not len(records):
+        if not records:
             return False
 
-        # 逐一更新每一条记录的指定字段
+        # 在内存中修改每一条记录的指定字段
+        unknown = [k for k in keyvalues if k not in cursor_cols]
+        if unknown:
+            logger.error(f"表{table_name}中不存在字段：{unknown}")
+            return False
+        indexes = [(cursor_cols.index(k), v) for k, v in keyvalues.items()]
+        rows = []
         for record in records:
-            record['ts'] = f"{record['ts']}"
-            # 得到所有的字段名
-            columns = ','.join(list(record.keys()))
-            # 用传入的参数修改记录
-            for k, v in keyvalues.items():
-                record[k] = v
-            values = str(list(record.values())).replace("[", "").replace("]", "")
-            sql = f"INSERT INTO {self._database}.{table_name} ({columns}) VALUES ({values})"
-
-            try:
-                # 执行SQL语句
-                logger.debug(sql)
+            row = list(record)
+            for index, value in indexes:
+                row[index] = value
+            rows.append(row)
+
+        total = len(rows)
+        def report(done: int, total: int) -> None:
+            if total > self._insert_max_rows:
+                logger.info(f"更新{table_name}：已写回{done}/{total}条记录")
+            if progress:
+                progress(done, total)
+
+        # 批量写回
+        return self._execute_inserts(self._insert_sqls(table_name, tuple(cursor_cols), rows), report, total)
+
+    def _query_rows(self, sql: str) -> tuple:
+        """通过SQL语句查询数据库，返回(字段名列表, 二维列表)，失败时抛出异常。"""
+        logger.debug(sql)
+        with self._track(sql) as t:
+            if self._link_mode != DBBase.NATIVE_LINK:   # REST连接、WebSocket连接
                 self._cursor.execute(sql)
-                # 提交到数据库执行
-                self._connect.commit()
-            except Exception as e:
-                # 发生错误时回滚
-                logger.error(sql)
-                self._connect.rollback()
-                logger.error(traceback.format_exc())
-                return False
-
-        return True
+                cols = [meta[0] for meta in self._cursor.description]
+                rows = self._cursor.fetchall()
+            else:    # 原生连接
+                result = self._connect.query(sql)
+                cols = [field.name for field in result.fields]
+                rows = result.fetch_all()
+            t.result(rows)
+        return cols, rows
 
 # MCP_test = TDengineDB()
 # MCP_test.connect(host="192.168.3.92", user="root", password="taosdata", 
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+TDengine连接池，进程内所有服务共享同一组数据库连接，避免每次请求都重新建立连接。
+
+连接池同时支持原生连接（NATIVE_LINK）、REST连接（REST_LINK）和WebSocket连接（WS_LINK），线程安全，提供：
+    1. 最小/最大连接数：连接按需创建，总数不超过max_size，空闲回收时至少保留min_size个；
+    2. 空闲回收：空闲时间超过idle_timeout的连接会被关闭；
+    3. 借出前的健康检查：空闲时间超过check_interval的连接，借出前先ping一次，失效则丢弃重建；
+    4. 上下文管理器：with pool.connection() as db: ...，离开with语句时自动归还连接；
+    5. 并发查询：query_many()用多个连接同时执行一组互不相关的查询，接口的耗时由各查询
+       耗时之和降为最慢的那个查询的耗时。
+有多个taosAdapter时，可以用endpoints参数指定多个服务器，见BalancedPool：只读的查询分散到各个
+服务器，写操作固定使用第一个服务器（主服务器）。
+
+Examples:
+    >>> pool = get_pool(host="192.168.3.92", user="root", password="taosdata", database="beihu_dt",
+    ...                 port=6041, link_mode=DBBase.REST_LINK)
+    >>> with pool.connection() as db:
+    ...     db.query("realtime_data", ["ts"], fetch_type=DBBase.FETCH_ONE)
+
+历史记录（按照以下格式依次添加）：
+   日期        人员	      改动情况
+2026-10-18    系统      创建。
+2026-10-18    系统      acquire()、connection()增加read_only参数；get_pool()支持多个服务器（endpoints）。
+2026-10-18    系统      connection()中抛出异常时关闭该连接。
+2026-10-18    系统      get_pool()增加name参数，连接参数改变时关闭被替换的连接池。
+"""
+
+import logging
+import threading
+import time
+from concurrent import futures
+from contextlib import contextmanager
+
+from . import DBBase
+from .TDengineDB import TDengineDB
+logger = logging.getLogger("DigitalTwinApp")
+
+# 进程内的连接池，以连接参数作为键，相同参数的连接共用一个连接池
+_pools = {}
+_pool_names = {}        # 连接池的名称 -> 该名称当前使用的连接池的键
+_pools_lock = threading.Lock()
+
+
+class TDenginePool(object):
+    """TDengine连接池，池中的每个连接都是一个已经连接好的TDengineDB对象。
+
+    Arguments:
+        min_size: 空闲回收时至少保留的连接数。
+        max_size: 最大连接数，连接全部借出时，后来者等待归还。
+        idle_timeout: 空闲连接的最长保留时间，单位为秒。
+        check_interval: 连接空闲超过该时间（秒），借出前先做健康检查；为0时每次借出都检查。
+        wait_timeout: 连接全部借出时，等待归还的最长时间，单位为秒。
+        kw: 传给TDengineDB.connect()的连接参数，如host、port、link_mode等。
+    """
+    def __init__(self, min_size: int = 1, max_size: int = 8, idle_timeout: float = 300,
+                 check_interval: float = 30, wait_timeout: float = 30, **kw) -> None:
+        assert 0 <= min_size <= max_size, "连接池的最小连接数不能大于最大连接数！"
+        assert max_size > 0, "连接池的最大连接数必须大于0！"
+
+        self._min_size = min_size
+        self._max_size = max_size
+        self._idle_timeout = idle_timeout
+        self._check_interval = check_interval
+        self._wait_timeout = wait_timeout
+        self._connect_kw = kw
+
+        self._idle = []         # 空闲连接，元素为(db, 归还时间)，列表尾部为最近归还的连接
+        self._size = 0          # 已创建的连接总数（空闲+借出）
+        self._closed = False
+        self._cond = threading.Condition(threading.Lock())
+        self._executor = None   # query_many()使用的线程池，第一次调用时创建
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb) -> None:
+        self.close()
+
+    @property
+    def size(self) -> int:
+        """已创建的连接总数。"""
+        return self._size
+
+    @property
+    def idle(self) -> int:
+        """当前空闲的连接数。"""
+        return len(self._idle)
+
+    def _create(self) -> TDengineDB:
+        """创建一个新连接，连接失败时抛出ConnectionError。"""
+        db = TDengineDB()
+        if not db.connect(**self._connect_kw):
+            raise ConnectionError(f"无法连接TDengine数据库：{self._connect_kw.get('host')}:{self._connect_kw.get('port')}")
+        return db
+
+    def _evict_idle(self) -> list:
+        """取出空闲超时的连接，由调用者在锁外关闭，调用时必须持有锁。"""
+        now = time.monotonic()
+        evicted = []
+        while self._idle and self._size > self._min_size and now - self._idle[0][1] > self._idle_timeout:
+            evicted.append(self._idle.pop(0)[0])
+            self._size -= 1
+        return evicted
+
+    @staticmethod
+    def _discard(dbs: list) -> None:
+        for db in dbs:
+            try:
+                db.close()
+            except Exception:
+                logger.warning(f"关闭数据库连接失败：{db}")
+
+    def acquire(self, timeout: float = None, read_only: bool = False) -> TDengineDB:
+        """从连接池借出一个连接，用完后必须调用release()归还。
+
+        Arguments:
+            timeout: 等待空闲连接的最长时间（秒），缺省为构造时的wait_timeout。
+            read_only: 连接只用于查询时为True，多个服务器时可以借出任意服务器的连接，见BalancedPool；
+                单个服务器时没有区别。
+        Returns:
+            已经连接好的TDengineDB对象。连接失败时抛出ConnectionError，等待超时抛出TimeoutError。
+        """
+        timeout = self._wait_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        while True:
+            db, idle_since = None, None
+            with self._cond:
+                if self._closed:
+                    raise ConnectionError("连接池已关闭！")
+                evicted = self._evict_idle()
+                while not self._idle and self._size >= self._max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._discard(evicted)
+                        raise TimeoutError(f"等待数据库连接超时（{timeout}秒），连接数已达上限{self._max_size}！")
+                    self._cond.wait(remaining)
+                if self._idle:
+                    db, idle_since = self._idle.pop()
+                else:
+                    self._size += 1
+            self._discard(evicted)
+
+            # 新建连接
+            if db is None:
+                try:
+                    return self._create()
+                except BaseException:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+
+            # 复用空闲连接，空闲较久的先做健康检查，失效的连接丢弃后重新获取
+            if time.monotonic() - idle_since < self._check_interval or db.ping():
+                return db
+            logger.warning("连接池中的连接已失效，丢弃后重新获取")
+            self._discard([db])
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+
+    def release(self, db: TDengineDB, broken: bool = False) -> None:
+        """归还连接。
+
+        Arguments:
+            db: acquire()借出的连接。
+            broken: 连接已损坏时为True，此时直接关闭而不放回连接池。
+        """
+        if db is None:
+            return
+
+        with self._cond:
+            if self._closed or broken:
+                self._size -= 1
+                discard = [db]
+            else:
+                self._idle.append((db, time.monotonic()))
+                discard = self._evict_idle()
+            self._cond.notify()
+        self._discard(discard)
+
+    @contextmanager
+    def connection(self, timeout: float = None, read_only: bool = False):
+        """以上下文管理器的方式借出连接，离开with语句时自动归还，参数见acquire()。
+
+        with语句中抛出异常时，连接的状态不确定（如请求中断、游标未读完），作为损坏的连接关闭，
+        不放回连接池，异常继续向上抛出。
+
+        Examples:
+            >>> with pool.connection(read_only=True) as db:
+            ...     db.query("realtime_data")
+        """
+        db = self.acquire(timeout, read_only)
+        try:
+            yield db
+        except BaseException:
+            self.release(db, broken=True)
+            raise
+        self.release(db)
+
+    def _run_query(self, query, columnar: bool):
+        """借用一个只读连接执行一个查询，query为SQL语句或query()的参数字典。"""
+        with self.connection(read_only=True) as db:
+            if isinstance(query, str):
+                return db._query(query, db._as_dict, columnar)
+            return db.query(**dict(query, columnar=columnar))
+
+    def query_many(self, queries: list, concurrency: int = 4, columnar: bool = False) -> list:
+        """用多个连接并发执行一组互不相关的查询。
+
+        每个查询在线程池中借用一个连接执行，同一次调用同时执行的查询不超过concurrency个，
+        避免一个接口占满连接池；多个调用者共用同一个线程池（大小为max_size）。
+        如：query_many(["SELECT LAST(*) FROM beihu_dt.realtime_data",
+                        {"table_name": "online_cleaning_data", "select_cols": ["ts", "influent_tol_q_cd"],
+                         "fetch_type": DBBase.FETCH_ONE}])
+
+        Arguments:
+            queries: 查询列表，元素为SQL语句，或TDengineDB.query()的参数字典。
+            concurrency: 本次调用同时执行的最大查询数。
+            columnar: 为True时返回列式结果，见TDengineDB._query()。
+        Returns:
+            与queries一一对应的查询结果列表，查询失败的结果为None。
+        """
+        assert concurrency > 0, "并发数必须大于0！"
+
+        queries = list(queries)
+        results = [None] * len(queries)
+        if len(queries) <= 1 or concurrency == 1:
+            for i, query in enumerate(queries):
+                try:
+                    results[i] = self._run_query(query, columnar)
+                except Exception as e:
+                    logger.error(f"查询失败：{query}，{e}")
+            return results
+
+        with self._cond:
+            if self._executor is None:
+                self._executor = futures.ThreadPoolExecutor(max_workers=self._max_size,
+                                                            thread_name_prefix="TDenginePool")
+            executor = self._executor
+
+        # 滑动窗口：同时最多提交concurrency个查询，完成一个再提交下一个
+        pending = {}
+        todo = iter(enumerate(queries))
+
+        def submit() -> None:
+            for i, query in todo:
+                pending[executor.submit(self._run_query, query, columnar)] = i
+                if len(pending) >= concurrency:
+                    break
+
+        submit()
+        while pending:
+            done, _ = futures.wait(pending, return_when=futures.FIRST_COMPLETED)
+            for future in done:
+                i = pending.pop(future)
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    logger.error(f"查询失败：{queries[i]}，{e}")
+            submit()
+
+        return results
+
+    def close(self) -> None:
+        """关闭连接池中所有空闲连接，借出的连接在归还时关闭。"""
+        with self._cond:
+            self._closed = True
+            discard = [db for db, _ in self._idle]
+            self._size -= len(discard)
+            self._idle = []
+            self._cond.notify_all()
+            executor, self._executor = self._executor, None
+        self._discard(discard)
+        if executor:
+            executor.shutdown(wait=False)
+
+
+def get_pool(min_size: int = 1, max_size: int = 8, idle_timeout: float = 300,
+             check_interval: float = 30, wait_timeout: float = 30, name: str = None, **kw) -> TDenginePool:
+    """获取进程内共享的连接池。
+
+    相同连接参数（host、port、user、database、link_mode等）共用一个连接池，第一次调用时
+    创建，之后的调用直接返回已有的连接池，池的大小等参数以第一次调用为准。
+    指定了endpoints（多个服务器）时返回BalancedPool，此时忽略host、port，池的大小等参数
+    是每个服务器的。
+    指定了name时，同一个名称只保留一个连接池：连接参数改变后（如修改了配置文件）创建新的连接池，
+    关闭被替换的连接池（空闲连接立即关闭，借出的连接归还时关闭），避免旧连接池一直占用连接。
+
+    Arguments:
+        name: 连接池的名称，如"backend"，为None时不替换旧的连接池。
+        kw: 传给TDengineDB.connect()的连接参数；BalancedPool的endpoints、strategy、cooldown参数。
+    Returns:
+        TDenginePool对象。
+    """
+    kw.setdefault("link_mode", DBBase.NATIVE_LINK)
+    if kw.get("endpoints"):
+        kw["endpoints"] = tuple(kw["endpoints"])
+    else:
+        kw.pop("endpoints", None)
+    key = tuple(sorted(kw.items()))
+    superseded = None
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None or pool._closed:
+            if "endpoints" in kw:
+                from .BalancedPool import BalancedPool
+                pool = BalancedPool(min_size=min_size, max_size=max_size, idle_timeout=idle_timeout,
+                                    check_interval=check_interval, wait_timeout=wait_timeout, **kw)
+            else:
+                pool = TDenginePool(min_size=min_size, max_size=max_size, idle_timeout=idle_timeout,
+                                    check_interval=check_interval, wait_timeout=wait_timeout, **kw)
+            _pools[key] = pool
+
+        if name is not None:
+            old_key = _pool_names.get(name)
+            _pool_names[name] = key
+            # 旧连接池不再被任何名称使用时才关闭
+            if old_key is not None and old_key != key and old_key not in _pool_names.values():
+                superseded = _pools.pop(old_key, None)
+
+    if superseded is not None:
+        logger.info(f"连接池{name}的连接参数已改变，关闭旧的连接池")
+        superseded.close()
+    return pool
+
+
+def close_all_pools() -> None:
+    """关闭进程内所有的连接池，一般在进程退出时调用。"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+        _pool_names.clear()
+    for pool in pools:
+        pool.close()
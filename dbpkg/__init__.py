@@ -6,22 +6,62 @@
 AccessDB封装了pyodbc，提供了对Access数据库的基本操作。
 SQLServerDB封装了pymssql，提供了对SQL Server数据库的基本操作。
 TDengineDB封装了taos和taosrest，提供了对TDengine数据库的基本操作。
+TDenginePool提供了进程内共享、线程安全的TDengine连接池。
+SchemaCache提供了表名及表结构的元数据缓存。
+columnar提供了查询结果的列式（NumPy数组）存储。
+LineIngester提供了无模式（schemaless）写入的后台批量写入器。
+AsyncTDengineDB提供了基于asyncio的TDengine REST客户端。
+QueryStats提供了SQL语句的执行统计及慢查询日志。
+SingleFlight提供了相同查询的合并执行。
+RollupManager提供了流计算维护的降采样汇总及汇总表的自动选择。
+SegmentCache提供了时间序列查询的分段缓存。
+InsertBuffer提供了按表合并的后台批量写入缓冲区。
+BalancedPool提供了多个服务器的连接池，只读查询分散到各个服务器。
 
 用户可以根据自己的需要，做一个重定向或者别名，就可以方便的在不同的数据库之间切换，如：
     Database = AccessDB
 然后在应用层的代码中使用Database，因为Database = AccessDB，所以实际上使用的是AccessDB。
-如果要切换到其他数据库，如SQL Server，只需修改：
-    Database = SQLServerDB
+如果要切换到其他数据库，如SQL Server，只需修改本文件中的_DATABASE：
+    _DATABASE = "SQLServerDB"
 应用层的代码可不做任何修改，就可以切换到SQL Server数据库。
+各子模块在第一次使用时才导入，数据库驱动（pyodbc、pymssql、taos、taosrest等）在第一次连接时
+才加载，未安装的驱动不影响其他数据库的使用。
 
 历史记录（按照以下格式依次添加）：
    日期        人员	      改动情况
 2023-11-21    崔树标    创建。
+2026-10-18    系统      增加TDenginePool连接池。
+2026-10-18    系统      增加SchemaCache元数据缓存。
+2026-10-18    系统      增加columnar列式查询结果。
+2026-10-18    系统      增加LineIngester无模式批量写入。
+2026-10-18    系统      增加AsyncTDengineDB异步REST客户端。
+2026-10-18    系统      增加QueryStats执行统计及慢查询日志。
+2026-10-18    系统      增加SingleFlight相同查询合并执行。
+2026-10-18    系统      增加RollupManager降采样汇总管理。
+2026-10-18    系统      增加SegmentCache时间序列分段缓存。
+2026-10-18    系统      增加InsertBuffer后台批量写入。
+2026-10-18    系统      子模块及数据库驱动改为第一次使用时才加载。
+2026-10-18    系统      增加BalancedPool多服务器连接池。
 """
 
-from . import AccessDB
-from . import SQLServerDB
-from . import TDengineDB
- 
+import importlib
+
+# 子模块在第一次访问时才导入（如dbpkg.TDengineDB），不使用的数据库封装及其依赖不会被加载
+_SUBMODULES = ("AccessDB", "SQLServerDB", "TDengineDB", "TDenginePool", "SchemaCache", "columnar",
+               "LineIngester", "AsyncTDengineDB", "QueryStats", "SingleFlight", "RollupManager",
+               "SegmentCache", "InsertBuffer", "BalancedPool")
+
 # # 根据需要，重定向Database即可
-Database = TDengineDB
+_DATABASE = "TDengineDB"
+
+
+def __getattr__(name: str):
+    if name == "Database":
+        return importlib.import_module(f".{_DATABASE}", __name__)
+    if name in _SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_SUBMODULES) | {"Database"})
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+查询结果的列式存储，将数据库返回的行数据转换为"字段名 -> NumPy数组"的字典。
+
+服务层经常需要按字段处理整列数据（如画曲线），列式结果省去了每一行构造一个字典、再逐行
+拆成各字段列表的开销。转换规则：
+    1. 时间戳（datetime）转换为int64的毫秒时间戳（epoch-ms）；
+    2. 浮点数转换为float64，空值（NULL）为NaN；
+    3. 整数、布尔值转换为int64、bool，有空值时为掩码数组（numpy.ma.MaskedArray）；
+    4. 字符串等其他类型为object数组，空值为None。
+
+时间戳需要转换为字符串时（如生成JSON），用format_ts()整列一次格式化，而不是逐个构造datetime
+对象再strftime()。配合TDengineDB的epoch_ms选项（驱动直接返回整数的毫秒时间戳），时间戳从
+数据库到字符串全程不产生datetime对象。
+
+numpy为可选依赖，只有使用列式结果时才需要安装，也只有那时才导入（load_numpy()）。
+
+历史记录（按照以下格式依次添加）：
+   日期        人员	      改动情况
+2026-10-18    系统      创建。
+2026-10-18    系统      format_ts()整列向量化格式化。
+2026-10-18    系统      增加to_records()。
+2026-10-18    系统      浮点数字段按字段类型转换，不再因第一个值为整数而截断。
+2026-10-18    系统      numpy在第一次使用列式结果时才导入。
+"""
+
+import re
+import sys
+import time
+from datetime import datetime
+
+_numpy = None
+
+
+def load_numpy():
+    """导入numpy并返回该模块。
+
+    numpy在第一次使用列式结果时才导入，导入dbpkg（及TDengineDB等）时不加载numpy。
+    未安装numpy时抛出ImportError，只是不能使用列式结果。
+    """
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+        except ImportError:
+            raise ImportError("列式查询结果需要安装numpy！")
+        _numpy = numpy
+    return _numpy
+
+
+def is_array(value) -> bool:
+    """value是否为NumPy数组。numpy还没有导入时value不可能是NumPy数组，因此不会为此导入numpy。"""
+    numpy = sys.modules.get("numpy")
+    return numpy is not None and isinstance(value, numpy.ndarray)
+
+
+def __getattr__(name):
+    # 兼容 from dbpkg.columnar import np：第一次访问时才导入numpy
+    if name == "np":
+        return load_numpy()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _ts_to_ms(value) -> int:
+    """将时间戳转换为毫秒时间戳，无时区信息的datetime按本地时间处理。"""
+    if isinstance(value, datetime):
+        return round(value.timestamp() * 1000)
+    return int(value)
+
+
+# 浮点数字段的类型：REST连接为类型名称，原生连接为类型编号（TSDB_DATA_TYPE_FLOAT、TSDB_DATA_TYPE_DOUBLE）
+FLOAT_TYPES = ("FLOAT", "DOUBLE", 6, 7)
+
+
+def is_float_type(field_type) -> bool:
+    """字段类型（类型名称或类型编号）是否为浮点数。"""
+    if isinstance(field_type, str):
+        return field_type.upper() in FLOAT_TYPES
+    return field_type in FLOAT_TYPES
+
+
+def _to_array(values: tuple, field_type=None):
+    """将一列数据转换为NumPy数组。
+
+    字段类型为浮点数时转换为float64；没有字段类型时根据第一个非空值的类型转换，但列中有浮点数时
+    也转换为float64（taosAdapter的JSON中，整数值的DOUBLE如12.0会返回为12）。
+    """
+    np = load_numpy()
+    if is_float_type(field_type):
+        # numpy会把float数组中的None转换为NaN
+        return np.array(values, dtype=np.float64)
+
+    sample = next((v for v in values if v is not None), None)
+    has_null = sample is None or any(v is None for v in values)
+
+    if sample is None:
+        return np.full(len(values), np.nan)
+
+    if isinstance(sample, datetime):
+        data = [0 if v is None else _ts_to_ms(v) for v in values]
+        dtype = np.int64
+    elif isinstance(sample, bool):
+        data = [False if v is None else v for v in values]
+        dtype = np.bool_
+    elif isinstance(sample, int):
+        if any(isinstance(v, float) for v in values):
+            return np.array(values, dtype=np.float64)
+        data = [0 if v is None else v for v in values]
+        dtype = np.int64
+    elif isinstance(sample, float):
+        # numpy会把float数组中的None转换为NaN
+        return np.array(values, dtype=np.float64)
+    else:
+        return np.array(values, dtype=object)
+
+    array = np.array(data, dtype=dtype)
+    if has_null:
+        return np.ma.masked_array(array, mask=[v is None for v in values])
+    return array
+
+
+def to_columns(cols: list, rows: list, types: list = None) -> dict:
+    """将行数据转换为列式数据。
+
+    Arguments:
+        cols: 字段名列表。
+        rows: 行数据，每一行是与cols一一对应的元组或列表。
+        types: 与cols一一对应的字段类型（游标description中的类型名称或原生连接的类型编号），
+            浮点数字段始终转换为float64；为None时根据数据推断。
+    Returns:
+        字典，key为字段名，value为该字段的NumPy数组。
+    """
+    np = load_numpy()
+
+    if not rows:
+        return {col: np.empty(0) for col in cols}
+
+    # zip(*rows)在C层面完成行列转置
+    types = types or [None] * len(cols)
+    return {col: _to_array(values, field_type) for col, values, field_type in zip(cols, zip(*rows), types)}
+
+
+def to_list(column, as_float: bool = False) -> list:
+    """将一列数据转换为可以JSON序列化的list，NaN及掩码值转换为None。
+
+    Arguments:
+        column: to_columns()返回的一列数据。
+        as_float: 数值列是否统一转换为浮点数。
+    Returns:
+        list，空值为None。
+    """
+    np = load_numpy()
+    if np.ma.isMaskedArray(column):
+        data = column.data.astype(np.float64) if as_float else column.data
+        return np.where(np.ma.getmaskarray(column), None, data).tolist()
+
+    if as_float and column.dtype.kind in "biu":
+        column = column.astype(np.float64)
+    if column.dtype.kind == "f":
+        return np.where(np.isnan(column), None, column).tolist()
+    return column.tolist()
+
+
+# format_ts()支持的格式符在"YYYY-MM-DDTHH:MM:SS.mmm"中的位置，%f为微秒（毫秒后补000）
+_FORMAT_SLICES = {"Y": (0, 4), "m": (5, 7), "d": (8, 10), "H": (11, 13), "M": (14, 16), "S": (17, 19), "f": (20, 23)}
+_FORMAT_TOKEN = re.compile(r"%(.)|([^%]+)")
+
+
+def _format_columns(fmt: str) -> list:
+    """把strftime格式拆解为字符列的来源：整数为毫秒字符串中的位置，字符串为原样输出的字符。
+    含有不支持的格式符时返回None。"""
+    columns = []
+    for directive, literal in _FORMAT_TOKEN.findall(fmt):
+        if literal:
+            columns.extend(literal)
+        elif directive == "%":
+            columns.append("%")
+        elif directive in _FORMAT_SLICES:
+            columns.extend(range(*_FORMAT_SLICES[directive]))
+            if directive == "f":
+                columns.extend("000")
+        else:
+            return None
+    return columns
+
+
+def _local_offset_ms(ms: int) -> int:
+    """指定时刻本地时区相对UTC的偏移（毫秒）。"""
+    return time.localtime(ms // 1000).tm_gmtoff * 1000
+
+
+def format_ts(column, fmt: str = "%Y-%m-%d %H:%M:%S") -> list:
+    """将毫秒时间戳列格式化为本地时间字符串列表，空值为None。
+
+    整列一次完成：时间戳加上本地时区偏移后转换为datetime64，生成"YYYY-MM-DDTHH:MM:SS.mmm"
+    格式的字符串数组，再按fmt重新排列字符。fmt只能包含%Y、%m、%d、%H、%M、%S、%f及普通字符，
+    否则（或者时间范围跨越了夏令时切换）逐个格式化。
+
+    Arguments:
+        column: 毫秒时间戳，可以是to_columns()返回的一列数据，也可以是整数列表（空值为None）。
+        fmt: strftime格式。
+    Returns:
+        字符串列表，空值为None。
+    """
+    np = load_numpy()
+    if not isinstance(column, np.ndarray):
+        column = np.ma.masked_array([0 if v is None else v for v in column],
+                                    mask=[v is None for v in column], dtype=np.int64)
+    mask = np.ma.getmaskarray(column)
+    data = np.ma.getdata(column)
+    if data.dtype.kind == "f":     # 全部为空值的时间戳列是NaN
+        mask = mask | np.isnan(data)
+        data = np.where(mask, 0, data)
+    data = data.astype(np.int64)
+    if len(data) == 0:
+        return []
+
+    valid = data[~mask]
+    columns = _format_columns(fmt)
+    offset = _local_offset_ms(int(valid.min())) if len(valid) else 0
+    if columns is None or (len(valid) and _local_offset_ms(int(valid.max())) != offset):
+        return [None if ms is None else datetime.fromtimestamp(ms / 1000).strftime(fmt)
+                for ms in to_list(np.ma.masked_array(data, mask=mask))]
+
+    text = np.datetime_as_string((data + offset).astype("datetime64[ms]"), unit="ms")
+    chars = text.astype("U23").view("U1").reshape(len(text), 23)
+    picked = np.empty((len(text), len(columns)), dtype="U1")
+    for i, source in enumerate(columns):
+        picked[:, i] = chars[:, source] if isinstance(source, int) else source
+    strings = np.ascontiguousarray(picked).view(f"U{len(columns)}").ravel()
+    if mask.any():
+        return np.where(mask, None, strings).tolist()
+    return strings.tolist()
+
+
+def to_records(result: dict, fields: list, keys: list = None, fmt: str = "%Y-%m-%d %H:%M:%S") -> list:
+    """将列式查询结果转换为可以JSON序列化的记录（字典）列表。
+
+    整列转换后再拼成行：ts用format_ts()格式化，其他字段用to_list(as_float=True)转换为浮点数，
+    空值为None；结果中没有的字段全部为None。
+
+    Arguments:
+        result: 列式查询结果，必须包含ts列。
+        fields: 要输出的字段名（不含ts）。
+        keys: 记录中对应fields的键名（如中文名称），缺省为字段名。
+        fmt: ts的strftime格式。
+    Returns:
+        字典列表，每条记录的键为"ts"及keys。
+    """
+    count = len(result["ts"])
+    columns = [format_ts(result["ts"], fmt)]
+    for field in fields:
+        columns.append(to_list(result[field], as_float=True) if field in result else [None] * count)
+
+    keys = ["ts"] + list(keys if keys is not None else fields)
+    return [dict(zip(keys, row)) for row in zip(*columns)]
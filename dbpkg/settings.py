@@ -11,8 +11,12 @@ https://docs.djangoproject.com/en/4.1/ref/settings/
 """
 
 import configparser
+import functools
 import os
+import re
 import sys
+import threading
+import time
 from pathlib import Path
 import logging
 logger = logging.getLogger("DigitalTwinApp")
@@ -32,10 +36,70 @@ def get_log_base_dir() -> str:
 
     return log_base_dir
 
+# 配置文件解析一次后缓存，文件的修改时间（mtime）变化时才重新读取，修改配置文件后不用重启进程
+CONFIG_CHECK_INTERVAL = 2.0     # 检查配置文件是否修改的最小间隔（秒），间隔内直接使用缓存，不访问磁盘
+_config_lock = threading.Lock()
+_config_cache = {}              # 配置文件的完整路径 -> [ConfigParser, mtime, 下次检查的时间, 已读取的键值]
+
+@functools.lru_cache(maxsize=None)
+def get_config_path(filename: str = "config.ini") -> str:
+    """获取配置文件的完整路径。"""
+    # # 获取当前文件所在的路径
+    # prodir = os.path.split(os.path.realpath(__file__))[0]
+
+    if getattr(sys, 'frozen', False):
+        base_path = os.path.dirname(sys.executable)
+        return os.path.join(base_path, 'DigitalTwinAPI', filename)
+    else:
+        base_path = os.path.abspath(os.path.dirname(__file__))
+        return os.path.join(base_path, filename)
+
+def _load_config(filename: str) -> list:
+    """读取配置文件，返回缓存项，见load_config()。"""
+    path = get_config_path(filename)
+    now = time.monotonic()
+    entry = _config_cache.get(path)
+    if entry is not None and now < entry[2]:
+        return entry
+
+    with _config_lock:
+        entry = _config_cache.get(path)
+        if entry is not None and now < entry[2]:
+            return entry
+
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if entry is None or entry[1] != mtime:
+            # 创建ConfigParser对象，读取文件内容，读不到则为空
+            conf = configparser.ConfigParser()
+            conf.read(path)
+            if entry is not None:
+                logger.info(f"配置文件{path}已修改，重新读取")
+            entry = [conf, mtime, 0, {}]
+            _config_cache[path] = entry
+        entry[2] = now + CONFIG_CHECK_INTERVAL
+        return entry
+
+def load_config(filename: str = "config.ini") -> configparser.ConfigParser:
+    """读取配置文件，返回缓存的ConfigParser对象。
+
+    每隔CONFIG_CHECK_INTERVAL秒最多检查一次文件的修改时间，文件被修改（或删除、重新创建）时
+    重新解析，否则直接返回缓存。返回的对象不要修改，重新读取时会整体替换为新的对象。
+
+    Arguments:
+        filename: 配置文件名。
+    Returns:
+        ConfigParser对象，文件不存在时为空的ConfigParser对象。
+    """
+    return _load_config(filename)[0]
+
 def get_Config(filename: str, section: str, option: str, default: str = None) -> str:
     """从指定的配置文件中读取配置参数。
 
     配置文件一般为ini格式的文件，该函数用于从配置文件中读取指定节内某键的值。
+    配置文件的内容是缓存的，见load_config()。
 
     Arguments:
         filename: 配置文件名。
@@ -45,28 +109,91 @@ def get_Config(filename: str, section: str, option: str, default: str = None) ->
     Returns:
         返回字符串，读取到的键值，即配置信息。
     """
-    # # 获取当前文件所在的路径
-    # prodir = os.path.split(os.path.realpath(__file__))[0]
-    
-    # 获取配置文件的完整路径
-    if getattr(sys, 'frozen', False):
-        base_path = os.path.dirname(sys.executable)
-        configpath = os.path.join(base_path, 'DigitalTwinAPI', 'config.ini')
+    conf, _, _, values = _load_config(filename)
+    key = (section, option)
+    if key in values:
+        config = values[key]
     else:
-        base_path = os.path.abspath(os.path.dirname(__file__))
-        configpath = os.path.join(base_path, 'config.ini')
-
-    # 创建ConfigParser对象
-    conf = configparser.ConfigParser()
-
-    # 读取文件内容，读不到则返回缺省值
-    conf.read(configpath)
-    config = conf.get(section, option)
+        config = values[key] = conf.get(section, option, fallback=None)
     if config:
         return config
     else:
         return default
 
+def _get_typed(convert, filename: str, section: str, option: str, default):
+    """读取配置参数并转换类型，无法读取或转换失败时返回缺省值。"""
+    value = get_Config(filename, section, option)
+    if value is None:
+        return default
+    try:
+        return convert(value.strip())
+    except ValueError:
+        logger.warning(f"配置参数[{section}] {option} = {value}无效，使用缺省值{default}")
+        return default
+
+def get_int(filename: str, section: str, option: str, default: int = None) -> int:
+    """读取整数类型的配置参数，参数同get_Config()。"""
+    return _get_typed(int, filename, section, option, default)
+
+def get_float(filename: str, section: str, option: str, default: float = None) -> float:
+    """读取浮点数类型的配置参数，参数同get_Config()。"""
+    return _get_typed(float, filename, section, option, default)
+
+def get_bool(filename: str, section: str, option: str, default: bool = None) -> bool:
+    """读取布尔类型的配置参数（1/0、yes/no、true/false、on/off），参数同get_Config()。"""
+    def convert(value: str) -> bool:
+        if value.lower() not in configparser.ConfigParser.BOOLEAN_STATES:
+            raise ValueError(value)
+        return configparser.ConfigParser.BOOLEAN_STATES[value.lower()]
+    return _get_typed(convert, filename, section, option, default)
+
+def get_list(filename: str, section: str, option: str, default: list = None) -> list:
+    """读取列表类型的配置参数，元素以逗号或换行分隔，参数同get_Config()。"""
+    value = get_Config(filename, section, option)
+    if value is None:
+        return default
+    return [item.strip() for item in re.split(r"[,\n]", value) if item.strip()]
+
+# 配置文件中LINK_MODE的取值，与DBBase.NATIVE_LINK、REST_LINK、WS_LINK一一对应
+LINK_MODES = {"native": 0, "rest": 1, "ws": 2}
+
+def get_database_config(filename: str = "config.ini", link_mode: int = None) -> dict:
+    """读取[DatabaseServer]节的数据库连接参数。
+
+    配置文件是缓存的（见load_config()），适合每次建立连接池、连接数据库时调用，配置文件修改后
+    返回新的参数。
+
+    Arguments:
+        filename: 配置文件名。
+        link_mode: 连接方式，DBBase.NATIVE_LINK、REST_LINK或WS_LINK，为None时读取该节的LINK_MODE
+            （native、rest或ws，缺省为native）。
+    Returns:
+        字典，键为host、port、user、password、database、link_mode，可以直接传给TDengineDB.connect()，
+        port为整数：原生连接为该节的PORT，REST连接、WebSocket连接为REST_PORT。REST连接、WebSocket
+        连接且配置了REST_ENDPOINTS时，还有endpoints（多个服务器，见TDenginePool.get_pool()）。
+    """
+    if link_mode is None:
+        name = (get_Config(filename, "DatabaseServer", "LINK_MODE") or "native").strip().lower()
+        if name not in LINK_MODES:
+            logger.warning(f"配置参数[DatabaseServer] LINK_MODE = {name}无效，使用原生连接")
+        link_mode = LINK_MODES.get(name, LINK_MODES["native"])
+
+    config = {
+        "host": get_Config(filename, "DatabaseServer", "HOST"),
+        "user": get_Config(filename, "DatabaseServer", "USER"),
+        "password": get_Config(filename, "DatabaseServer", "PASSWORD"),
+        "database": get_Config(filename, "DatabaseServer", "NAME"),
+        "link_mode": link_mode,
+    }
+    if link_mode == LINK_MODES["native"]:
+        config["port"] = get_int(filename, "DatabaseServer", "PORT", 6030)
+    else:
+        config["port"] = get_int(filename, "DatabaseServer", "REST_PORT", 6041)
+        endpoints = get_list(filename, "DatabaseServer", "REST_ENDPOINTS", [])
+        if endpoints:
+            config["endpoints"] = endpoints
+    return config
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 # 获取系统安装目录，即根目录
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -132,6 +259,8 @@ WSGI_APPLICATION = "DigitalTwinAPI.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.1/ref/settings/#databases
 # 从配置文件config.ini中读取数据库配置信息
+# 注意：DATABASES、SOCKET是导入时的快照，配置文件修改后不会更新；需要随配置文件更新的地方
+# 使用get_database_config()、get_Config()等函数
 DATABASES = {
     "default": {
         "HOST": get_Config("config.ini", "DatabaseServer", "HOST"), 
@@ -213,6 +342,8 @@ logger = logging.getLogger("DigitalTwinApp")
 logger.info(...)
 """
 LOG_LEVEL = get_Config("config.ini", "Log", "LEVEL", "WARNING").upper()
+# 慢查询阈值（毫秒），执行时间超过该值的SQL语句写入DT_LOG/slow_query.log，见dbpkg.QueryStats
+SLOW_QUERY_MS = get_float("config.ini", "Log", "SLOW_QUERY_MS", 1000.0)
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -246,6 +377,13 @@ LOGGING = {
             "formatter": "simple",
             'encoding': 'utf-8',
         },
+        "file_slow_query": {
+            "level": "WARNING",
+            "class": "logging.FileHandler",
+            "filename": os.path.join(LOG_DIR,"slow_query.log"),
+            "formatter": "verbose",
+            'encoding': 'utf-8',
+        },
     },
     "loggers": {
         "DigitalTwinApp": {
@@ -258,6 +396,11 @@ LOGGING = {
             "level": LOG_LEVEL,
             "propagate": True,
         },
+        "DigitalTwinApp.SlowQuery": {
+            "handlers": ["file_slow_query"],
+            "level": "WARNING",
+            "propagate": False,
+        },
         "apscheduler": {
             "handlers": ["console_app", "file_app"],
             "level": LOG_LEVEL,
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+测试用的taosrest驱动替身，不需要TDengine服务器。
+
+install()把替身登记为已加载的taosrest驱动（DBBase._drivers），之后TDengineDB以REST方式
+连接时使用替身。替身记录执行过的SQL语句，查询结果由handler决定：
+
+    handler(sql) -> (字段名列表, 字段类型列表, 记录列表)，或 (字段名列表, 字段类型列表, 记录列表, rowcount)
+
+handler抛出的异常作为执行失败。服务器地址（"host:port"）加入down后，连接该服务器失败，
+已建立的连接执行SQL语句也失败。
+
+Examples:
+    >>> driver = install(lambda sql: (["ts", "v"], [9, 7], [(1, 2.0)]))
+    >>> db = connect_db()
+    >>> db.query("t")
+    >>> driver.sqls
+    >>> uninstall()
+
+历史记录（按照以下格式依次添加）：
+   日期        人员	      改动情况
+2026-10-18    系统      创建。
+"""
+
+import threading
+
+from dbpkg import DBBase
+from dbpkg.TDengineDB import TDengineDB
+
+
+class Error(Exception):
+    errno = 0
+    msg = ""
+
+
+def empty_result(sql: str) -> tuple:
+    return [], [], []
+
+
+class TaosRestCursor(object):
+    def __init__(self, driver, conn) -> None:
+        self._driver = driver
+        self._conn = conn
+        self.description = None
+        self.rowcount = 0
+        self._rows = []
+
+    def execute(self, sql: str, req_id=None) -> int:
+        if self._conn.url in self._driver.down:
+            raise Error(f"服务器{self._conn.url}不可用")
+        with self._driver.lock:
+            self._driver.sqls.append(sql)
+        result = self._driver.handler(sql)
+        names, types, rows = result[:3]
+        self.description = [(name, type_) + (None,) * 5 for name, type_ in zip(names, types)]
+        self._rows = list(rows)
+        self.rowcount = result[3] if len(result) > 3 else len(self._rows)
+        return self.rowcount
+
+    def fetchall(self) -> list:
+        rows, self._rows = self._rows, []
+        return rows
+
+    def fetchmany(self, size: int = 1) -> list:
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def close(self) -> None:
+        pass
+
+
+class TaosRestConnection(object):
+    def __init__(self, driver, **kw) -> None:
+        self._driver = driver
+        self.url = kw.get("url")
+        self.closed = False
+
+    def cursor(self) -> TaosRestCursor:
+        return TaosRestCursor(self._driver, self)
+
+    def commit(self) -> None:
+        pass
+
+    def rollback(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class FakeTaosRest(object):
+    """taosrest模块的替身。"""
+    Error = Error
+    TaosRestCursor = TaosRestCursor
+    TaosRestConnection = TaosRestConnection
+
+    def __init__(self, handler=None) -> None:
+        self.handler = handler or empty_result
+        self.sqls = []
+        self.connections = []
+        self.down = set()       # 不可用的服务器地址
+        self.lock = threading.Lock()
+
+    def connect(self, **kw) -> TaosRestConnection:
+        if kw.get("url") in self.down:
+            raise Error(f"无法连接服务器{kw.get('url')}")
+        conn = TaosRestConnection(self, **kw)
+        with self.lock:
+            self.connections.append(conn)
+        return conn
+
+
+_saved = []
+
+
+def install(handler=None) -> FakeTaosRest:
+    """用替身代替taosrest驱动，返回替身。"""
+    driver = FakeTaosRest(handler)
+    _saved.append(DBBase._drivers.get("taosrest", _saved))
+    DBBase._drivers["taosrest"] = driver
+    return driver
+
+
+def uninstall() -> None:
+    """恢复install()之前的taosrest驱动。"""
+    saved = _saved.pop()
+    if saved is _saved:
+        DBBase._drivers.pop("taosrest", None)
+    else:
+        DBBase._drivers["taosrest"] = saved
+
+
+def db_config(**kw) -> dict:
+    """测试用的连接参数，表结构不缓存。"""
+    return {"host": "http://fake", "port": 6041, "database": "testdb",
+            "link_mode": DBBase.REST_LINK, "schema_ttl": 0, **kw}
+
+
+def connect_db(**kw) -> TDengineDB:
+    """用替身驱动连接的TDengineDB。"""
+    db = TDengineDB()
+    assert db.connect(**db_config(**kw)), "连接替身数据库失败！"
+    return db
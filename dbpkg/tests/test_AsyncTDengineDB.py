@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AsyncTDengineDB的测试：在本机启动一个http.server，按SQL语句返回预先准备的/rest/sql响应。
+
+运行：在项目根目录执行 python -m unittest dbpkg.tests.test_AsyncTDengineDB
+
+历史记录（按照以下格式依次添加）：
+   日期        人员	      改动情况
+2026-10-18    系统      创建。
+"""
+
+import asyncio
+import json
+import threading
+import time
+import unittest
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from dbpkg import DBBase
+from dbpkg.AsyncTDengineDB import AsyncTDengineDB
+
+# 按顺序匹配SQL语句中包含的关键字：(关键字, HTTP状态码, 响应的JSON)
+RESPONSES = [
+    ("SERVER_VERSION", 200, {"code": 0, "column_meta": [["server_version()", "VARCHAR", 8]],
+                             "data": [["3.3.0.0"]], "rows": 1}),
+    ("no_such_table", 200, {"code": 9826, "desc": "Table does not exist"}),
+    ("server_error", 500, {"code": 65535, "desc": "internal error"}),
+    ("DESCRIBE", 200, {"code": 0,
+                       "column_meta": [["field", "VARCHAR", 64], ["type", "VARCHAR", 32],
+                                       ["length", "INT", 4], ["note", "VARCHAR", 16]],
+                       "data": [["ts", "TIMESTAMP", 8, ""], ["val", "DOUBLE", 8, ""]], "rows": 2}),
+    ("INSERT", 200, {"code": 0, "column_meta": [["affected_rows", "INT", 4]], "data": [[2]], "rows": 1}),
+    ("realtime_data", 200, {"code": 0,
+                            "column_meta": [["ts", "TIMESTAMP", 8], ["val", "DOUBLE", 8]],
+                            "data": [["2026-10-18T00:00:00.000+08:00", 1.5],
+                                     ["2026-10-18T00:10:00.000+08:00", None]],
+                            "rows": 2}),
+]
+SLOW_KEYWORD = "slow_table"     # 查询该表时服务端等待SLOW_SECONDS秒才响应
+SLOW_SECONDS = 2
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        sql = self.rfile.read(int(self.headers["Content-Length"])).decode("utf-8")
+        self.server.requests.append((self.path, sql))
+        if SLOW_KEYWORD in sql:
+            time.sleep(SLOW_SECONDS)
+        self.server.clients.add(self.client_address)
+        status, result = next(((status, result) for keyword, status, result in RESPONSES if keyword in sql),
+                              (200, {"code": 0, "column_meta": [], "data": [], "rows": 0}))
+        body = json.dumps(result).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class AsyncTDengineDBTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        cls.server.daemon_threads = True
+        cls.server.requests = []
+        cls.server.clients = set()      # 客户端的(地址, 端口)，即不同的连接
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def run_async(self, coro_func, **kw):
+        """连接本机的服务端后执行coro_func(db)，返回其结果，kw为connect()的其他参数。"""
+        async def main():
+            async with AsyncTDengineDB() as db:
+                ok = await db.connect(host="127.0.0.1", port=self.server.server_address[1],
+                                      database="beihu_dt", timeout=0.5, schema_ttl=0, **kw)
+                self.assertTrue(ok)
+                return await coro_func(db)
+        return asyncio.run(main())
+
+    def test_query(self):
+        rows = self.run_async(lambda db: db.query("realtime_data", ["ts", "val"], conditions="val >= 0"))
+        self.assertEqual(rows, [{"ts": datetime.fromisoformat("2026-10-18T00:00:00.000+08:00"), "val": 1.5},
+                                {"ts": datetime.fromisoformat("2026-10-18T00:10:00.000+08:00"), "val": None}])
+        path, sql = self.server.requests[-1]
+        self.assertEqual(path, "/rest/sql/beihu_dt")
+        self.assertIn("FROM beihu_dt.realtime_data", sql)
+        self.assertIn("val >= 0", sql)
+
+    def test_query_fetch_one(self):
+        rows = self.run_async(lambda db: db.query("realtime_data", ["ts", "val"], DBBase.FETCH_ONE))
+        self.assertEqual(rows[0]["val"], 1.5)
+        self.assertTrue(self.server.requests[-1][1].endswith("LIMIT 1"))
+
+    def test_concurrent_queries(self):
+        # 同时执行的查询共用长连接池，同时进行的请求不超过max_connections个
+        self.server.clients.clear()
+
+        async def run(db):
+            return await asyncio.gather(*(db.query("realtime_data", ["ts", "val"], conditions=f"val >= {i}")
+                                          for i in range(10)))
+        results = self.run_async(run, max_connections=3)
+        self.assertEqual(len(results), 10)
+        self.assertTrue(all(len(rows) == 2 and rows[0]["val"] == 1.5 for rows in results))
+        # connect()的一个连接加上最多3个并发的连接
+        self.assertLessEqual(len(self.server.clients), 4)
+        sqls = [sql for _, sql in self.server.requests[-10:]]
+        self.assertEqual(sorted(sqls), sorted(f"SELECT ts,val FROM beihu_dt.realtime_data WHERE val >= {i}"
+                                              for i in range(10)))
+
+    def test_insert(self):
+        ok = self.run_async(lambda db: db.insert("realtime_data", [{"ts": "2026-10-18 00:00:00", "val": 1.5},
+                                                                   {"ts": "2026-10-18 00:10:00", "val": 2}]))
+        self.assertTrue(ok)
+        sql = self.server.requests[-1][1]
+        self.assertTrue(sql.startswith("INSERT INTO"))
+        self.assertIn("realtime_data", sql)
+        self.assertIn("'2026-10-18 00:10:00'", sql)
+
+    def test_describe(self):
+        columns = self.run_async(lambda db: db.describe("realtime_data"))
+        self.assertEqual([column[:2] for column in columns], [("ts", "TIMESTAMP"), ("val", "DOUBLE")])
+        self.assertEqual(self.server.requests[-1][1], "DESCRIBE beihu_dt.realtime_data")
+
+    def test_connect_timeout(self):
+        # 不可达的地址（TEST-NET-1）建立连接超过timeout时，connect()返回False而不是一直等待
+        async def main():
+            db = AsyncTDengineDB()
+            start = time.monotonic()
+            ok = await db.connect(host="192.0.2.1", port=6041, database="beihu_dt", timeout=0.3)
+            return ok, time.monotonic() - start
+        ok, elapsed = asyncio.run(main())
+        self.assertFalse(ok)
+        self.assertLess(elapsed, 5)
+
+    def test_error(self):
+        # 数据库返回错误码、HTTP错误时查询返回None，连接仍可继续使用
+        async def run(db):
+            return (await db.query("no_such_table"), await db.query("server_error"),
+                    await db.query("realtime_data"))
+        missing, failed, rows = self.run_async(run)
+        self.assertIsNone(missing)
+        self.assertIsNone(failed)
+        self.assertEqual(len(rows), 2)
+
+    def test_insert_error(self):
+        ok = self.run_async(lambda db: db.insert("no_such_table", [{"ts": "2026-10-18 00:00:00", "val": 1}]))
+        self.assertFalse(ok)
+
+    def test_timeout(self):
+        # 响应超过timeout（0.5秒）时查询返回None，不等待服务端响应；超时的连接不再复用
+        async def run(db):
+            start = time.monotonic()
+            rows = await db.query(SLOW_KEYWORD)
+            elapsed = time.monotonic() - start
+            return rows, elapsed, await db.query("realtime_data")
+        rows, elapsed, after = self.run_async(run)
+        self.assertIsNone(rows)
+        self.assertLess(elapsed, SLOW_SECONDS)
+        self.assertEqual(len(after), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
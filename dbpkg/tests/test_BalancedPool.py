@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+BalancedPool的测试：写操作使用主服务器、只读查询的分配策略、连接失败时的切换及冷却，
+使用替身驱动（fake_taosrest），不需要TDengine服务器。
+
+运行：在项目根目录执行 python -m unittest dbpkg.tests.test_BalancedPool
+
+历史记录（按照以下格式依次添加）：
+   日期        人员	      改动情况
+2026-10-18    系统      创建。
+"""
+
+import time
+import unittest
+
+from dbpkg import TDenginePool
+from dbpkg.BalancedPool import LEAST_OUTSTANDING, ROUND_ROBIN, BalancedPool, parse_endpoint
+from dbpkg.tests import fake_taosrest
+
+A, B, C = "http://a:6041", "http://b:6041", "http://c:6041"
+
+
+def url(db) -> str:
+    return f"{db._host}:{db._port}"
+
+
+class BalancedPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.driver = fake_taosrest.install()
+        self.addCleanup(fake_taosrest.uninstall)
+
+    def new_pool(self, endpoints=(A, B), **kw) -> BalancedPool:
+        config = fake_taosrest.db_config(**kw)
+        config.pop("host")
+        pool = BalancedPool(list(endpoints), **config)
+        self.addCleanup(pool.close)
+        return pool
+
+    def read(self, pool: BalancedPool) -> str:
+        with pool.connection(read_only=True) as db:
+            return url(db)
+
+    def test_parse_endpoint(self):
+        self.assertEqual(parse_endpoint("192.168.3.92:6041"), ("192.168.3.92", 6041))
+        self.assertEqual(parse_endpoint("http://192.168.3.92:6041"), ("http://192.168.3.92", 6041))
+        self.assertEqual(parse_endpoint("192.168.3.92", 6041), ("192.168.3.92", 6041))
+        self.assertEqual(parse_endpoint(("192.168.3.93", "6042")), ("192.168.3.93", 6042))
+
+    def test_writes_use_primary(self):
+        pool = self.new_pool()
+        for _ in range(3):
+            with pool.connection() as db:
+                self.assertEqual(url(db), A)
+
+    def test_round_robin(self):
+        pool = self.new_pool((A, B, C), strategy=ROUND_ROBIN)
+        self.assertEqual([self.read(pool) for _ in range(6)], [A, B, C, A, B, C])
+
+    def test_least_outstanding(self):
+        pool = self.new_pool(strategy=LEAST_OUTSTANDING)
+        first = pool.acquire(read_only=True)
+        second = pool.acquire(read_only=True)
+        self.assertNotEqual(url(first), url(second))
+        pool.release(first)
+
+        # 另一个服务器还有一个未归还的连接，只读查询都分配到空闲的服务器
+        self.assertEqual({self.read(pool) for _ in range(4)}, {url(first)})
+        pool.release(second)
+        self.assertEqual({self.read(pool) for _ in range(4)}, {A, B})
+
+    def test_failover_and_cooldown(self):
+        pool = self.new_pool(strategy=ROUND_ROBIN, cooldown=0.2)
+        self.driver.down.add(B)
+        self.assertEqual([self.read(pool) for _ in range(4)], [A, A, A, A])
+        status = {item["endpoint"]: item for item in pool.status()}
+        self.assertFalse(status[B]["available"])
+        self.assertTrue(status[A]["primary"])
+        self.assertEqual(status[B]["outstanding"], 0)
+
+        # 冷却结束、服务器恢复后重新参与分配
+        self.driver.down.discard(B)
+        time.sleep(0.3)
+        self.assertIn(B, {self.read(pool) for _ in range(2)})
+        self.assertTrue(all(item["available"] for item in pool.status()))
+
+    def test_cooling_servers_are_tried_last(self):
+        pool = self.new_pool(strategy=ROUND_ROBIN, cooldown=60, check_interval=0)
+        self.driver.down.add(B)
+        self.read(pool)
+        self.read(pool)
+        # A的空闲连接在借出前的健康检查中失效，只剩冷却中的B时仍然尝试连接
+        self.driver.down.add(A)
+        self.driver.down.discard(B)
+        self.assertEqual(self.read(pool), B)
+
+    def test_all_down(self):
+        pool = self.new_pool()
+        self.driver.down.update({A, B})
+        with self.assertRaises(ConnectionError):
+            pool.acquire(read_only=True)
+        self.assertTrue(all(item["outstanding"] == 0 for item in pool.status()))
+
+    def test_primary_down(self):
+        pool = self.new_pool()
+        self.driver.down.add(A)
+        with self.assertRaises(ConnectionError):
+            pool.acquire()
+        self.assertEqual(self.read(pool), B)
+
+    def test_release_foreign_connection(self):
+        pool = self.new_pool()
+        other = fake_taosrest.connect_db()
+        pool.release(other)
+        self.assertTrue(self.driver.connections[-1].closed)
+        self.assertEqual(pool.size, 0)
+
+    def test_get_pool(self):
+        self.addCleanup(TDenginePool.close_all_pools)
+        config = fake_taosrest.db_config()
+        pool = TDenginePool.get_pool(endpoints=[A, B], **config)
+        self.assertIsInstance(pool, BalancedPool)
+        self.assertIs(TDenginePool.get_pool(endpoints=(A, B), **config), pool)
+
+    def test_query_many(self):
+        self.driver.handler = lambda sql: (["n"], [4], [(int(sql.split()[1]),)])
+        pool = self.new_pool(max_size=2)
+        results = pool.query_many([f"SELECT {n}" for n in range(8)], concurrency=4)
+        self.assertEqual([result[0]["n"] for result in results], list(range(8)))
+        self.assertLessEqual(pool.size, 4)
+        self.assertEqual(pool.idle, pool.size)
+
+
+if __name__ == "__main__":
+    unittest.main()
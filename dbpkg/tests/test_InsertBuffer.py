@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+InsertBuffer的测试：用内存中的连接池代替数据库，检查攒批写入、flush()、失败重试及spool文件的重新写入。
+
+运行：在项目根目录执行 python -m unittest dbpkg.tests.test_InsertBuffer
+
+历史记录（按照以下格式依次添加）：
+   日期        人员	      改动情况
+2026-10-18    系统      创建。
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from contextlib import contextmanager
+
+from dbpkg.InsertBuffer import InsertBuffer
+
+
+class FakeDB(object):
+    """记录insert()的调用，fail_times次之后才写入成功。"""
+    def __init__(self, fail_times: int = 0) -> None:
+        self.fail_times = fail_times
+        self.calls = []         # (表名, 记录列表)，包括失败的调用
+        self.rows = {}          # 表名 -> 写入成功的记录
+
+    def insert(self, table_name, rows):
+        self.calls.append((table_name, list(rows)))
+        if self.fail_times:
+            self.fail_times -= 1
+            return False
+        self.rows.setdefault(table_name, []).extend(rows)
+        return True
+
+
+class FakePool(object):
+    def __init__(self, db: FakeDB) -> None:
+        self.db = db
+
+    @contextmanager
+    def connection(self, timeout=None, read_only=False):
+        yield self.db
+
+
+class InsertBufferTest(unittest.TestCase):
+    def setUp(self):
+        self.spool_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.spool_dir, ignore_errors=True)
+
+    def test_flush_merges_by_table(self):
+        db = FakeDB()
+        written = []
+        with InsertBuffer(FakePool(db), max_delay=10, on_written=lambda t, rows: written.append((t, len(rows)))) as buffer:
+            buffer.put("a", {"ts": 1, "v": 1})
+            buffer.put_many("a", [{"ts": 2, "v": 2}, {"ts": 3, "v": 3}])
+            buffer.put("b", [4, 4])
+            self.assertTrue(buffer.flush(5))
+            self.assertEqual(buffer.written, 4)
+            self.assertEqual(buffer.pending, 0)
+        self.assertEqual(sorted(len(rows) for _, rows in db.calls), [1, 3])
+        self.assertEqual(sorted(written), [("a", 3), ("b", 1)])
+
+    def test_batch_rows(self):
+        db = FakeDB()
+        with InsertBuffer(FakePool(db), batch_rows=2, max_delay=10) as buffer:
+            buffer.put_many("a", [{"ts": i} for i in range(5)])
+            self.assertTrue(buffer.flush(5))
+        self.assertEqual([len(rows) for _, rows in db.calls], [2, 2, 1])
+        self.assertEqual([row["ts"] for row in db.rows["a"]], list(range(5)))
+
+    def test_max_delay(self):
+        db = FakeDB()
+        with InsertBuffer(FakePool(db), max_delay=0.1) as buffer:
+            buffer.put("a", {"ts": 1})
+            deadline = time.monotonic() + 5
+            while not db.rows and time.monotonic() < deadline:
+                time.sleep(0.02)
+        self.assertEqual(db.rows["a"], [{"ts": 1}])
+
+    def test_retry(self):
+        db = FakeDB(fail_times=1)
+        with InsertBuffer(FakePool(db), retries=1, max_delay=10) as buffer:
+            buffer.put("a", {"ts": 1})
+            self.assertTrue(buffer.flush(5))
+            self.assertEqual(buffer.written, 1)
+        self.assertEqual(len(db.calls), 2)
+
+    def test_drop_without_spool(self):
+        db = FakeDB(fail_times=10)
+        with InsertBuffer(FakePool(db), retries=0, max_delay=10) as buffer:
+            buffer.put("a", {"ts": 1})
+            self.assertTrue(buffer.flush(5))
+            self.assertEqual(buffer.dropped, 1)
+            self.assertEqual(buffer.written, 0)
+
+    def test_spool_and_replay(self):
+        # 写入失败的记录保存到spool文件，之后（包括进程重启后）重新写入
+        db = FakeDB(fail_times=1)
+        with InsertBuffer(FakePool(db), retries=0, max_delay=10, spool_dir=self.spool_dir,
+                          replay_interval=3600) as buffer:
+            buffer.put("a", {"ts": "2026-10-18 00:00:00", "v": 1.5})
+            self.assertTrue(buffer.flush(5))
+            self.assertEqual(buffer.spooled, 1)
+        self.assertEqual(os.listdir(self.spool_dir), ["a.jsonl"])
+        self.assertNotIn("a", db.rows)
+
+        # 新的缓冲区启动时重新写入spool文件中的记录
+        with InsertBuffer(FakePool(db), retries=0, spool_dir=self.spool_dir, replay_interval=3600) as buffer:
+            deadline = time.monotonic() + 5
+            while buffer.written < 1 and time.monotonic() < deadline:
+                time.sleep(0.02)
+            self.assertEqual(buffer.written, 1)
+            self.assertEqual(buffer.spooled, 0)
+        self.assertEqual(db.rows["a"], [{"ts": "2026-10-18 00:00:00", "v": 1.5}])
+        self.assertEqual(os.listdir(self.spool_dir), [])
+
+    def test_put_after_close(self):
+        buffer = InsertBuffer(FakePool(FakeDB()))
+        buffer.close()
+        with self.assertRaises(AssertionError):
+            buffer.put("a", {"ts": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
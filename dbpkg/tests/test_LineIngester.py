@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+LineIngester的测试：用内存中的连接池代替数据库，检查按行数、字节数、等待时间攒批，失败重试，
+以及队列满时put()的背压。
+
+运行：在项目根目录执行 python -m unittest dbpkg.tests.test_LineIngester
+
+历史记录（按照以下格式依次添加）：
+   日期        人员	      改动情况
+2026-10-18    系统      创建。
+"""
+
+import queue
+import threading
+import time
+import unittest
+from contextlib import contextmanager
+
+from dbpkg.LineIngester import LineIngester
+
+
+class FakeDB(object):
+    """记录ingest_lines()的调用，fail_times次之后才写入成功；gate不为None时等待gate后才写入。"""
+    def __init__(self, fail_times: int = 0, gate: threading.Event = None) -> None:
+        self.fail_times = fail_times
+        self.gate = gate
+        self.batches = []       # 写入成功的每一批
+
+    def ingest_lines(self, lines, precision="ms"):
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.fail_times:
+            self.fail_times -= 1
+            return False
+        self.batches.append(list(lines))
+        return True
+
+
+class FakePool(object):
+    def __init__(self, db: FakeDB) -> None:
+        self.db = db
+
+    @contextmanager
+    def connection(self, timeout=None, read_only=False):
+        yield self.db
+
+
+def lines(count: int) -> list:
+    return [f"signal,train=1_1 do={i}i {1704067200000 + i}" for i in range(count)]
+
+
+class LineIngesterTest(unittest.TestCase):
+    def test_batch_lines(self):
+        db = FakeDB()
+        with LineIngester(FakePool(db), batch_lines=2, max_delay=10) as ingester:
+            ingester.put_many(lines(5))
+            self.assertTrue(ingester.flush(5))
+            self.assertEqual(ingester.written, 5)
+        self.assertEqual([len(batch) for batch in db.batches], [2, 2, 1])
+        self.assertEqual(sum(db.batches, []), lines(5))
+
+    def test_batch_bytes(self):
+        db = FakeDB()
+        size = len(lines(1)[0]) + 1
+        with LineIngester(FakePool(db), batch_bytes=3 * size, max_delay=10) as ingester:
+            ingester.put_many(lines(7))
+            ingester.flush(5)
+        self.assertEqual([len(batch) for batch in db.batches], [3, 3, 1])
+
+    def test_max_delay(self):
+        db = FakeDB()
+        with LineIngester(FakePool(db), max_delay=0.1) as ingester:
+            ingester.put(lines(1)[0])
+            time.sleep(0.5)
+            self.assertEqual(db.batches, [lines(1)])
+
+    def test_tuple_lines(self):
+        db = FakeDB()
+        with LineIngester(FakePool(db)) as ingester:
+            ingester.put(("signal", {"train": "1_1"}, {"do": 2.5, "state": 1}, 1704067200000))
+        self.assertEqual(db.batches, [["signal,train=1_1 do=2.5,state=1i 1704067200000"]])
+
+    def test_close_writes_pending(self):
+        db = FakeDB()
+        ingester = LineIngester(FakePool(db), max_delay=10)
+        ingester.put_many(lines(3))
+        ingester.close()
+        self.assertEqual(db.batches, [lines(3)])
+        with self.assertRaises(AssertionError):
+            ingester.put(lines(1)[0])
+
+    def test_retry(self):
+        db = FakeDB(fail_times=1)
+        with LineIngester(FakePool(db), retries=1) as ingester:
+            ingester.put_many(lines(2))
+            self.assertTrue(ingester.flush(5))
+            self.assertEqual((ingester.written, ingester.dropped), (2, 0))
+        self.assertEqual(db.batches, [lines(2)])
+
+    def test_drop_after_retries(self):
+        db = FakeDB(fail_times=1)
+        with LineIngester(FakePool(db), retries=0) as ingester:
+            ingester.put_many(lines(2))
+            ingester.flush(5)
+            self.assertEqual((ingester.written, ingester.dropped), (0, 2))
+
+    def test_backpressure(self):
+        gate = threading.Event()
+        db = FakeDB(gate=gate)
+        ingester = LineIngester(FakePool(db), batch_lines=1, max_pending=2, put_timeout=0.1)
+        try:
+            # 后台线程阻塞在第一批的写入上，队列最多再放入2行
+            with self.assertRaises(queue.Full):
+                for line in lines(10):
+                    ingester.put(line)
+            self.assertEqual(ingester.pending, 2)
+        finally:
+            gate.set()
+            ingester.close(5)
+        self.assertEqual(ingester.written, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
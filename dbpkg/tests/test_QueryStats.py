@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+QueryStats的测试：语句形状、按形状汇总、钩子、慢查询日志，以及TDengineDB执行的语句的统计，
+使用替身驱动（fake_taosrest），不需要TDengine服务器。
+
+运行：在项目根目录执行 python -m unittest dbpkg.tests.test_QueryStats
+
+历史记录（按照以下格式依次添加）：
+   日期        人员	      改动情况
+2026-10-18    系统      创建。
+"""
+
+import logging
+import unittest
+from unittest import mock
+
+from dbpkg import QueryStats
+from dbpkg.tests import fake_taosrest
+
+
+def event(sql: str, seconds: float = 0.001, rows: int = 0, error: bool = False) -> QueryStats.QueryEvent:
+    return QueryStats.QueryEvent(sql, QueryStats.shape_of(sql), seconds, rows, 0, "test.py:1 f", "FakeDB", error)
+
+
+class ShapeTest(unittest.TestCase):
+    def test_constants(self):
+        self.assertEqual(QueryStats.shape_of("SELECT * FROM db.t WHERE ts >= '2024-01-01' AND q > 10.5"),
+                         "SELECT * FROM db.t WHERE ts >= ? AND q > ?")
+        self.assertEqual(QueryStats.shape_of("SELECT v1, t2 FROM db.t_3 WHERE s = 'it\\'s'"),
+                         "SELECT v1, t2 FROM db.t_3 WHERE s = ?")
+
+    def test_fold_lists(self):
+        self.assertEqual(QueryStats.shape_of("INSERT INTO db.t VALUES (1,'a')(2,'b')\n(3,'c')"),
+                         "INSERT INTO db.t VALUES (?)...")
+        self.assertEqual(QueryStats.shape_of("SELECT * FROM t WHERE id IN (1, 2, 3)"),
+                         QueryStats.shape_of("SELECT * FROM t WHERE id IN (4)"))
+
+
+class QueryStatsTest(unittest.TestCase):
+    def setUp(self):
+        self.stats = QueryStats.QueryStats(slow_threshold=None)
+
+    def test_aggregate_by_shape(self):
+        self.stats.record(event("SELECT * FROM t WHERE v > 1", 0.002, rows=3))
+        self.stats.record(event("SELECT * FROM t WHERE v > 2", 0.2, rows=5, error=True))
+        self.stats.record(event("DELETE FROM t", 0.001))
+
+        first = self.stats.top(1)[0]
+        self.assertEqual(first["shape"], "SELECT * FROM t WHERE v > ?")
+        self.assertEqual(first["sample"], "SELECT * FROM t WHERE v > 1")
+        self.assertEqual((first["count"], first["rows"], first["errors"]), (2, 8, 1))
+        self.assertAlmostEqual(first["total"], 0.202)
+        self.assertAlmostEqual(first["max"], 0.2)
+        self.assertEqual(first["histogram"]["<=5ms"], 1)
+        self.assertEqual(first["histogram"]["<=500ms"], 1)
+        self.assertEqual(first["call_sites"], ["test.py:1 f"])
+
+        self.assertEqual([item["shape"] for item in self.stats.top(key="count")],
+                         ["SELECT * FROM t WHERE v > ?", "DELETE FROM t"])
+        self.stats.reset()
+        self.assertEqual(self.stats.top(), [])
+
+    def test_max_shapes(self):
+        with mock.patch.object(QueryStats, "MAX_SHAPES", 2):
+            for table in ("a", "b", "c", "d"):
+                self.stats.record(event(f"SELECT * FROM {table}"))
+        shapes = {item["shape"]: item["count"] for item in self.stats.top()}
+        self.assertEqual(shapes, {"SELECT * FROM a": 1, "SELECT * FROM b": 1, "<other>": 2})
+
+    def test_hooks(self):
+        events = []
+
+        def broken(e):
+            raise ValueError("钩子出错")
+        self.stats.add_hook(broken)
+        self.stats.add_hook(events.append)
+        self.stats.record(event("SELECT 1"))
+        self.stats.remove_hook(events.append)
+        self.stats.record(event("SELECT 2"))
+        self.assertEqual([e.sql for e in events], ["SELECT 1"])
+
+    def test_slow_query_log(self):
+        self.stats.slow_threshold = 0.1
+        slow_logger = logging.getLogger("DigitalTwinApp.tests.SlowQuery")
+        with mock.patch.object(QueryStats, "_get_slow_logger", return_value=slow_logger):
+            with self.assertLogs(slow_logger, logging.WARNING) as logs:
+                self.stats.record(event("SELECT * FROM fast", 0.01))
+                self.stats.record(event("SELECT * FROM slow", 0.5))
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("SELECT * FROM slow", logs.output[0])
+
+    def test_tracker(self):
+        with QueryStats._Tracker(self.stats, self, "SELECT * FROM t") as t:
+            t.result([{"s": "abcd", "v": 1}, {"s": "ef", "v": 2}])
+        with QueryStats._Tracker(self.stats, self, "INSERT INTO t VALUES (1)") as t:
+            t.result(5, 24)
+        with self.assertRaises(ValueError):
+            with QueryStats._Tracker(self.stats, self, "DELETE FROM t"):
+                raise ValueError("执行失败")
+
+        items = {item["shape"]: item for item in self.stats.top()}
+        self.assertEqual((items["SELECT * FROM t"]["rows"], items["SELECT * FROM t"]["bytes"]), (2, 22))
+        self.assertEqual((items["INSERT INTO t VALUES (?)"]["rows"],
+                          items["INSERT INTO t VALUES (?)"]["bytes"]), (5, 24))
+        self.assertEqual(items["DELETE FROM t"]["errors"], 1)
+
+    def test_disabled(self):
+        self.stats.enabled = False
+        with QueryStats._Tracker(self.stats, self, "SELECT 1") as t:
+            t.result([[1]])
+        self.assertEqual(self.stats.top(), [])
+
+
+class TDengineDBStatsTest(unittest.TestCase):
+    def setUp(self):
+        fake_taosrest.install(lambda sql: (["ts", "v"], [9, 7], [(1, 1.0), (2, 2.0)]))
+        self.addCleanup(fake_taosrest.uninstall)
+        self.stats = QueryStats.get_stats()
+        self.addCleanup(setattr, self.stats, "slow_threshold", self.stats.slow_threshold)
+        self.stats.slow_threshold = None
+        self.stats.reset()
+        self.addCleanup(self.stats.reset)
+
+    def test_queries_are_tracked(self):
+        db = fake_taosrest.connect_db()
+        for v in (1, 2, 3):
+            db.execute(f"SELECT ts, v FROM testdb.t WHERE v > {v}")
+        item = QueryStats.top(1)[0]
+        self.assertEqual(item["shape"], "SELECT ts, v FROM testdb.t WHERE v > ?")
+        self.assertEqual((item["count"], item["rows"]), (3, 6))
+        self.assertIn("SELECT ts, v FROM testdb.t WHERE v > ?", QueryStats.dump(1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+RollupManager的测试：choose()对汇总表的选择、已创建汇总表列表的缓存，以及query()读取的表，
+使用替身驱动（fake_taosrest），不需要TDengine服务器。
+
+运行：在项目根目录执行 python -m unittest dbpkg.tests.test_RollupManager
+
+历史记录（按照以下格式依次添加）：
+   日期        人员	      改动情况
+2026-10-18    系统      创建。
+"""
+
+import unittest
+
+from dbpkg.RollupManager import RollupManager, duration_ms, stream_name, target_name
+from dbpkg.TDenginePool import TDenginePool
+from dbpkg.tests import fake_taosrest
+
+
+class RollupManagerTest(unittest.TestCase):
+    def setUp(self):
+        self.stables = ["realtime_data_10m", "realtime_data_2h", "online_cleaning_data_10m"]
+
+        def handler(sql):
+            if "information_schema.ins_stables" in sql:
+                return ["stable_name"], [8], [(name,) for name in self.stables]
+            return ["ts", "do"], [9, 7], []
+        self.driver = fake_taosrest.install(handler)
+        self.addCleanup(fake_taosrest.uninstall)
+        self.pool = TDenginePool(**fake_taosrest.db_config())
+        self.addCleanup(self.pool.close)
+
+        self.manager = RollupManager(self.pool)
+        for interval in ("10m", "2h", "1d"):
+            self.manager.register("realtime_data", interval, aggregate="FIRST")
+        self.manager.register("online_cleaning_data", "10m", columns=["do", "q"], aggregate="avg")
+
+    def chosen(self, *args, **kw) -> str:
+        rollup = self.manager.choose(*args, **kw)
+        return target_name(rollup) if rollup else None
+
+    def test_names(self):
+        rollup = self.manager.rollups[0]
+        self.assertEqual(target_name(rollup), "realtime_data_10m")
+        self.assertEqual(stream_name(rollup), "realtime_data_10m_stream")
+        self.assertEqual(duration_ms("2h"), 7200000)
+        self.assertEqual(duration_ms(1500), 1500)
+        with self.assertRaises(AssertionError):
+            duration_ms("1n")
+
+    def test_register_replaces(self):
+        self.manager.register("realtime_data", "10m", aggregate="AVG")
+        rollups = [r for r in self.manager.rollups if target_name(r) == "realtime_data_10m"]
+        self.assertEqual([r.aggregate for r in rollups], ["AVG"])
+
+    def test_largest_dividing_interval(self):
+        self.assertEqual(self.chosen("realtime_data", "2h"), "realtime_data_2h")
+        self.assertEqual(self.chosen("realtime_data", "4h"), "realtime_data_2h")
+        self.assertEqual(self.chosen("realtime_data", "30m"), "realtime_data_10m")
+        self.assertIsNone(self.chosen("realtime_data", "5m"))
+        self.assertIsNone(self.chosen("realtime_data", "15m"))
+
+    def test_only_existing_tables(self):
+        # 1d的汇总已登记，但汇总表不存在
+        self.assertEqual(self.chosen("realtime_data", "1d"), "realtime_data_2h")
+        self.stables.append("realtime_data_1d")
+        self.manager = RollupManager(self.pool, refresh=0)
+        for interval in ("10m", "2h", "1d"):
+            self.manager.register("realtime_data", interval, aggregate="FIRST")
+        self.assertEqual(self.chosen("realtime_data", "1d"), "realtime_data_1d")
+
+    def test_aggregate_and_columns(self):
+        self.assertEqual(self.chosen("realtime_data", "2h", aggregate="first"), "realtime_data_2h")
+        self.assertIsNone(self.chosen("realtime_data", "2h", aggregate="AVG"))
+        self.assertEqual(self.chosen("online_cleaning_data", "1h", ["do"], "AVG"), "online_cleaning_data_10m")
+        self.assertIsNone(self.chosen("online_cleaning_data", "1h", ["do", "tp"], "AVG"))
+        self.assertIsNone(self.chosen("offline_cleaning_data", "1h"))
+
+    def test_available_tables_are_cached(self):
+        for resolution in ("10m", "2h", "1d"):
+            self.manager.choose("realtime_data", resolution)
+        count = sum("ins_stables" in sql for sql in self.driver.sqls)
+        self.assertEqual(count, 1)
+
+        # 创建流计算后重新查询
+        self.manager.create(self.manager.rollups[0])
+        self.manager.choose("realtime_data", "10m")
+        self.assertEqual(sum("ins_stables" in sql for sql in self.driver.sqls), 2)
+
+    def test_query_reads_rollup(self):
+        self.manager.query("realtime_data", ["ts", "do"], resolution="2h", aggregate="FIRST")
+        self.manager.query("realtime_data", ["ts", "do"], resolution="4h", aggregate="FIRST")
+        self.manager.query("realtime_data", ["ts", "do"], resolution="5m", aggregate="FIRST")
+        selects = [sql for sql in self.driver.sqls if sql.startswith("SELECT") and "information_schema" not in sql]
+        self.assertEqual(len(selects), 3)
+        self.assertIn("FROM testdb.realtime_data_2h", selects[0])
+        self.assertNotIn("INTERVAL", selects[0])
+        self.assertIn("FROM testdb.realtime_data_2h", selects[1])
+        self.assertIn("INTERVAL(4h)", selects[1])
+        self.assertIn("FROM testdb.realtime_data ", selects[2])
+        self.assertIn("INTERVAL(5m)", selects[2])
+
+
+if __name__ == "__main__":
+    unittest.main()
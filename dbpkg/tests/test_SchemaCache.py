@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SchemaCache的测试：有效期、失效，以及TDengineDB的tables()、has_table()、describe()对缓存的使用，
+使用替身驱动（fake_taosrest），不需要TDengine服务器。
+
+运行：在项目根目录执行 python -m unittest dbpkg.tests.test_SchemaCache
+
+历史记录（按照以下格式依次添加）：
+   日期        人员	      改动情况
+2026-10-18    系统      创建。
+"""
+
+import time
+import unittest
+
+from dbpkg import SchemaCache
+from dbpkg.tests import fake_taosrest
+
+COLUMNS = [("ts", "TIMESTAMP", 8, ""), ("v", "DOUBLE", 8, "")]
+
+
+class SchemaCacheTest(unittest.TestCase):
+    def test_tables(self):
+        cache = SchemaCache.SchemaCache(ttl=60)
+        self.assertIsNone(cache.tables())
+        self.assertIsNone(cache.has_table("t1"))
+        cache.set_tables(["t1", "t2"])
+        self.assertEqual(cache.tables(), ["t1", "t2"])
+        self.assertTrue(cache.has_table("t1"))
+        self.assertFalse(cache.has_table("t3"))
+
+    def test_expire(self):
+        cache = SchemaCache.SchemaCache(ttl=0.05)
+        cache.set_tables(["t1"])
+        cache.set_describe("t1", COLUMNS)
+        self.assertEqual(cache.describe("t1"), COLUMNS)
+        time.sleep(0.1)
+        self.assertIsNone(cache.tables())
+        self.assertIsNone(cache.describe("t1"))
+
+    def test_no_cache_when_ttl_is_zero(self):
+        cache = SchemaCache.SchemaCache(ttl=0)
+        cache.set_tables(["t1"])
+        cache.set_describe("t1", COLUMNS)
+        self.assertIsNone(cache.tables())
+        self.assertIsNone(cache.describe("t1"))
+
+    def test_invalidate(self):
+        cache = SchemaCache.SchemaCache(ttl=60)
+        cache.set_tables(["t1", "t2"])
+        cache.set_describe("t1", COLUMNS)
+        cache.set_describe("t2", COLUMNS)
+        cache.set_option("precision", "ms")
+
+        cache.invalidate("t1")
+        self.assertIsNone(cache.tables())
+        self.assertIsNone(cache.describe("t1"))
+        self.assertEqual(cache.describe("t2"), COLUMNS)
+
+        cache.invalidate()
+        self.assertIsNone(cache.describe("t2"))
+        self.assertEqual(cache.option("precision"), "ms")    # 数据库选项不会失效
+
+    def test_get_cache(self):
+        key = ("http://fake", 6041, "schemadb")
+        self.addCleanup(SchemaCache._caches.pop, key, None)
+        cache = SchemaCache.get_cache(*key, ttl=60)
+        self.assertIs(SchemaCache.get_cache(*key, ttl=5), cache)
+        self.assertEqual(cache.ttl, 60)       # 有效期以第一次调用为准
+
+
+class TDengineDBSchemaTest(unittest.TestCase):
+    def setUp(self):
+        def handler(sql):
+            if sql == "SHOW TABLES":
+                return ["table_name"], [8], [("t1",), ("t2",)]
+            if sql.startswith("DESCRIBE"):
+                return ["field", "type", "length", "note"], [8, 8, 4, 8], COLUMNS
+            return [], [], []
+        self.driver = fake_taosrest.install(handler)
+        self.addCleanup(fake_taosrest.uninstall)
+        self.addCleanup(SchemaCache._caches.pop, ("http://fake", 6041, "schemadb"), None)
+        self.db = fake_taosrest.connect_db(database="schemadb", schema_ttl=60)
+
+    def count(self, prefix: str) -> int:
+        return sum(sql.startswith(prefix) for sql in self.driver.sqls)
+
+    def test_tables_are_cached(self):
+        self.assertEqual(self.db.tables(), ["t1", "t2"])
+        self.assertTrue(self.db.has_table("t2"))
+        self.assertFalse(self.db.has_table("t3"))
+        self.assertEqual(self.count("SHOW TABLES"), 1)
+
+    def test_describe_is_cached(self):
+        self.assertEqual(self.db.describe("t1"), COLUMNS)
+        self.assertEqual(self.db.describe("t1"), COLUMNS)
+        self.assertEqual(self.count("DESCRIBE"), 1)
+
+    def test_shared_between_connections(self):
+        self.db.tables()
+        other = fake_taosrest.connect_db(database="schemadb", schema_ttl=60)
+        self.assertTrue(other.has_table("t1"))
+        self.assertEqual(self.count("SHOW TABLES"), 1)
+
+    def test_create_and_drop_invalidate(self):
+        self.db.tables()
+        self.db.describe("t1")
+        self.assertTrue(self.db.create_table("t3", ["v DOUBLE"]))
+        self.db.tables()
+        self.assertEqual(self.count("SHOW TABLES"), 2)
+
+        self.assertTrue(self.db.delete_table("t1"))
+        self.db.describe("t1")
+        self.assertEqual(self.count("DESCRIBE"), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SegmentCache的测试：用内存中的数据代替数据库，检查分段读取、缺失段合并、未结束段的增量刷新、
+没有数据的段、LRU淘汰及invalidate()。
+
+运行：在项目根目录执行 python -m unittest dbpkg.tests.test_SegmentCache
+
+历史记录（按照以下格式依次添加）：
+   日期        人员	      改动情况
+2026-10-18    系统      创建。
+"""
+
+import re
+import time
+import unittest
+from contextlib import contextmanager
+
+import numpy as np
+
+from dbpkg.SegmentCache import SegmentCache
+
+HOUR = 3600 * 1000
+MINUTE = 60 * 1000
+# 一天前的整点，其后的段都已结束
+PAST = (int(time.time() * 1000) - 24 * HOUR) // HOUR * HOUR
+
+
+class FakeDB(object):
+    """按"ts >= a AND ts < b"条件从内存中的数据返回列式结果，记录查询的时间范围。"""
+    def __init__(self, rows: list) -> None:
+        self.rows = rows        # [(ts, v)]
+        self.ranges = []
+
+    def query(self, table_name, select_cols, conditions=None, order_cols=None, order_by=None,
+              columnar=False, epoch_ms=None):
+        start, end = map(int, re.search(r"ts >= (\d+) AND ts < (\d+)", conditions).groups())
+        self.ranges.append((start, end))
+        rows = sorted(row for row in self.rows if start <= row[0] < end)
+        return {"ts": np.array([row[0] for row in rows], dtype=np.int64),
+                "v": np.array([row[1] for row in rows], dtype=np.float64)}
+
+
+class FakePool(object):
+    def __init__(self, db: FakeDB) -> None:
+        self.db = db
+
+    @contextmanager
+    def connection(self, timeout=None, read_only=False):
+        yield self.db
+
+
+def make_rows(start: int, end: int, step: int = 10 * MINUTE) -> list:
+    return [(ts, float(ts // MINUTE % 1000)) for ts in range(start, end, step)]
+
+
+class SegmentCacheTest(unittest.TestCase):
+    def make_cache(self, rows, **kw):
+        self.db = FakeDB(rows)
+        return SegmentCache(FakePool(self.db), segment="1h", settle=0, **kw)
+
+    def test_split_and_reuse(self):
+        cache = self.make_cache(make_rows(PAST, PAST + 5 * HOUR))
+        result = cache.query("t", ["v"], PAST + 30 * MINUTE, PAST + 3 * HOUR)
+        self.assertEqual(result["ts"].tolist(), list(range(PAST + 30 * MINUTE, PAST + 3 * HOUR, 10 * MINUTE)))
+        # 相邻的3个缺失段合并为一次查询
+        self.assertEqual(self.db.ranges, [(PAST, PAST + 3 * HOUR)])
+        self.assertEqual(cache.stats()["segments"], 3)
+
+        # 已结束的段不再访问数据库；扩大范围时只读取新增的段
+        cache.query("t", ["v"], PAST, PAST + 3 * HOUR)
+        self.assertEqual(len(self.db.ranges), 1)
+        result = cache.query("t", ["v"], PAST + 2 * HOUR, PAST + 5 * HOUR)
+        self.assertEqual(self.db.ranges[1:], [(PAST + 3 * HOUR, PAST + 5 * HOUR)])
+        self.assertEqual(len(result["ts"]), 18)
+
+    def test_result_is_a_copy(self):
+        cache = self.make_cache(make_rows(PAST, PAST + HOUR))
+        result = cache.query("t", ["v"], PAST, PAST + HOUR)
+        result["v"][:] = -1
+        self.assertNotEqual(cache.query("t", ["v"], PAST, PAST + HOUR)["v"][0], -1)
+
+    def test_open_segment_delta_refresh(self):
+        now = int(time.time() * 1000)
+        seg_start = now // HOUR * HOUR
+        rows = [(seg_start, 1.0)]
+        cache = self.make_cache(rows, open_ttl=0)
+        self.assertEqual(cache.query("t", ["v"], seg_start, seg_start + HOUR)["v"].tolist(), [1.0])
+
+        # 过期后只读取最后一条缓存记录之后的数据，并追加到该段
+        rows.append((seg_start + 1, 2.0))
+        result = cache.query("t", ["v"], seg_start, seg_start + HOUR)
+        self.assertEqual(result["v"].tolist(), [1.0, 2.0])
+        self.assertEqual(self.db.ranges[-1], (seg_start + 1, seg_start + HOUR))
+
+    def test_open_segment_within_ttl(self):
+        seg_start = int(time.time() * 1000) // HOUR * HOUR
+        cache = self.make_cache([(seg_start, 1.0)], open_ttl=60)
+        cache.query("t", ["v"], seg_start, seg_start + HOUR)
+        cache.query("t", ["v"], seg_start, seg_start + HOUR)
+        self.assertEqual(len(self.db.ranges), 1)
+
+    def test_empty_closed_segment(self):
+        # 数据缺失的时间段缓存empty_ttl秒，不是每次都访问数据库
+        cache = self.make_cache([], empty_ttl=60)
+        for _ in range(3):
+            self.assertEqual(len(cache.query("t", ["v"], PAST, PAST + HOUR)["ts"]), 0)
+        self.assertEqual(len(self.db.ranges), 1)
+
+        cache = self.make_cache([], empty_ttl=0)
+        cache.query("t", ["v"], PAST, PAST + HOUR)
+        self.db.rows.append((PAST + MINUTE, 5.0))
+        self.assertEqual(cache.query("t", ["v"], PAST, PAST + HOUR)["v"].tolist(), [5.0])
+        self.assertEqual(len(self.db.ranges), 2)
+
+    def test_lru_eviction(self):
+        cache = self.make_cache(make_rows(PAST, PAST + 3 * HOUR), max_bytes=2 * 6 * 16)
+        for hour in range(3):
+            cache.query("t", ["v"], PAST + hour * HOUR, PAST + (hour + 1) * HOUR)
+        self.assertEqual(cache.stats()["segments"], 2)
+        self.assertLessEqual(cache.nbytes, 2 * 6 * 16)
+
+        # 最早使用的第一段已被淘汰，第三段仍在缓存中
+        cache.query("t", ["v"], PAST + 2 * HOUR, PAST + 3 * HOUR)
+        self.assertEqual(len(self.db.ranges), 3)
+        cache.query("t", ["v"], PAST, PAST + HOUR)
+        self.assertEqual(self.db.ranges[-1], (PAST, PAST + HOUR))
+
+    def test_invalidate(self):
+        cache = self.make_cache(make_rows(PAST, PAST + 3 * HOUR))
+        cache.query("t", ["v"], PAST, PAST + 3 * HOUR)
+        cache.query("u", ["v"], PAST, PAST + HOUR)
+
+        cache.invalidate("t", PAST + HOUR + MINUTE, PAST + HOUR + 2 * MINUTE)
+        cache.query("t", ["v"], PAST, PAST + 3 * HOUR)
+        self.assertEqual(self.db.ranges[-1], (PAST + HOUR, PAST + 2 * HOUR))
+
+        cache.invalidate("t")
+        self.assertEqual(cache.stats()["segments"], 1)
+        cache.invalidate()
+        self.assertEqual(cache.stats()["segments"], 0)
+        self.assertEqual(cache.nbytes, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
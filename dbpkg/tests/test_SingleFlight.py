@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SingleFlight的测试：同时执行的相同查询只执行一次、结果的复制、时间窗口及invalidate()。
+
+运行：在项目根目录执行 python -m unittest dbpkg.tests.test_SingleFlight
+
+历史记录（按照以下格式依次添加）：
+   日期        人员	      改动情况
+2026-10-18    系统      创建。
+"""
+
+import threading
+import time
+import unittest
+
+from dbpkg import SingleFlight
+
+
+class SingleFlightTest(unittest.TestCase):
+    def setUp(self):
+        SingleFlight.invalidate()
+        self.calls = 0
+
+    def slow_query(self, result):
+        def func():
+            self.calls += 1
+            time.sleep(0.2)
+            return result
+        return func
+
+    def run_threads(self, key, func, count: int = 5, window: float = 0) -> list:
+        results = [None] * count
+
+        def run(i):
+            results[i] = SingleFlight.do(key, func, window)
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_calls_share_one_query(self):
+        results = self.run_threads("q1", self.slow_query([{"v": 1}]))
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, [[{"v": 1}]] * 5)
+
+    def test_rows_are_copied(self):
+        # REST连接as_dict=False时每行是列表，修改一个调用者的结果不能影响其他调用者
+        for rows, key in (([[1, 2.0], [2, 3.0]], 1), ([{"ts": 1, "v": 2.0}], "v")):
+            results = self.run_threads(("q2", key), self.slow_query(rows), count=3)
+            for i, result in enumerate(results):
+                result[0][key] = i
+            self.assertEqual([result[0][key] for result in results], [0, 1, 2])
+
+    def test_window(self):
+        func = self.slow_query([[1]])
+        first = SingleFlight.do("q3", func, window=1.0)
+        second = SingleFlight.do("q3", func, window=1.0)
+        self.assertEqual(self.calls, 1)
+        second[0][0] = "changed"
+        self.assertEqual(SingleFlight.do("q3", func, window=1.0), [[1]])
+        self.assertEqual(first, [[1]])
+
+        SingleFlight.invalidate()
+        SingleFlight.do("q3", func, window=1.0)
+        self.assertEqual(self.calls, 2)
+
+    def test_without_window(self):
+        func = self.slow_query([[1]])
+        SingleFlight.do("q4", func)
+        SingleFlight.do("q4", func)
+        self.assertEqual(self.calls, 2)
+
+    def test_failed_result_not_shared(self):
+        SingleFlight.do("q5", self.slow_query(None), window=1.0)
+        self.assertEqual(SingleFlight.do("q5", self.slow_query([[1]]), window=1.0), [[1]])
+        self.assertEqual(self.calls, 2)
+
+    def test_exception(self):
+        def fail():
+            raise ValueError("failed")
+        with self.assertRaises(ValueError):
+            SingleFlight.do("q6", fail, window=1.0)
+        self.assertEqual(SingleFlight.do("q6", self.slow_query([[1]]), window=1.0), [[1]])
+
+
+if __name__ == "__main__":
+    unittest.main()
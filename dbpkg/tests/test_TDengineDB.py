@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+TDengineDB的测试，使用替身驱动（fake_taosrest），不需要TDengine服务器。
+
+运行：在项目根目录执行 python -m unittest dbpkg.tests.test_TDengineDB
+
+历史记录（按照以下格式依次添加）：
+   日期        人员	      改动情况
+2026-10-18    系统      创建。
+2026-10-18    系统      增加insert()、insert_columns()拼接多行INSERT语句的测试。
+2026-10-18    系统      增加update()批量写回的测试。
+2026-10-18    系统      增加delete()按时间范围删除、合并时间段的测试。
+"""
+
+import math
+import re
+import threading
+import unittest
+from datetime import datetime
+
+from dbpkg.tests import fake_taosrest
+
+
+class AffectedRowsTest(unittest.TestCase):
+    def setUp(self):
+        def handler(sql):
+            # DELETE FROM testdb.t3 删除3条记录
+            match = re.match(r"DELETE FROM testdb\.t(\d+)", sql)
+            return [], [], [], int(match.group(1)) if match else 0
+        fake_taosrest.install(handler)
+
+    def tearDown(self):
+        fake_taosrest.uninstall()
+
+    def test_single_thread(self):
+        db = fake_taosrest.connect_db()
+        self.assertTrue(db.delete("t5"))
+        self.assertEqual(db.affected_rows, 5)
+
+    def test_per_thread_in_thread_safe_mode(self):
+        db = fake_taosrest.connect_db(thread_safe=True)
+        barrier = threading.Barrier(4)
+        results = {}
+
+        def run(n):
+            db.delete(f"t{n}")
+            barrier.wait()      # 所有线程都删除之后再读取
+            results[n] = db.affected_rows
+        threads = [threading.Thread(target=run, args=(n,)) for n in (1, 2, 3, 4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, {1: 1, 2: 2, 3: 3, 4: 4})
+        self.assertEqual(db.affected_rows, 0)
+
+
+class InsertTest(unittest.TestCase):
+    def setUp(self):
+        self.fail_on = None
+
+        def handler(sql):
+            if self.fail_on and self.fail_on in sql:
+                raise fake_taosrest.Error("写入失败")
+            return [], [], []
+        self.driver = fake_taosrest.install(handler)
+        self.addCleanup(fake_taosrest.uninstall)
+        self.db = fake_taosrest.connect_db()
+
+    def test_sql_value(self):
+        sql_value = self.db._sql_value
+        self.assertEqual(sql_value(None), "NULL")
+        self.assertEqual(sql_value(True), "true")
+        self.assertEqual(sql_value(3), "3")
+        self.assertEqual(sql_value(1.5), "1.5")
+        self.assertEqual(sql_value(math.nan), "NULL")
+        self.assertEqual(sql_value("O'Neil\\"), "'O\\'Neil\\\\'")
+        self.assertEqual(sql_value(datetime(2024, 5, 15, 8)), "'2024-05-15 08:00:00'")
+
+    def test_insert_sqls_max_rows(self):
+        rows = [[i, float(i)] for i in range(5)]
+        sqls = list(self.db._insert_sqls("t", ("ts", "v"), rows, max_rows=2))
+        self.assertEqual([count for _, count in sqls], [2, 2, 1])
+        self.assertEqual(sqls[0][0], "INSERT INTO testdb.t (ts,v) VALUES (0,0.0)(1,1.0)")
+        self.assertEqual(sqls[2][0], "INSERT INTO testdb.t (ts,v) VALUES (4,4.0)")
+
+    def test_insert_sqls_max_sql_length(self):
+        rows = [[i, "值" * 10] for i in range(10)]
+        sqls = list(self.db._insert_sqls("t", None, rows, max_sql_length=200))
+        self.assertEqual(sum(count for _, count in sqls), 10)
+        self.assertGreater(len(sqls), 1)
+        for sql, count in sqls:
+            self.assertTrue(sql.startswith("INSERT INTO testdb.t VALUES ("))
+            self.assertLessEqual(len(sql.encode("utf-8")), 200)
+            self.assertEqual(sql.count("("), count)
+
+    def test_insert_groups_rows(self):
+        rows = [{"ts": 1, "v": 1.0}, [2, 2.0], {"ts": 3, "v": 3.0}, {"ts": 4, "w": None}, "skipped"]
+        self.assertTrue(self.db.insert("t", rows))
+        self.assertEqual(sorted(self.driver.sqls), sorted([
+            "INSERT INTO testdb.t (ts,v) VALUES (1,1.0)(3,3.0)",
+            "INSERT INTO testdb.t VALUES (2,2.0)",
+            "INSERT INTO testdb.t (ts,w) VALUES (4,NULL)",
+        ]))
+
+    def test_insert_batches(self):
+        rows = [[i, i] for i in range(7)]
+        self.assertTrue(self.db.insert("t", rows, max_rows=3))
+        self.assertEqual(len(self.driver.sqls), 3)
+
+    def test_insert_child_table(self):
+        self.assertTrue(self.db.insert("cstr_1_1", [[1, 2.0]], stable_name="cstr", tags={"train": "1_1", "no": 2}))
+        self.assertEqual(self.driver.sqls,
+                         ["INSERT INTO testdb.cstr_1_1 USING testdb.cstr (train,no) TAGS ('1_1',2) VALUES (1,2.0)"])
+
+    def test_insert_failure(self):
+        self.fail_on = "(2,2)"
+        self.assertFalse(self.db.insert("t", [[i, i] for i in range(5)], max_rows=2))
+        self.assertEqual(len(self.driver.sqls), 2)      # 第二条语句失败后不再写入第三条
+
+    def test_insert_columns(self):
+        self.assertTrue(self.db.insert_columns("t", {"ts": [1, 2, 3], "v": [1.0, math.nan, None]}))
+        self.assertEqual(self.driver.sqls, ["INSERT INTO testdb.t (ts,v) VALUES (1,1.0)(2,NULL)(3,NULL)"])
+
+
+class UpdateTest(unittest.TestCase):
+    def setUp(self):
+        self.rows = [(1, 1.0, "a"), (2, 2.0, "b"), (3, 3.0, "c")]
+
+        def handler(sql):
+            if sql.startswith("SELECT"):
+                return ["ts", "v", "s"], [9, 7, 8], self.rows
+            return [], [], []
+        self.driver = fake_taosrest.install(handler)
+        self.addCleanup(fake_taosrest.uninstall)
+        self.db = fake_taosrest.connect_db(insert_max_rows=2)
+
+    def test_update(self):
+        progress = []
+        self.assertTrue(self.db.update("t", {"v": 0, "s": "x"}, "v > 0", progress=lambda *p: progress.append(p)))
+        self.assertEqual(self.driver.sqls, [
+            "SELECT * FROM testdb.t WHERE v > 0",
+            "INSERT INTO testdb.t (ts,v,s) VALUES (1,0,'x')(2,0,'x')",
+            "INSERT INTO testdb.t (ts,v,s) VALUES (3,0,'x')",
+        ])
+        self.assertEqual(progress, [(2, 3), (3, 3)])
+
+    def test_update_all(self):
+        self.assertTrue(self.db.update("t", {"s": None}))
+        self.assertEqual(self.driver.sqls[0], "SELECT * FROM testdb.t")
+
+    def test_no_records(self):
+        self.rows = []
+        self.assertFalse(self.db.update("t", {"v": 0}, "v > 10"))
+        self.assertEqual(len(self.driver.sqls), 1)
+
+    def test_unknown_column(self):
+        self.assertFalse(self.db.update("t", {"w": 0}))
+        self.assertEqual(len(self.driver.sqls), 1)
+
+
+class DeleteTest(unittest.TestCase):
+    # 表中的记录(ts, v)，条件"v > 1"匹配ts为1、2、4、5的记录
+    DATA = [(1, 2), (2, 3), (3, 0), (4, 4), (5, 5), (6, 0)]
+
+    def setUp(self):
+        self.case_fails = False
+
+        def handler(sql):
+            if sql.startswith("SELECT ts FROM"):
+                return ["ts"], [9], [(ts,) for ts, v in self.DATA if v > 1]
+            if sql.startswith("SELECT ts, CASE"):
+                if self.case_fails:
+                    raise fake_taosrest.Error("不支持CASE WHEN")
+                first, last = map(int, re.search(r"ts>=(\d+) AND ts<=(\d+)", sql).groups())
+                return ["ts", "hit"], [9, 4], [(ts, int(v > 1)) for ts, v in self.DATA if first <= ts <= last]
+            if sql.startswith("DELETE"):
+                match = re.search(r"ts>=(\d+) AND ts<=(\d+)|ts=(\d+)", sql)
+                if not match:
+                    return [], [], [], len(self.DATA)
+                first = int(match.group(1) or match.group(3))
+                last = int(match.group(2) or match.group(3))
+                return [], [], [], sum(first <= ts <= last for ts, _ in self.DATA)
+            return [], [], []
+        self.driver = fake_taosrest.install(handler)
+        self.addCleanup(fake_taosrest.uninstall)
+        self.db = fake_taosrest.connect_db()
+
+    def test_time_range(self):
+        self.assertTrue(self.db.delete("t", start="2024-05-15 00:00:00", end="2024-05-22 00:00:00"))
+        self.assertEqual(self.driver.sqls, [
+            "DELETE FROM testdb.t WHERE (ts >= '2024-05-15 00:00:00') AND (ts < '2024-05-22 00:00:00')"])
+
+    def test_ts_conditions(self):
+        self.assertTrue(self.db.delete("t", "ts >= 1 AND ts < 3"))
+        self.assertEqual(self.driver.sqls, ["DELETE FROM testdb.t WHERE ts >= 1 AND ts < 3"])
+
+    def test_all_rows(self):
+        self.assertTrue(self.db.delete("t"))
+        self.assertEqual(self.driver.sqls, ["DELETE FROM testdb.t"])
+        self.assertEqual(self.db.affected_rows, 6)
+
+    def test_merge_runs(self):
+        self.assertTrue(self.db.delete("t", "v > 1"))
+        self.assertEqual(self.driver.sqls[2:], [
+            "DELETE FROM testdb.t WHERE ts>=1 AND ts<=2",
+            "DELETE FROM testdb.t WHERE ts>=4 AND ts<=5",
+        ])
+        self.assertEqual(self.db.affected_rows, 4)
+
+    def test_each_ts_without_case(self):
+        self.case_fails = True
+        self.assertTrue(self.db.delete("t", "v > 1"))
+        self.assertEqual(self.driver.sqls[2:], [f"DELETE FROM testdb.t WHERE ts={ts}" for ts in (1, 2, 4, 5)])
+        self.assertEqual(self.db.affected_rows, 4)
+
+    def test_no_match(self):
+        self.DATA = [(1, 0)]
+        self.assertTrue(self.db.delete("t", "v > 1"))
+        self.assertEqual(len(self.driver.sqls), 1)
+        self.assertEqual(self.db.affected_rows, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+TDenginePool的测试：连接的借出与归还、最大连接数、损坏连接的关闭、健康检查、query_many()
+及get_pool()，使用替身驱动（fake_taosrest），不需要TDengine服务器。
+
+运行：在项目根目录执行 python -m unittest dbpkg.tests.test_TDenginePool
+
+历史记录（按照以下格式依次添加）：
+   日期        人员	      改动情况
+2026-10-18    系统      创建。
+"""
+
+import re
+import unittest
+
+from dbpkg import TDenginePool
+from dbpkg.tests import fake_taosrest
+
+
+class TDenginePoolTest(unittest.TestCase):
+    def setUp(self):
+        self.ping_fails = False
+
+        def handler(sql):
+            if "SERVER_VERSION" in sql:
+                if self.ping_fails:
+                    raise fake_taosrest.Error("连接已断开")
+                return ["server_version()"], [8], [("3.3.0.0",)]
+            match = re.match(r"SELECT (\d+)$", sql)
+            if not match:
+                raise fake_taosrest.Error(f"语法错误：{sql}")
+            return ["n"], [4], [(int(match.group(1)),)]
+        self.driver = fake_taosrest.install(handler)
+
+    def tearDown(self):
+        TDenginePool.close_all_pools()
+        fake_taosrest.uninstall()
+
+    def new_pool(self, **kw) -> TDenginePool.TDenginePool:
+        pool = TDenginePool.TDenginePool(**fake_taosrest.db_config(**kw))
+        self.addCleanup(pool.close)
+        return pool
+
+    def test_acquire_and_release(self):
+        pool = self.new_pool()
+        db = pool.acquire()
+        self.assertEqual((pool.size, pool.idle), (1, 0))
+        pool.release(db)
+        self.assertEqual((pool.size, pool.idle), (1, 1))
+        self.assertIs(pool.acquire(), db)
+        self.assertEqual(len(self.driver.connections), 1)
+
+    def test_max_size(self):
+        pool = self.new_pool(max_size=2)
+        first, second = pool.acquire(), pool.acquire()
+        with self.assertRaises(TimeoutError):
+            pool.acquire(timeout=0.1)
+        pool.release(first)
+        self.assertIs(pool.acquire(timeout=0.1), first)
+        pool.release(second)
+
+    def test_release_broken(self):
+        pool = self.new_pool()
+        db = pool.acquire()
+        pool.release(db, broken=True)
+        self.assertEqual((pool.size, pool.idle), (0, 0))
+        self.assertTrue(self.driver.connections[0].closed)
+
+    def test_exception_in_connection_discards(self):
+        pool = self.new_pool()
+        with self.assertRaises(ValueError):
+            with pool.connection():
+                raise ValueError("请求中断")
+        self.assertEqual((pool.size, pool.idle), (0, 0))
+        self.assertTrue(self.driver.connections[0].closed)
+
+        with pool.connection() as db:
+            self.assertTrue(db.ping())
+        self.assertEqual((pool.size, pool.idle), (1, 1))
+
+    def test_connect_failure(self):
+        self.driver.down.add("http://fake:6041")
+        pool = self.new_pool()
+        with self.assertRaises(ConnectionError):
+            pool.acquire()
+        self.assertEqual(pool.size, 0)
+
+    def test_health_check(self):
+        pool = self.new_pool(check_interval=0)
+        db = pool.acquire()
+        pool.release(db)
+        self.ping_fails = True
+        new_db = pool.acquire()
+        self.assertIsNot(new_db, db)
+        self.assertTrue(self.driver.connections[0].closed)
+        self.assertEqual(pool.size, 1)
+
+    def test_query_many(self):
+        pool = self.new_pool(max_size=3)
+        queries = [f"SELECT {n}" for n in range(10)]
+        queries[4] = "SELECT bad"
+        results = pool.query_many(queries, concurrency=3, columnar=False)
+        self.assertIsNone(results[4])
+        self.assertEqual([result[0]["n"] for i, result in enumerate(results) if i != 4],
+                         [n for n in range(10) if n != 4])
+        self.assertLessEqual(pool.size, 3)
+
+    def test_close(self):
+        pool = self.new_pool()
+        db = pool.acquire()
+        pool.close()
+        with self.assertRaises(ConnectionError):
+            pool.acquire()
+        pool.release(db)
+        self.assertEqual(pool.size, 0)
+        self.assertTrue(self.driver.connections[0].closed)
+
+    def test_get_pool_shared(self):
+        pool = TDenginePool.get_pool(**fake_taosrest.db_config())
+        self.assertIs(TDenginePool.get_pool(**fake_taosrest.db_config()), pool)
+        self.assertIsNot(TDenginePool.get_pool(**fake_taosrest.db_config(database="other")), pool)
+
+    def test_get_pool_replaces_named_pool(self):
+        old = TDenginePool.get_pool(name="backend", **fake_taosrest.db_config())
+        with old.connection():
+            pass
+        new = TDenginePool.get_pool(name="backend", **fake_taosrest.db_config(password="changed"))
+        self.assertIsNot(new, old)
+        self.assertEqual(old.size, 0)
+        self.assertTrue(self.driver.connections[0].closed)
+        self.assertIs(TDenginePool.get_pool(name="backend", **fake_taosrest.db_config(password="changed")), new)
+
+        # 其他名称仍在使用的连接池不关闭
+        other = TDenginePool.get_pool(name="other", **fake_taosrest.db_config(password="changed"))
+        TDenginePool.get_pool(name="backend", **fake_taosrest.db_config())
+        self.assertIs(other, new)
+        with new.connection():
+            pass
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+columnar的测试：行列转换的类型推断、to_list()及to_records()。
+
+运行：在项目根目录执行 python -m unittest dbpkg.tests.test_columnar
+
+历史记录（按照以下格式依次添加）：
+   日期        人员	      改动情况
+2026-10-18    系统      创建。
+"""
+
+import unittest
+from datetime import datetime
+
+import numpy as np
+
+from dbpkg import columnar
+
+
+class ToColumnsTest(unittest.TestCase):
+    def test_mixed_int_float(self):
+        # taosAdapter的JSON中，DOUBLE字段的12.0返回为12，后面的小数不能被截断为整数
+        result = columnar.to_columns(["a"], [(12,), (12.5,)])
+        self.assertEqual(result["a"].dtype, np.float64)
+        self.assertEqual(result["a"].tolist(), [12.0, 12.5])
+
+    def test_float_type_from_description(self):
+        # 字段类型为浮点数时，即使所有值都是整数也转换为float64
+        for field_type in ("DOUBLE", "float", 7, 6):
+            result = columnar.to_columns(["a"], [(12,), (None,), (13,)], [field_type])
+            self.assertEqual(result["a"].dtype, np.float64)
+            self.assertEqual(columnar.to_list(result["a"]), [12.0, None, 13.0])
+
+    def test_int_column(self):
+        result = columnar.to_columns(["a", "b"], [(1, None), (2, 5)], ["INT", "BIGINT"])
+        self.assertEqual(result["a"].dtype, np.int64)
+        self.assertTrue(np.ma.isMaskedArray(result["b"]))
+        self.assertEqual(columnar.to_list(result["b"]), [None, 5])
+
+    def test_timestamp_and_string(self):
+        ts = datetime(2026, 10, 18, 8, 0, 0)
+        result = columnar.to_columns(["ts", "s"], [(ts, "x"), (None, None)])
+        self.assertEqual(columnar.to_list(result["ts"])[0], round(ts.timestamp() * 1000))
+        self.assertEqual(result["s"].tolist(), ["x", None])
+
+    def test_all_null_and_empty(self):
+        result = columnar.to_columns(["a"], [(None,), (None,)])
+        self.assertEqual(columnar.to_list(result["a"]), [None, None])
+        self.assertEqual(len(columnar.to_columns(["a"], [])["a"]), 0)
+
+
+class ToRecordsTest(unittest.TestCase):
+    def test_to_records(self):
+        ts = [datetime(2026, 10, 18, 0, 0), datetime(2026, 10, 18, 0, 10)]
+        result = columnar.to_columns(["ts", "a"], [(ts[0], 1), (ts[1], 1.5)])
+        records = columnar.to_records(result, ["a", "b"], ["A", "B"])
+        self.assertEqual(records, [{"ts": "2026-10-18 00:00:00", "A": 1.0, "B": None},
+                                   {"ts": "2026-10-18 00:10:00", "A": 1.5, "B": None}])
+
+
+if __name__ == "__main__":
+    unittest.main()